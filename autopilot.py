@@ -0,0 +1,328 @@
+"""A bot that plays Cat-a-Pillar by itself within a fixed time per tick.
+
+The autopilot plans a path to the food with an A* search over the board in
+which every step also moves time on: a body segment is only in the way
+until the tail has moved past it, and moving obstacles are where they will
+be on the tick the head gets there (they move deterministically, so their
+positions can be worked out ahead). A cell is also avoided if an obstacle
+will slide over it while it is still part of the body. Before taking a
+path it checks that the head could still reach the tail from the end of
+it. The path is then followed tick after tick without searching again
+until the food moves or the next step on it is no longer safe.
+
+When there is no safe path to the food, it falls back to staying alive:
+of the moves that don't crash on the next tick it takes one from which the
+tail can still be reached (following the tail) or that leads into open
+space, and otherwise the one with the most room.
+
+All searches stop when the time budget for the tick runs out. An A* search
+cut short still gives a path towards the food, to the explored cell
+closest to it, which is followed until it runs out if the head could reach
+the tail from its end. The A* search only gets part of the budget, so that
+the space checks get the rest; they count what they have seen so far when
+that runs out too. A search that runs out of cells instead means the food
+can't be reached (yet), and the autopilot only tries to stay alive. So a
+tick never takes much longer than the budget, even on large boards at
+'Autism' speed.
+"""
+import heapq
+import time
+from bisect import bisect_left
+from collections import deque
+
+from engine import DIRECTIONS, OBSTACLE_SIZE, can_turn, covered_cells, rect_cells
+
+AUTOPILOT_BUDGET = 0.002  # Seconds of search per tick
+CHECK_EVERY = 32  # Cells searched between looks at the clock
+SEARCH_SHARE = 0.5  # Part of the budget the A* search may use; the rest is for the space checks
+BODY_LOOKAHEAD = 128  # Most ticks a new body cell is checked against moving obstacles for
+GROWTH_MARGIN = 4  # Extra ticks for food the snake may eat while a cell is part of it
+
+
+class Autopilot:
+    """Controller for one game: call it with the state before every tick.
+
+    Returns the direction to turn to, or None to keep going straight, the
+    same as the controllers in tournament.py.
+    """
+
+    def __init__(self, state, budget=AUTOPILOT_BUDGET):
+        self.budget = budget
+        self.cols = state.cols
+        self.rows = state.rows
+        self.wrap = not state.has_wall
+        # Static obstacles never move during a game
+        self.static = {cell for obstacle in state.obstacles for cell in rect_cells(obstacle)}
+        self.path = deque()  # Cells still to move through, next one first
+        self.target = None   # Where the path ends; the food it was planned for
+        self.now = 0         # The state's tick when last called
+        self.stay = 0        # Ticks a cell the head moves into stays part of the body
+        # Predicted moving obstacles, kept from tick to tick as long as they
+        # turn out right: (tick, positions, cells they cover) per tick ahead,
+        # and the ticks on which each cell is covered
+        self.future = deque()
+        self.covered = {}
+
+    def __call__(self, state):
+        deadline = time.perf_counter() + self.budget
+        self.now = state.tick
+        growth = state.snake_length - len(state.snake) + len(state.bulge_ticks)
+        self.stay = min(state.snake_length + growth + GROWTH_MARGIN, BODY_LOOKAHEAD)
+        if state.moving_obstacles:
+            self._sync(state)
+        target = self._target(state)
+
+        # Keep following the planned path while it still leads to the food
+        if self.path and self.target == target and self._safe(state, self.path[0], 1):
+            return self._move(state, self.path.popleft())
+
+        self.path.clear()
+        if target is not None:
+            path, exhausted = self._search(state, target, deadline - self.budget * (1 - SEARCH_SHARE))
+            # Half of what is left to check the path, half for _survive() if it fails
+            now = time.perf_counter()
+            if path and not exhausted and self._room_after(state, path, now + (deadline - now) / 2):
+                self.path.extend(path)
+                self.target = target
+                return self._move(state, self.path.popleft())
+        return self._survive(state, deadline)
+
+    def _target(self, state):
+        if state.extra_food_visible:
+            return (state.extra_food_x, state.extra_food_y)
+        if state.food_x is None:
+            return None
+        return (state.food_x, state.food_y)
+
+    def _move(self, state, cell):
+        """The direction from the head to the neighboring cell, None if straight on."""
+        for direction in DIRECTIONS:
+            if self._step(state.head, direction) == cell:
+                return None if direction == state.direction else direction
+        return None
+
+    def _step(self, cell, direction):
+        x, y = cell[0] + direction[0], cell[1] + direction[1]
+        if self.wrap:
+            return (x % self.cols, y % self.rows)
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            return (x, y)
+        return None
+
+    def _sync(self, state):
+        """Drop the prediction for the tick just played, or start over if it was wrong."""
+        positions = tuple((mob.x, mob.y, mob.dx, mob.dy) for mob in state.moving_obstacles)
+        future = self.future
+        if future and future[0][0] == state.tick and future[0][1] == positions:
+            future.popleft()
+            if future:
+                if state.tick % BODY_LOOKAHEAD == 0:
+                    # Forget the ticks that have gone by now and then
+                    self.covered = {}
+                    for tick, _, cells in future:
+                        for cell in cells:
+                            self.covered.setdefault(cell, []).append(tick)
+                return
+        future.clear()
+        future.append((state.tick, positions, ()))
+        self.covered = {}
+        self._predict(1)
+        future.popleft()
+
+    def _predict(self, ticks):
+        """Work out where the moving obstacles are up to ticks ticks from now."""
+        cols, rows = self.cols, self.rows
+        future = self.future
+        covered = self.covered
+        while future[-1][0] < self.now + ticks:
+            tick = future[-1][0] + 1
+            positions = []
+            cells = []
+            for x, y, dx, dy in future[-1][1]:
+                # As MovingObstacle.move()
+                x += dx
+                y += dy
+                if x < 0 or x + OBSTACLE_SIZE > cols:
+                    dx = -dx
+                if y < 0 or y + OBSTACLE_SIZE > rows:
+                    dy = -dy
+                positions.append((x, y, dx, dy))
+                cells.extend(covered_cells(x, y, OBSTACLE_SIZE, OBSTACLE_SIZE))
+            for cell in cells:
+                covered.setdefault(cell, []).append(tick)
+            future.append((tick, tuple(positions), cells))
+
+    def _safe(self, state, cell, ticks, stay=None):
+        """True if the head can be in cell ticks ticks from now without crashing.
+
+        Body segments count as gone once the tail has moved past them,
+        assuming every growth that may happen in between does. The cell
+        must also stay clear of moving obstacles for as long as it will be
+        part of the body (stay ticks, self.stay by default).
+        """
+        if cell is None or cell in self.static:
+            return False
+        body = state.snake
+        if cell in body:
+            from_tail = body.occupied[cell] - (body.pushed - len(body))
+            growth = state.snake_length - len(body) + len(state.bulge_ticks)
+            if from_tail >= ticks - 1 - growth:
+                return False
+        if self.future:
+            # Hit as the head on that tick, or as part of the body after it
+            if stay is None:
+                stay = self.stay
+            self._predict(ticks + stay)
+            times = self.covered.get(cell)
+            if times:
+                tick = self.now + ticks
+                idx = bisect_left(times, tick)
+                if idx < len(times) and times[idx] <= tick + stay:
+                    return False
+        return True
+
+    def _distance(self, cell, target):
+        dx = abs(cell[0] - target[0])
+        dy = abs(cell[1] - target[1])
+        if self.wrap:
+            dx = min(dx, self.cols - dx)
+            dy = min(dy, self.rows - dy)
+        return dx + dy
+
+    def _search(self, state, target, deadline):
+        """A* from the head to target; returns (path, exhausted).
+
+        If time runs out first, the path leads to the searched cell
+        closest to the target instead. exhausted is True if every
+        reachable cell was searched without getting to the target, in
+        which case the path only leads into a dead end.
+        """
+        head = state.head
+        parents = {head: None}
+        best = (self._distance(head, target), 0, head)
+        queue = [(best[0], 0, head)]
+        expanded = 0
+        reached = None
+        exhausted = False
+        while queue:
+            _, ticks, cell = heapq.heappop(queue)
+            if cell == target:
+                reached = cell
+                break
+            expanded += 1
+            if expanded % CHECK_EVERY == 0 and time.perf_counter() >= deadline:
+                break
+            for direction in DIRECTIONS:
+                if cell == head and not can_turn(state.direction, direction) and direction != state.direction:
+                    continue
+                neighbor = self._step(cell, direction)
+                if neighbor is None or neighbor in parents or not self._safe(state, neighbor, ticks + 1):
+                    continue
+                parents[neighbor] = cell
+                distance = self._distance(neighbor, target)
+                if (distance, ticks + 1) < best[:2]:
+                    best = (distance, ticks + 1, neighbor)
+                heapq.heappush(queue, (ticks + 1 + distance, ticks + 1, neighbor))
+        else:
+            exhausted = True
+
+        end = reached or best[2]
+        path = []
+        while end != head:
+            path.append(end)
+            end = parents[end]
+        path.reverse()
+        return path, exhausted
+
+    def _room_after(self, state, path, deadline):
+        """True if after following path the head could still reach the tail."""
+        growth = state.snake_length - len(state.snake) + len(state.bulge_ticks) + 1
+        body = list(state.snake) + path
+        body = body[-(len(state.snake) + growth):]
+        return self._reaches_tail(body, deadline, len(body))
+
+    def _reaches_tail(self, body, deadline, enough):
+        """Flood fill from the head of body (tail first) over the board.
+
+        True if it gets to the tail, or finds at least enough cells of
+        room, or time runs out before it could tell.
+        """
+        head, tail = body[-1], body[0]
+        blocked = set(body)
+        blocked.discard(tail)
+        seen = {head}
+        frontier = [head]
+        searched = 0
+        while frontier:
+            searched += 1
+            if searched % CHECK_EVERY == 0 and time.perf_counter() >= deadline:
+                return True
+            cell = frontier.pop()
+            for direction in DIRECTIONS:
+                neighbor = self._step(cell, direction)
+                if neighbor is None or neighbor in seen or neighbor in self.static:
+                    continue
+                if neighbor == tail or len(seen) >= enough:
+                    return True
+                if neighbor not in blocked:
+                    seen.add(neighbor)
+                    frontier.append(neighbor)
+        return False
+
+    def _room(self, state, start, deadline, limit):
+        """Cells reachable from start (up to limit), and whether the tail is among them."""
+        body = state.snake
+        tail = body.tail if len(body) else None
+        seen = {start}
+        frontier = [start]
+        reaches_tail = False
+        searched = 0
+        while frontier and len(seen) < limit:
+            searched += 1
+            if searched % CHECK_EVERY == 0 and time.perf_counter() >= deadline:
+                break
+            cell = frontier.pop()
+            for direction in DIRECTIONS:
+                neighbor = self._step(cell, direction)
+                if neighbor is None or neighbor in seen or neighbor in self.static:
+                    continue
+                if neighbor == tail:
+                    reaches_tail = True
+                if neighbor not in body:
+                    seen.add(neighbor)
+                    frontier.append(neighbor)
+        return len(seen), reaches_tail
+
+    def _survive(self, state, deadline):
+        """Stay alive: follow the tail or head into open space if possible, else go where there is most room."""
+        moves = [direction for direction in DIRECTIONS
+                 if direction == state.direction or can_turn(state.direction, direction)]
+        moves = [(direction, self._step(state.head, direction)) for direction in moves]
+        # If no cell stays clear of moving obstacles for long enough, take
+        # those that do for longest, so the tail may be gone when they come
+        stay = self.stay
+        while True:
+            safe = [(direction, cell) for direction, cell in moves if self._safe(state, cell, 1, stay)]
+            if safe or stay == 0:
+                break
+            stay //= 2
+        moves = safe
+        if not moves:
+            return None
+        limit = 2 * len(state.snake) + 2
+        best = None
+        for idx, (direction, cell) in enumerate(moves):
+            # Every move gets its share of what is left of the budget
+            now = time.perf_counter()
+            share = now + (deadline - now) / (len(moves) - idx)
+            room, reaches_tail = self._room(state, cell, share, limit)
+            score = (reaches_tail or room >= limit, room, direction == state.direction)
+            if best is None or score > best[0]:
+                best = (score, direction)
+        direction = best[1]
+        return None if direction == state.direction else direction
+
+
+def autopilot_bot(state):
+    """The autopilot as a tournament bot."""
+    return Autopilot(state)
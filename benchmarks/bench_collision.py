@@ -0,0 +1,56 @@
+"""Per-tick cost of the rules engine as the snake gets longer.
+
+Runs GameState.step() with snakes from 1 to several thousand segments and
+prints the average time per tick next to the old list scan that main()
+used for self-collision (`for segment in snake_list[:-1]`). The engine
+column should stay flat while the list scan grows with length.
+
+    python benchmarks/bench_collision.py
+"""
+import time
+
+from common import serpentine, build_state as build_folded_state
+from engine import RIGHT
+
+COLS = 200
+ROWS = 60
+LENGTHS = [1, 10, 100, 1000, 4000, 8000]
+REPEATS = 20
+
+
+def time_engine(length):
+    ticks = 0
+    elapsed = 0.0
+    for _ in range(REPEATS):
+        state = build_folded_state(length, COLS, ROWS)
+        state.step()  # Up into the empty top row
+        start = time.perf_counter()
+        for _ in range(COLS - 2):
+            if not state.step(RIGHT):
+                raise RuntimeError('snake crashed during benchmark')
+        elapsed += time.perf_counter() - start
+        ticks += COLS - 2
+    return elapsed / ticks
+
+
+def time_list_scan(length):
+    snake_list = [list(cell) for cell in serpentine(length, COLS, ROWS)]
+    snake_head = [COLS - 1, 0]
+    snake_list.append(snake_head)
+    runs = 2000 if length < 1000 else 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        for segment in snake_list[:-1]:
+            if segment == snake_head:
+                break
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    print(f"{'length':>8} {'step() us/tick':>16} {'list scan us':>14}")
+    for length in LENGTHS:
+        print(f"{length:>8} {time_engine(length) * 1e6:>16.2f} {time_list_scan(length) * 1e6:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
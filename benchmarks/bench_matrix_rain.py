@@ -0,0 +1,60 @@
+"""Frame time of the Matrix rain on the start screen.
+
+Runs the rain at 800x600 for a few seconds of simulated 60 fps frames,
+once at full density and once keeping to the frame budget, and prints the
+mean, 95th percentile and worst time per frame (update plus draw) next to
+the budget. Runs without a window.
+
+    python benchmarks/bench_matrix_rain.py
+"""
+import time
+
+import common  # noqa: F401 - headless setup
+
+import pygame
+
+import matrix_rain
+from matrix_rain import MatrixRain, FRAME_BUDGET
+
+SIZE = (800, 600)
+FRAMES = 600
+DT = 1 / 60
+
+
+def run(rain, screen):
+    times = []
+    blits = 0
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        rain.update(DT)
+        rain.draw(screen)
+        times.append(time.perf_counter() - start)
+        blits += len(rain.blits())
+    times.sort()
+    return {
+        'mean': sum(times) / len(times),
+        'p95': times[int(len(times) * 0.95)],
+        'max': times[-1],
+        'blits': blits / FRAMES,
+        'density': rain.density,
+    }
+
+
+def main():
+    if not matrix_rain.available:
+        print("NumPy is not installed, the rain is disabled")
+        return
+    pygame.init()
+    screen = pygame.display.set_mode(SIZE)
+    font = pygame.font.SysFont('Courier', 15, bold=True)
+
+    print(f"budget {FRAME_BUDGET * 1e3:.1f} ms, a 60 fps frame is {DT * 1e3:.1f} ms")
+    print(f"{'run':<14} {'mean ms':>8} {'p95 ms':>8} {'max ms':>8} {'blits':>7} {'density':>8}")
+    for label, budget in (('full density', None), ('with budget', FRAME_BUDGET)):
+        result = run(MatrixRain(SIZE, font, seed=1, budget=budget), screen)
+        print(f"{label:<14} {result['mean'] * 1e3:>8.2f} {result['p95'] * 1e3:>8.2f} "
+              f"{result['max'] * 1e3:>8.2f} {result['blits']:>7.0f} {result['density']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
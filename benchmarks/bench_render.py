@@ -0,0 +1,102 @@
+"""Frame render time as the snake gets longer.
+
+Draws snakes from 10 to several thousand segments with the old per-shape
+pygame.draw calls (one rect per segment, rounded rects for head and tail, a
+circle per food) and with the sprite atlas and a single Surface.blits()
+call, then times full and dirty-rectangle frames of BoardRenderer. Runs
+without a window.
+
+    python benchmarks/bench_render.py
+"""
+import time
+
+from common import serpentine, build_state as build_folded_state
+
+import pygame
+
+from engine import RIGHT
+from renderer import (BoardRenderer, SpriteAtlas, snake_blits, BULGE,
+                      BLACK, WHITE, RED, GREEN, YELLOW)
+
+BLOCK = 10
+COLS = 200
+ROWS = 60
+LENGTHS = [10, 100, 1000, 4000, 8000]
+BULGE_EVERY = 50
+
+
+def draw_snake_per_shape(surface, snake, bulge_indices, food):
+    """The snake and food drawn the way they were before the sprite atlas."""
+    for idx, segment in enumerate(snake):
+        x, y = segment[0] * BLOCK, segment[1] * BLOCK
+        if idx in bulge_indices:
+            thickness = BLOCK + 2 * BULGE
+            pygame.draw.rect(surface, YELLOW, [x - BULGE, y - BULGE, thickness, thickness])
+        else:
+            pygame.draw.rect(surface, WHITE, [x, y, BLOCK, BLOCK])
+    head = snake[-1]
+    pygame.draw.rect(surface, RED, [head[0] * BLOCK, head[1] * BLOCK, BLOCK, BLOCK], border_radius=5)
+    tail = snake[0]
+    pygame.draw.rect(surface, WHITE, [tail[0] * BLOCK, tail[1] * BLOCK, BLOCK, BLOCK], border_radius=5)
+    center = (food[0] * BLOCK + BLOCK // 2, food[1] * BLOCK + BLOCK // 2)
+    pygame.draw.circle(surface, GREEN, center, BLOCK // 2)
+
+
+def draw_snake_atlas(surface, atlas, snake, bulge_indices, food):
+    blits = snake_blits(atlas, snake, bulge_indices)
+    blits.append(atlas.cell_blit('food', food))
+    surface.blits(blits, doreturn=False)
+
+
+def time_it(func, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / runs
+
+
+def build_state(length):
+    state = build_folded_state(length, COLS, ROWS)
+    state.step()  # Up into the empty top row
+    state.bulge_ticks.extend(range(state.tick - length, state.tick, BULGE_EVERY))
+    return state
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((COLS * BLOCK, ROWS * BLOCK))
+    font = pygame.font.Font(None, 20)
+    atlas = SpriteAtlas(BLOCK)
+    layer = pygame.Surface(screen.get_size()).convert()
+
+    print(f"{'length':>8} {'draw calls ms':>14} {'atlas ms':>10} {'full frame ms':>14} {'dirty frame ms':>15}")
+    for length in LENGTHS:
+        runs = 200 if length < 1000 else 20
+        snake = serpentine(length, COLS, ROWS)
+        food = (COLS - 1, ROWS - 1)
+        bulges = set(range(0, length, BULGE_EVERY))
+
+        layer.fill(BLACK)
+        per_shape = time_it(lambda: draw_snake_per_shape(layer, snake, bulges, food), runs)
+        with_atlas = time_it(lambda: draw_snake_atlas(layer, atlas, snake, sorted(bulges), food), runs)
+
+        state = build_state(length)
+        full = BoardRenderer(screen, state, font, BLOCK, dirty=False)
+        full_frame = time_it(lambda: full.draw(0.0), runs)
+
+        state = build_state(length)
+        dirty = BoardRenderer(screen, state, font, BLOCK)
+        dirty.draw(0.0)
+        ticks = COLS - 2
+        start = time.perf_counter()
+        for _ in range(ticks):
+            state.step(RIGHT)
+            dirty.draw(0.0)
+        dirty_frame = (time.perf_counter() - start) / ticks
+
+        print(f"{length:>8} {per_shape * 1e3:>14.3f} {with_atlas * 1e3:>10.3f} "
+              f"{full_frame * 1e3:>14.3f} {dirty_frame * 1e3:>15.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Time to first frame: how long the game takes to show its start screen.
+
+Starts the game in a fresh Python process a few times and reports when
+pygame was imported, when catapillar.py was done setting up (display,
+fonts), when the first frame was on screen and when the start-up work put
+off until after it was done, all counted from the moment the process was
+launched. The first run starts from an empty data directory, so it pays
+for the system font scan the others find in the font cache. Runs without
+a window.
+
+    python benchmarks/bench_startup.py [--runs N]
+"""
+import argparse
+import atexit
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import common
+
+START_VARIABLE = 'CATAPILLAR_BENCH_START'
+MILESTONES = ('import pygame', 'import catapillar', 'first frame', 'deferred done')
+
+# Run in the child process, from the repository root
+CHILD = """
+import json, os, time
+start = float(os.environ[%r])
+marks = {}
+import pygame
+marks['import pygame'] = time.time() - start
+update = pygame.display.update
+
+def first_update(*args):
+    update(*args)
+    marks.setdefault('first frame', time.time() - start)
+
+pygame.display.update = first_update
+import catapillar
+marks['import catapillar'] = time.time() - start
+run_deferred_startup = catapillar.run_deferred_startup
+
+def deferred():
+    run_deferred_startup()
+    marks['deferred done'] = time.time() - start
+    print(json.dumps(marks), flush=True)
+    os._exit(0)
+
+catapillar.run_deferred_startup = deferred
+catapillar.main_menu()
+""" % START_VARIABLE
+
+
+def launch(data_dir):
+    """Start the game once; return the seconds to each milestone."""
+    env = dict(os.environ, CATAPILLAR_DATA_DIR=data_dir)
+    env[START_VARIABLE] = repr(time.time())
+    result = subprocess.run([sys.executable, '-c', CHILD], cwd=common.REPO_ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    lines = result.stdout.strip().splitlines()
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(f"the game didn't start:\n{result.stderr}")
+    return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time Cat-a-Pillar's start-up to the first frame.")
+    parser.add_argument('--runs', type=int, default=5, help="warm starts after the cold one (default: %(default)s)")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='catapillar-startup-')
+    atexit.register(shutil.rmtree, data_dir, ignore_errors=True)
+    cold = launch(data_dir)
+    warm = [launch(data_dir) for _ in range(args.runs)]
+
+    print(f"{'run':<22}" + ''.join(f" {name + ' ms':>20}" for name in MILESTONES))
+    print(f"{'cold (no font cache)':<22}" + ''.join(f" {cold[name] * 1e3:>20.1f}" for name in MILESTONES))
+    if warm:
+        print(f"{f'warm (median of {len(warm)})':<22}"
+              + ''.join(f" {statistics.median(run[name] for run in warm) * 1e3:>20.1f}" for name in MILESTONES))
+
+
+if __name__ == '__main__':
+    main()
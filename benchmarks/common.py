@@ -0,0 +1,43 @@
+"""Helpers shared by the benchmark scripts.
+
+Importing this puts the repository root on sys.path and makes pygame run
+without a window, so every script works headless as
+`python benchmarks/<script>.py`.
+"""
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from engine import GameState, SnakeBody, UP  # noqa: E402
+
+
+def serpentine(length, cols, rows):
+    """Cells of a snake folded row by row below row 0, head at (0, 1)."""
+    order = []
+    for row in range(1, rows):
+        row_cols = range(cols) if row % 2 else range(cols - 1, -1, -1)
+        order.extend((col, row) for col in row_cols)
+    return list(reversed(order[:length]))
+
+
+def build_state(length, cols, rows, **kwargs):
+    """A game with a snake of the given length folded below the empty top row.
+
+    The snake faces up, so one state.step() takes it into row 0, from where
+    it can go right for cols - 1 ticks. The food waits in the far corner.
+    """
+    state = GameState(cols=cols, rows=rows, **kwargs)
+    state.snake = SnakeBody(serpentine(length, cols, rows))
+    for cell in state.snake:
+        state.free_cells.remove(cell)
+    state.snake_length = length
+    state.x, state.y = state.snake.head
+    state.direction = UP
+    state.food_x, state.food_y = cols - 1, rows - 1
+    return state
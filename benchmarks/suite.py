@@ -0,0 +1,405 @@
+"""Microbenchmarks for the game's hot paths, with results as JSON.
+
+Each benchmark times one operation (a rules tick, a collision check, food
+placement, drawing the snake, rendering the score, a highscore lookup...)
+for a few sizes. An operation is repeated until a run takes at least
+MIN_RUN_TIME seconds, runs are repeated REPEATS times, and the best, median
+and mean time per operation go into the JSON file together with the
+Python, pygame and NumPy versions, the platform and the git commit, so runs
+can be compared over time:
+
+    python benchmarks/suite.py -o before.json
+    python benchmarks/suite.py -o after.json --compare before.json
+
+Runs headless (SDL_VIDEODRIVER=dummy is set unless already given).
+"""
+import argparse
+import atexit
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import REPO_ROOT, build_state
+
+import pygame
+
+from engine import GameState, SnakeBody, MovingObstacle, ObstacleGrid, OBSTACLE_SIZE, RIGHT, generate_obstacles
+from renderer import ScrollingRenderer, SpriteAtlas, draw_snake, BLACK, WHITE
+from text import TextRenderer
+
+MIN_RUN_TIME = 0.05
+REPEATS = 5
+
+COLS = 200
+ROWS = 60
+
+BENCHMARKS = []
+
+
+def benchmark(name, **params):
+    """Register a benchmark; params maps each parameter to the values to run.
+
+    The decorated function gets one value per parameter and returns the
+    operation to time (a callable without arguments).
+    """
+    def decorator(func):
+        BENCHMARKS.append((name, func, params))
+        return func
+    return decorator
+
+
+@benchmark('step', length=[1, 100, 1000, 8000])
+def bench_step(length):
+    """One GameState.step() on a snake of the given length.
+
+    The snake runs along one row of a board wider than it is long, so it
+    wraps around forever without crashing or eating.
+    """
+    cols = 10000
+    state = GameState(cols=cols, rows=3, seed=1)
+    state.snake = SnakeBody((x, 1) for x in range(length))
+    for cell in state.snake:
+        state.free_cells.remove(cell)
+    state.snake_length = length
+    state.x, state.y = state.snake.head
+    state.direction = RIGHT
+    state.food_x, state.food_y = 0, 2
+
+    def op():
+        state.step()
+    return op
+
+
+@benchmark('vec_env_step', envs=[64, 1024, 4096])
+def bench_vec_env_step(envs):
+    """One VecEnv.step() advancing the given number of games by one tick."""
+    import numpy as np
+    from vec_env import VecEnv
+    env = VecEnv(envs, seed=1)
+    actions = np.random.default_rng(1).integers(-1, 4, (64, envs))
+    index = [0]
+
+    def op():
+        env.step(actions[index[0] % len(actions)])
+        index[0] += 1
+    return op
+
+
+@benchmark('self_collision', length=[10, 1000, 8000])
+def bench_self_collision(length):
+    """Checking the cell in front of the head against the whole body."""
+    state = build_state(length, COLS, ROWS)
+    probe = (COLS // 2, 0)  # Free: misses are the common case
+    snake = state.snake
+
+    def op():
+        return probe in snake
+    return op
+
+
+@benchmark('food_placement', fill=[0.0, 0.5, 0.9, 0.99])
+def bench_food_placement(fill):
+    """Picking a free cell for food with the given share of the board taken."""
+    cols, rows = 40, 30
+    state = build_state(max(1, int(cols * (rows - 1) * fill)), cols, rows)
+    return state._random_free_cell
+
+
+def dense_obstacles(count, moving, cols=COLS, rows=ROWS, seed=1):
+    """count static and moving obstacles scattered over a cols x rows board."""
+    rng = random.Random(seed)
+    size = OBSTACLE_SIZE
+    obstacles = [(rng.randrange(cols - size + 1), rng.randrange(rows - size + 1), size, size)
+                 for _ in range(count)]
+    moving_obstacles = [MovingObstacle(rng.randrange(cols - size + 1), rng.randrange(rows - size + 1),
+                                       size, size, rng.choice([-0.5, 0.5]), rng.choice([-0.5, 0.5]), cols, rows)
+                        for _ in range(moving)]
+    return obstacles, moving_obstacles
+
+
+@benchmark('obstacle_collision', level=[2, 3, 4, 'dense'])
+def bench_obstacle_collision(level):
+    """is_blocked() for one cell against the obstacles of a Fun Mode level.
+
+    'dense' is a COLS x ROWS board with 500 static and 200 moving obstacles.
+    """
+    if level == 'dense':
+        state = GameState('fun', 1, cols=COLS, rows=ROWS, seed=1)
+        state.obstacles, state.moving_obstacles = dense_obstacles(500, 200)
+        state.obstacle_grid = ObstacleGrid(COLS, ROWS, state.obstacles, state.moving_obstacles)
+    else:
+        state = GameState('fun', level, seed=1)
+    cells = [(x, y) for y in range(state.rows) for x in range(state.cols)]
+    rng = random.Random(1)
+    rng.shuffle(cells)
+    index = [0]
+
+    def op():
+        cell = cells[index[0] % len(cells)]
+        index[0] += 1
+        return state.is_blocked(*cell)
+    return op
+
+
+@benchmark('moving_obstacles', count=[3, 30, 300])
+def bench_moving_obstacles(count):
+    """Moving count obstacles on by one tick and checking them against a snake."""
+    state = build_state(1000, COLS, ROWS)
+    _, moving_obstacles = dense_obstacles(0, count)
+    grid = ObstacleGrid(COLS, ROWS, (), moving_obstacles)
+    body = state.snake.occupied
+    for _ in range(4 * (COLS + ROWS)):
+        grid.move_obstacles()  # Warm up the cached moves
+
+    def op():
+        return grid.move_obstacles(body)
+    return op
+
+
+@benchmark('generate_obstacles', level=[2, 3, 4, 5])
+def bench_generate_obstacles(level):
+    """Laying out the obstacles of a Fun Mode level.
+
+    Every call draws a new seed, so Level 5 never finds its layout cached.
+    """
+    rng = random.Random(1)
+
+    def op():
+        return generate_obstacles(level, rng=rng)
+    return op
+
+
+@benchmark('level_load', source=['level_file', 'compiled'])
+def bench_level_load(source):
+    """Loading a 200x150 level of walled rooms, parsed from its file or compiled before.
+
+    Goes through levels.read_level(), below the in-memory cache of load_level().
+    """
+    import levels
+    directory = tempfile.mkdtemp(prefix='catapillar-bench-')
+    atexit.register(shutil.rmtree, directory, True)
+    cols, rows = 200, 150
+    board = [''.join('#' if (y % 10 == 0 and x % 10 != 5) or (x % 20 == 0 and y % 10 != 5) else '.'
+                     for x in range(cols)) for y in range(rows)]
+    path = os.path.join(directory, '1' + levels.LEVEL_EXTENSION)
+    with open(path, 'w') as f:
+        f.write('name: Rooms\ntopology: wall\nspawn: 5 5\nmap:\n' + '\n'.join(board) + '\n')
+    cache_dir = os.path.join(directory, 'compiled') if source == 'compiled' else None
+    if cache_dir:
+        os.makedirs(cache_dir)
+
+    def op():
+        return levels.read_level(path, 1, cols, rows, cache_dir)
+    return op
+
+
+@benchmark('draw_snake', length=[10, 100, 1000])
+def bench_draw_snake(length):
+    """Drawing the whole snake onto the body layer from the sprite atlas."""
+    block = 10
+    state = build_state(length, COLS, ROWS)
+    surface = pygame.Surface((COLS * block, ROWS * block)).convert()
+    surface.fill(BLACK)
+    atlas = SpriteAtlas(block)
+    bulges = list(range(0, length, 50))
+
+    def op():
+        draw_snake(surface, atlas, state.snake, bulges)
+    return op
+
+
+@benchmark('endless_step', board=[200, 1000])
+def bench_endless_step(board):
+    """One GameState.step() in Endless Mode on a board x board board.
+
+    As in 'step', the snake (half a row long) runs along one row forever.
+    """
+    state = GameState('endless', cols=board, rows=board, seed=1)
+    state.snake = SnakeBody((x, 1) for x in range(board // 2))
+    for cell in state.snake:
+        state.free_cells.remove(cell)
+    state.snake_length = len(state.snake)
+    state.x, state.y = state.snake.head
+    state.direction = RIGHT
+    state.food_x, state.food_y = 0, 2
+
+    def op():
+        state.step()
+    return op
+
+
+@benchmark('scrolling_frame', board=[200, 1000], length=[100, 5000])
+def bench_scrolling_frame(board, length):
+    """A full 800x600 frame of ScrollingRenderer (view and minimap) on an Endless Mode board."""
+    state = build_state(length, board, board, mode='endless', seed=1)
+    font = pygame.font.Font(os.path.join(REPO_ROOT, 'assets', 'PressStart2P.ttf'), 20)
+    screen = pygame.Surface((800, 600)).convert()
+    renderer = ScrollingRenderer(screen, state, font, 20)
+
+    def op():
+        renderer.invalidate()
+        renderer.draw(0.0)
+    return op
+
+
+@benchmark('score_text', cached=[True, False])
+def bench_score_text(cached):
+    """Rendering the 'Score: N' line, unchanged (cache hit) or new every time."""
+    font = pygame.font.Font(os.path.join(REPO_ROOT, 'assets', 'PressStart2P.ttf'), 20)
+    renderer = TextRenderer()
+    score = [0]
+
+    def op():
+        if not cached:
+            score[0] += 1
+        return renderer.render(font, "Score: " + str(score[0]), WHITE)
+    return op
+
+
+@benchmark('highscores', operation=['load', 'is_new_highscore', 'save', 'save_flushed'])
+def bench_highscores(operation):
+    """Highscore store operations on a database in a temporary directory."""
+    from highscores import HighscoreStore
+    directory = tempfile.mkdtemp(prefix='catapillar-bench-')
+    atexit.register(shutil.rmtree, directory, True)
+    store = HighscoreStore(os.path.join(directory, 'highscores.db'))
+    atexit.register(store.close)
+    for idx in range(10):
+        store.save(f'player{idx}', idx * 10, 'classic', None, 'Easy')
+    store.flush()
+    score = [0]
+
+    if operation == 'load':
+        return lambda: store.top('classic')
+    if operation == 'is_new_highscore':
+        return lambda: store.is_new_highscore(55, 'classic')
+
+    def save():
+        score[0] += 1
+        store.save('bench', score[0], 'classic', None, 'Easy')
+        if operation == 'save_flushed':
+            store.flush()
+    return save
+
+
+def time_operation(op):
+    """Return the seconds per call of op for each of REPEATS runs."""
+    op()  # Warm up caches and lazy setup
+    count = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(count):
+            op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_RUN_TIME:
+            break
+        count *= 2 if elapsed < MIN_RUN_TIME / 10 else 1 + int(MIN_RUN_TIME / max(elapsed, 1e-9))
+    runs = [elapsed / count]
+    for _ in range(REPEATS - 1):
+        start = time.perf_counter()
+        for _ in range(count):
+            op()
+        runs.append((time.perf_counter() - start) / count)
+    return runs, count
+
+
+def expand(params):
+    """Every combination of the parameter values, as dicts."""
+    combinations = [{}]
+    for key, values in params.items():
+        combinations = [dict(combo, **{key: value}) for combo in combinations for value in values]
+    return combinations
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'numpy': numpy_version,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'commit': git_commit(),
+    }
+
+
+def result_key(result):
+    return (result['name'], json.dumps(result['params'], sort_keys=True))
+
+
+def run(name_filter=None):
+    """Run the benchmarks, yielding one result dict per parameter combination."""
+    for name, func, params in BENCHMARKS:
+        if name_filter and name_filter not in name:
+            continue
+        for combo in expand(params):
+            runs, count = time_operation(func(**combo))
+            yield {
+                'name': name,
+                'params': combo,
+                'unit': 'seconds per call',
+                'best': min(runs),
+                'median': statistics.median(runs),
+                'mean': statistics.mean(runs),
+                'stdev': statistics.stdev(runs) if len(runs) > 1 else 0.0,
+                'calls_per_run': count,
+                'runs': len(runs),
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Cat-a-Pillar microbenchmarks.")
+    parser.add_argument('-o', '--output', default='benchmark-results.json',
+                        help="JSON file to write (default: %(default)s)")
+    parser.add_argument('-k', '--filter', help="only run benchmarks whose name contains this")
+    parser.add_argument('--compare', help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = {result_key(result): result for result in json.load(f)['results']}
+
+    print(f"{'benchmark':<22} {'params':<26} {'median us':>11} {'best us':>10}"
+          + (f" {'vs before':>10}" if previous else ''), flush=True)
+    results = []
+    for result in run(args.filter):
+        results.append(result)
+        params = ' '.join(f'{key}={value}' for key, value in result['params'].items())
+        line = f"{result['name']:<22} {params:<26} {result['median'] * 1e6:>11.3f} {result['best'] * 1e6:>10.3f}"
+        before = previous.get(result_key(result))
+        if before:
+            line += f" {result['median'] / before['median']:>9.2f}x"
+        print(line, flush=True)
+
+    with open(args.output, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    print(f"wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
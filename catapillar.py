@@ -1,9 +1,25 @@
 import pygame
-import random
 import time
 import sys
 import os
 
+from collections import deque
+
+from engine import GameState, UP, DOWN, LEFT, RIGHT, BOARD_COLS, BOARD_ROWS, FUN_LEVELS, can_turn, difficulty_levels
+from text import render_text
+from renderer import BoardRenderer, RetroRenderer, ScrollingRenderer, BLACK, WHITE, RED, GREEN, YELLOW, LIGHT_GREY
+from perf import cpu_meter, frame_profiler, PerfHud
+import matrix_rain
+from matrix_rain import MatrixRain
+from replay import ReplayRecorder, save_replay_in_background
+from autopilot import Autopilot
+from highscores import data_dir, load_highscores, save_highscore, clear_highscores, is_new_highscore
+import fonts
+from fonts import bundled_font, system_font
+import levelgen
+import levels
+from levelgen import LayoutPregenerator
+
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
     try:
@@ -13,33 +29,27 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-# Initialize Pygame
-pygame.init()
-pygame.mixer.init()  # Initialize the mixer for sound
+# Initialize only the parts of Pygame the game uses: the display (events
+# and timing come with it) and fonts. The mixer is started once the first
+# frame is on screen, see run_deferred_startup()
+pygame.display.init()
+pygame.font.init()
 
 # Screen dimensions
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-# Colors
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-RED = (200, 0, 0)
-GREEN = (0, 200, 0)
-YELLOW = (200, 200, 0)
-DARK_GREY = (30, 30, 30)
-LIGHT_GREY = (200, 200, 200)
-
-# Fonts
+
+# Fonts: the bundled font file, and system fonts by the file they were
+# found at last time instead of scanning the system fonts on every start
+fonts.use_disk_cache(data_dir())
 font_path = resource_path(os.path.join('assets', 'PressStart2P.ttf'))
-try:
-    retro_font = pygame.font.Font(font_path, 20)  # Use the bundled font file
-except:
-    retro_font = pygame.font.SysFont('Courier', 20)  # Fallback font
+retro_font = bundled_font(font_path, 20, 'Courier', 20)  # Courier if the file is missing
+hud_font = bundled_font(font_path, 8, 'Courier', 12)
 
 font_small = retro_font
-font_medium = pygame.font.SysFont('Courier', 30)
-font_large = pygame.font.SysFont('Courier', 50)
-matrix_font = pygame.font.SysFont('Courier', 15, bold=True)
+font_medium = system_font('Courier', 30)
+font_large = system_font('Courier', 50)
+matrix_font = system_font('Courier', 15, bold=True)
 
 # Create the screen
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
@@ -48,910 +58,905 @@ pygame.display.set_caption('Cat-a-Pillar © M.Fischbach')
 # Clock
 clock = pygame.time.Clock()
 
+# Frame timing overlay, toggled with PERF_HUD_KEY on any screen
+PERF_HUD_KEY = pygame.K_F3
+perf_hud = PerfHud(frame_profiler, hud_font)
+
+# Mouse movement is never used; don't let it wake up idle screens
+pygame.event.set_blocked(pygame.MOUSEMOTION)
+
+# Window events after which the game pauses itself
+FOCUS_LOST_EVENTS = (pygame.WINDOWFOCUSLOST, pygame.WINDOWMINIMIZED)
+
+# Size of one board cell in pixels
+SNAKE_BLOCK = 20
+
+# Retro Mode draws the same board with 10 pixel cells, scaled up 2x
+RETRO_BLOCK = 10
+RETRO_DIFFICULTY = 'Easy'  # Fixed speed for retro mode
+
+# Redraw only what changed between frames instead of the whole board
+DIRTY_RECT_RENDERING = True
+
+# Gameplay is drawn at this rate; the rules run at the difficulty's own
+# tick rate, several ticks per frame when needed
+FRAME_RATE = 60
+# Never try to catch up on more than this many seconds at once
+MAX_CATCH_UP = 0.25
+# Key presses remembered for the following ticks
+MAX_PENDING_TURNS = 3
+# Seconds a direction key has to be held to sprint
+SPRINT_THRESHOLD = 0.2
+# Slide the head smoothly between cells instead of jumping
+INTERPOLATE_MOVEMENT = False
+# Key that hands the snake over to the autopilot and back; games played
+# with it don't make it into the highscores
+AUTOPILOT_KEY = pygame.K_TAB
+# Seconds on the start screen before the autopilot plays a demo game
+ATTRACT_DELAY = 30
+
+# Arrow keys and the engine directions they steer to
+KEY_DIRECTIONS = {
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+}
+DIRECTION_KEYS = {direction: key for key, direction in KEY_DIRECTIONS.items()}
+
 # Load sounds
 menu_music = resource_path(os.path.join('assets', 'menu.wav'))
 game_music = resource_path(os.path.join('assets', 'game.wav'))
 
+# Fun Mode levels with a dense random layout get their next game set up in
+# the background while the player picks a difficulty; compiled levels and
+# dense layouts are kept on disk (set up by run_deferred_startup())
+layout_pregenerators = {}
+
 # Global variables to track if 'Autism' difficulty is unlocked and used
 autism_unlocked = False
 autism_used = False
 
-# Function to get the highscore file path
-def get_highscore_file_path(mode='classic', level=None):
-    # Determine the base directory
-    if sys.platform == 'darwin':
-        # macOS specific directory
-        base_dir = os.path.expanduser('~/Library/Application Support/catapillar')
-    elif sys.platform.startswith('win'):
-        # Windows directory
-        base_dir = os.path.join(os.environ.get('APPDATA'), 'Catapillar')
-    else:
-        # For other operating systems, e.g., Linux
-        base_dir = os.path.expanduser('~/.catapillar')
-
-    # Create the directory if it doesn't exist
-    if not os.path.exists(base_dir):
-        os.makedirs(base_dir)
-
-    # Determine the filename
-    if mode == 'classic':
-        filename = 'highscores.txt'
-    elif mode == 'fun' and level is not None:
-        filename = f'highscores_level_{level}.txt'
-    else:
-        filename = 'highscores.txt'
-
-    return os.path.join(base_dir, filename)
-
-# Highscore functions
-def load_highscores(mode='classic', level=None):
-    highscores = []
-    filepath = get_highscore_file_path(mode, level)
-    if os.path.exists(filepath):
-        with open(filepath, 'r') as f:
-            for line in f:
-                if line.strip() == '':
-                    continue
-                name, score = line.strip().split(',')
-                highscores.append((name, int(score)))
-    return highscores
-
-def save_highscore(name, score, mode='classic', level=None):
-    highscores = load_highscores(mode, level)
-    highscores.append((name, score))
-    highscores.sort(key=lambda x: x[1], reverse=True)
-    highscores = highscores[:10]  # Keep top 10
-    filepath = get_highscore_file_path(mode, level)
-    with open(filepath, 'w') as f:
-        for entry in highscores:
-            f.write('{},{}\n'.format(entry[0], entry[1]))
-
-def clear_highscores():
-    filepath_classic = get_highscore_file_path('classic')
-    if os.path.exists(filepath_classic):
-        os.remove(filepath_classic)
-    for i in range(1, 6):
-        filepath_fun = get_highscore_file_path('fun', i)
-        if os.path.exists(filepath_fun):
-            os.remove(filepath_fun)
-
-def is_new_highscore(score, mode='classic', level=None):
-    highscores = load_highscores(mode, level)
-    if len(highscores) < 10:
-        return True
-    elif score > highscores[-1][1]:
-        return True
-    return False
-
-# Difficulty levels
-difficulty_levels = {
-    'Easy': {'speed': 10, 'point_value': 1, 'extra_time': 5},
-    'Medium': {'speed': 20, 'point_value': 2, 'extra_time': 4},
-    'Hard': {'speed': 25, 'point_value': 3, 'extra_time': 3},
-    'Harder': {'speed': 30, 'point_value': 4, 'extra_time': 2},
-    'Ridiculous': {'speed': 50, 'point_value': 6, 'extra_time': 2},
-    'Autism': {'speed': 100, 'point_value': 10, 'extra_time': 1}
-}
-
-def start_screen():
-    start = True
-    # Animation variables
-    title_y = SCREEN_HEIGHT // 4
-    press_start_visible = True
-    last_blink_time = time.time()
-    blink_interval = 0.5  # Blink every 0.5 seconds
-
-    while start:
-        screen.fill(BLACK)
-        
-        # Display the game logo
-        title = font_large.render("Cat-a-Pillar", True, GREEN)
-        title_rect = title.get_rect(center=(SCREEN_WIDTH / 2, title_y))
-        screen.blit(title, title_rect)
-        
-        # Display the subtitle "© Martin Fischbach" unter dem Titel
-        subtitle = font_small.render("© Martin Fischbach", True, GREEN)
-        # Positioniere das Subtitle direkt unter dem Titel mit einem Abstand von 20 Pixeln
-        subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH / 2, title_rect.bottom + 20))
-        screen.blit(subtitle, subtitle_rect)
-
-        # Blinking "Press Any Key to Start"
-        if press_start_visible:
-            prompt = font_small.render("Press Any Key to Start", True, WHITE)
-            prompt_rect = prompt.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2))
-            screen.blit(prompt, prompt_rect)
-
-        # Update the blinking
-        current_time = time.time()
-        if current_time - last_blink_time > blink_interval:
-            press_start_visible = not press_start_visible
-            last_blink_time = current_time
-
-        pygame.display.update()
-        clock.tick(60)
-
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN:
-                start = False
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+def wait_for_events(timeout=None):
+    """Block until an event arrives or timeout seconds pass; return the events.
 
+    Screens only redraw after this returns something, so a static menu uses
+    next to no CPU. Timeouts are only for blink animations and timed
+    transitions, and are dropped while the window is minimized or hidden so
+    nothing wakes up at all.
+    """
+    if timeout is None or not pygame.display.get_active():
+        event = pygame.event.wait()
+    else:
+        event = pygame.event.wait(max(1, int(timeout * 1000)))
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
 
-def main_menu():
-    global autism_unlocked, autism_used  # Declare globals to modify them
 
-    # Play menu music
-    pygame.mixer.music.load(menu_music)
-    pygame.mixer.music.play(-1)  # Loop indefinitely
+def quit_game():
+    pygame.quit()
+    sys.exit()
 
-    start_screen()  # Call the start screen before showing the main menu
-    selected = 0
-    menu_options = ['Start Game', 'Fun Mode', 'View Highscores', 'Clear Highscores', 'Exit']
 
-    # Define the secret cheat code: Up, Right, Down, Left, Up, Right, Down, Left, Up, Right, Down, Left
-    secret_code = [
-        pygame.K_UP, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT,
-        pygame.K_UP, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT,
-        pygame.K_UP, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT
-    ]
-    input_sequence = []
+current_music = None
 
-    while True:
-        screen.fill(BLACK)
-        # **Änderung: Titel im Hauptmenü von "SnakeMF" zu "Cat-a-Pillar" geändert**
-        title = font_large.render("Cat-a-Pillar", True, GREEN)
-        title_rect = title.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 6))
-        screen.blit(title, title_rect)
-        
-        # **Änderung: Copyright-Text unter dem Titel hinzugefügt**
-        copyright_text = font_small.render("© Martin Fischbach", True, GREEN)
-        copyright_rect = copyright_text.get_rect(center=(SCREEN_WIDTH / 2, title_rect.bottom + 20))
-        screen.blit(copyright_text, copyright_rect)
-
-        for idx, option in enumerate(menu_options):
-            color = GREEN if idx == selected else LIGHT_GREY
-            text = font_small.render(option, True, color)
-            rect = text.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + idx * 40))
-            screen.blit(text, rect)
 
-        pygame.display.update()
+def play_music(path):
+    """Loop a music track, unless it is already playing.
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                # Secret code detection
-                input_sequence.append(event.key)
-                # Keep the input_sequence length manageable
-                if len(input_sequence) > len(secret_code):
-                    input_sequence.pop(0)
-                if input_sequence == secret_code:
-                    # Unlock 'Autism' difficulty
-                    if not autism_unlocked:
-                        autism_unlocked = True
-                        autism_used = False
-                        message_display("Cheat Code Activated!\n'Autism' Difficulty Unlocked!", GREEN, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + 100)
-                elif not secret_code[:len(input_sequence)] == input_sequence:
-                    input_sequence = []
-
-                if event.key == pygame.K_UP:
-                    selected = (selected - 1) % len(menu_options)
-                if event.key == pygame.K_DOWN:
-                    selected = (selected + 1) % len(menu_options)
-                if event.key == pygame.K_RETURN:
-                    if selected == 0:
-                        pygame.mixer.music.stop()
-                        difficulty = select_difficulty()
-                        if difficulty is not None:
-                            main(mode='classic', difficulty=difficulty)
-                            # Nach dem Spiel prüfen, ob 'Autism' gespielt wurde
-                            if difficulty == 'Autism':
-                                autism_unlocked = False  # Sperren nach einmaligem Spielen
-                                autism_used = False
-                        pygame.mixer.music.load(menu_music)
-                        pygame.mixer.music.play(-1)
-                    elif selected == 1:
-                        pygame.mixer.music.stop()
-                        select_fun_level()
-                        pygame.mixer.music.load(menu_music)
-                        pygame.mixer.music.play(-1)
-                    elif selected == 2:
-                        display_highscores()
-                    elif selected == 3:
-                        clear_highscores()
-                        message("Highscores cleared!", GREEN, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + 200)
-                        pygame.display.update()
-                        time.sleep(1)
-                    elif selected == 4:
-                        pygame.quit()
-                        sys.exit()
+    Before the mixer is up the track is only remembered, and start_audio()
+    starts it.
+    """
+    global current_music
+    if current_music != path:
+        current_music = path
+        if pygame.mixer.get_init():
+            try:
+                pygame.mixer.music.load(path)
+                pygame.mixer.music.play(-1)  # Loop indefinitely
+            except pygame.error as error:
+                print(f"Could not play {path}: {error}", file=sys.stderr)
 
 
-def main(mode='classic', level=None, difficulty=None):
-    # Play game music
-    pygame.mixer.music.load(game_music)
-    pygame.mixer.music.play(-1)
+def stop_music():
+    global current_music
+    if pygame.mixer.get_init():
+        pygame.mixer.music.stop()
+    current_music = None
 
-    # Initialize game variables
-    if difficulty is None:
-        difficulty = select_difficulty()
-        if difficulty is None:
-            return  # User pressed back
-
-    settings = difficulty_levels[difficulty]
-    snake_speed = settings['speed']
-    normal_speed = snake_speed  # Store normal speed
-    sprint_speed = snake_speed * 1.5  # Sprint speed
-    point_value = settings['point_value']
-    extra_point_time = settings['extra_time']
-    snake_block = 20
-
-    # Sprint variables
-    sprint_active = False
-    sprint_start_time = 0
-    SPRINT_THRESHOLD = 0.2  # Seconds
-
-    # Snake start position
-    snake_list = []
-    snake_length = 1
-    x = SCREEN_WIDTH / 2
-    y = SCREEN_HEIGHT / 2
-    dx = snake_block  # Initial movement to the right
-    dy = 0
-
-    # Food position
-    while True:
-        food_x = round(random.randrange(0, SCREEN_WIDTH - snake_block) / 20.0) * 20.0
-        food_y = round(random.randrange(0, SCREEN_HEIGHT - snake_block) / 20.0) * 20.0
-        if [food_x, food_y] not in snake_list:
-            break
 
-    # Extra food variables
-    extra_food_visible = False
-    extra_food_timer = 0
-    extra_food_x = 0
-    extra_food_y = 0
-    points_since_last_extra = 0
+def start_audio():
+    """Start the mixer and the music asked for before it was up."""
+    global current_music
+    try:
+        pygame.mixer.init()
+    except pygame.error as error:
+        print(f"No sound: {error}", file=sys.stderr)
+        return
+    path, current_music = current_music, None
+    if path is not None:
+        play_music(path)
 
-    # Score
-    score = 0
 
-    # Growing segments
-    growing_segments = []
+def set_up_disk_caches():
+    levels.use_disk_cache(os.path.join(data_dir(), 'levels'))
+    levelgen.use_disk_cache(os.path.join(data_dir(), 'layouts'))
 
-    game_over = False
-    game_close = False
 
-    # Key hold status for sprint
-    key_hold_start_time = None
+# Start-up work that can wait until the first frame is on screen
+deferred_startup = [start_audio, set_up_disk_caches]
 
-    # Obstacles for Fun Mode
-    obstacles = []
-    moving_obstacles = []
-    if mode == 'fun':
-        obstacles, moving_obstacles = generate_obstacles(level)
 
-    # Check if level has walls
-    has_wall = False
-    if mode == 'fun' and level in [1, 3]:
-        has_wall = True
+def run_deferred_startup():
+    while deferred_startup:
+        deferred_startup.pop(0)()
 
-    while not game_over:
 
-        while game_close:
-            screen.fill(BLACK)
-            message("Game Over!", RED, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 - 50)
-            message("Press Enter to Continue", WHITE, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + 10)
-            pygame.display.update()
-
-            for event in pygame.event.get():
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_RETURN:
-                        game_over = True
-                        game_close = False
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-
-        # Event handling
-        keys = pygame.key.get_pressed()
+class Scene:
+    """One screen of the game, run by run_scenes().
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                game_over = True
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    pause_screen()
-                if event.key == pygame.K_LEFT and dx == 0:
-                    dx = -snake_block
-                    dy = 0
-                    key_hold_start_time = time.time()
-                elif event.key == pygame.K_RIGHT and dx == 0:
-                    dx = snake_block
-                    dy = 0
-                    key_hold_start_time = time.time()
-                elif event.key == pygame.K_UP and dy == 0:
-                    dy = -snake_block
-                    dx = 0
-                    key_hold_start_time = time.time()
-                elif event.key == pygame.K_DOWN and dy == 0:
-                    dy = snake_block
-                    dx = 0
-                    key_hold_start_time = time.time()
-            if event.type == pygame.KEYUP:
-                if event.key in [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN]:
-                    sprint_active = False
-                    snake_speed = normal_speed
-                    key_hold_start_time = None
+    Scenes never loop or sleep themselves. handle_event() gets each input
+    event and update() is called once per pass of the loop; either returns
+    the next scene to switch to, or None to stay. Scenes without a
+    frame_rate are only redrawn when redraw is set (after input, or when
+    they set it themselves) and sleep in between for as long as wake_in()
+    says (None: until the next input event).
+    """
 
-        # Sprint functionality
-        current_direction_key = None
-        if dx == -snake_block:
-            current_direction_key = pygame.K_LEFT
-        elif dx == snake_block:
-            current_direction_key = pygame.K_RIGHT
-        elif dy == -snake_block:
-            current_direction_key = pygame.K_UP
-        elif dy == snake_block:
-            current_direction_key = pygame.K_DOWN
-
-        if current_direction_key and keys[current_direction_key]:
-            if key_hold_start_time is None:
-                key_hold_start_time = time.time()
-            elif time.time() - key_hold_start_time >= SPRINT_THRESHOLD:
-                sprint_active = True
-                snake_speed = sprint_speed
-        else:
-            sprint_active = False
-            snake_speed = normal_speed
-            key_hold_start_time = None
-
-        # Movement
-        x += dx
-        y += dy
-
-        # Screen wrapping or collision with wall
-        if not has_wall:
-            if x >= SCREEN_WIDTH:
-                x = 0
-            elif x < 0:
-                x = SCREEN_WIDTH - snake_block
-            if y >= SCREEN_HEIGHT:
-                y = 0
-            elif y < 0:
-                y = SCREEN_HEIGHT - snake_block
-        else:
-            # In Fun Mode with walls
-            if x >= SCREEN_WIDTH or x < 0 or y >= SCREEN_HEIGHT or y < 0:
-                game_close = True
+    name = 'Scene'
+    frame_rate = None
 
-        screen.fill(BLACK)
+    def __init__(self):
+        self.redraw = True
 
-        # Draw obstacles
-        for obstacle in obstacles:
-            pygame.draw.rect(screen, LIGHT_GREY, obstacle)
-
-        # Update and draw moving obstacles
-        for mobstacle in moving_obstacles:
-            mobstacle.move()
-            mobstacle.draw(screen)
-            # Collision with moving obstacles
-            if mobstacle.rect.collidepoint(x, y):
-                game_close = True
-
-        # Draw food
-        pygame.draw.circle(screen, GREEN, (int(food_x + snake_block / 2), int(food_y + snake_block / 2)), snake_block // 2)
-
-        # Extra food
-        if not extra_food_visible and points_since_last_extra >= 6:
-            extra_food_visible = True
-            extra_food_timer = time.time()
-            while True:
-                extra_food_x = round(random.randrange(0, SCREEN_WIDTH - snake_block) / 20.0) * 20.0
-                extra_food_y = round(random.randrange(0, SCREEN_HEIGHT - snake_block) / 20.0) * 20.0
-                new_food_rect = pygame.Rect(extra_food_x, extra_food_y, snake_block, snake_block)
-                collision = any(new_food_rect.colliderect(obstacle) for obstacle in obstacles)
-                collision |= any(new_food_rect.colliderect(mobstacle.rect) for mobstacle in moving_obstacles)
-                if [extra_food_x, extra_food_y] not in snake_list and not collision:
-                    break
-        if extra_food_visible:
-            time_left = extra_point_time - (time.time() - extra_food_timer)
-            if time_left <= 0:
-                extra_food_visible = False
-                points_since_last_extra = 0
-            else:
-                # Calculate multiplier
-                time_elapsed = time.time() - extra_food_timer
-                time_fraction = time_elapsed / extra_point_time  # From 0 to 1
-                max_multiplier = 6  # Maximum multiplier
-                min_multiplier = 3  # Minimum multiplier
-                multiplier = max_multiplier - (max_multiplier - min_multiplier) * time_fraction
-                multiplier = max(multiplier, min_multiplier)  # Ensure at least min_multiplier
-
-                # Blink frequency increases as time runs out
-                blink_frequency = max(0.1, time_left / extra_point_time)
-                if (time.time() * (1 / blink_frequency)) % 2 < 1:
-                    pygame.draw.circle(screen, YELLOW, (int(extra_food_x + snake_block / 2), int(extra_food_y + snake_block / 2)), snake_block // 2)
-
-        # Snake head and body
-        snake_head = [x, y]
-        snake_list.append(snake_head)
-
-        # Collision with self
-        for segment in snake_list[:-1]:
-            if segment == snake_head:
-                game_close = True
-
-        # Collision with obstacles
-        snake_rect = pygame.Rect(x, y, snake_block, snake_block)
-        if any(snake_rect.colliderect(obstacle) for obstacle in obstacles):
-            game_close = True
-
-        # Draw snake
-        draw_snake(snake_block, snake_list, growing_segments)
-
-        # Display score
-        display_score(score)
-
-        # Eating food
-        if x == food_x and y == food_y:
-            while True:
-                food_x = round(random.randrange(0, SCREEN_WIDTH - snake_block) / 20.0) * 20.0
-                food_y = round(random.randrange(0, SCREEN_HEIGHT - snake_block) / 20.0) * 20.0
-                new_food_rect = pygame.Rect(food_x, food_y, snake_block, snake_block)
-                collision = any(new_food_rect.colliderect(obstacle) for obstacle in obstacles)
-                collision |= any(new_food_rect.colliderect(mobstacle.rect) for mobstacle in moving_obstacles)
-                if [food_x, food_y] not in snake_list and not collision:
-                    break
-            score += point_value
-            points_since_last_extra += 1
-            growing_segments.append(0)  # Start thickening from the head
-
-        # Eating extra food
-        if extra_food_visible and x == extra_food_x and y == extra_food_y:
-            extra_food_visible = False
-            time_elapsed = time.time() - extra_food_timer
-            time_fraction = time_elapsed / extra_point_time  # From 0 to 1
-            max_multiplier = 6  # Maximum multiplier
-            min_multiplier = 3  # Minimum multiplier
-            multiplier = max(max_multiplier - (max_multiplier - min_multiplier) * time_fraction, min_multiplier)
-            score += int(point_value * multiplier)
-            points_since_last_extra = 0
-            growing_segments.append(0)
-
-        # Update growing_segments distances
-        growing_segments = [distance + 1 for distance in growing_segments]
-
-        # Remove segments that have reached the tail
-        if growing_segments and growing_segments[0] >= len(snake_list):
-            snake_length += 1
-            growing_segments.pop(0)
-
-        # Trim snake
-        if len(snake_list) > snake_length:
-            del snake_list[0]
-
-        pygame.display.update()
-        clock.tick(snake_speed)
-
-    # After the game, enter highscore if applicable
-    if is_new_highscore(score, mode, level):
-        winner_animation()
-        name = get_player_name()
-        save_highscore(name, score, mode, level)
-    else:
-        message("No Highscore Achieved.", WHITE, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
-        pygame.display.update()
-        time.sleep(2)
-    # Stop game music when returning to menu
-    pygame.mixer.music.stop()
-    display_highscores(mode, level)
-    main_menu()
+    def enter(self):
+        """Called every time the scene becomes the active one."""
 
+    def handle_event(self, event):
+        return None
 
-def retro_mode():
-    # Retro Graphics Mode
-    # Play game music
-    pygame.mixer.music.load(game_music)
-    pygame.mixer.music.play(-1)
+    def update(self, now):
+        return None
 
-    # Use smaller screen size for retro feel
-    retro_screen_width = 400
-    retro_screen_height = 300
-    retro_block_size = 10
+    def wake_in(self, now):
+        return None
 
-    # Adjust the display
-    retro_screen = pygame.Surface((retro_screen_width, retro_screen_height))
+    def draw(self, now):
+        """Draw the scene; return the changed rects, or None for all of it."""
+        return None
 
-    # Initialize game variables specific to retro mode
-    x = retro_screen_width / 2
-    y = retro_screen_height / 2
-    dx = retro_block_size
-    dy = 0
-    snake_list = []
-    snake_length = 1
+    def invalidate(self):
+        """Draw everything again on the next frame, not just what changed."""
+        self.redraw = True
 
-    # Food position
-    food_x = round(random.randrange(0, retro_screen_width - retro_block_size) / retro_block_size) * retro_block_size
-    food_y = round(random.randrange(0, retro_screen_height - retro_block_size) / retro_block_size) * retro_block_size
+    def hud_lines(self, now):
+        """Extra lines for the performance HUD, asked for a few times a second."""
+        return ()
 
-    game_over = False
-    game_close = False
 
-    snake_speed = 10  # Fixed speed for retro mode
+class StartScene(Scene):
+    name = 'Start Screen'
+    blink_interval = 0.5  # Blink every 0.5 seconds
 
-    while not game_over:
-        while game_close:
+    def __init__(self):
+        super().__init__()
+        self.press_start_visible = True
+        self.last_blink_time = time.monotonic()
+        # Matrix rain behind the title, when NumPy is there for it
+        self.rain = MatrixRain((SCREEN_WIDTH, SCREEN_HEIGHT), matrix_font) if matrix_rain.available else None
+        self.last_frame_time = None
+        self.demo_at = None
+
+    @property
+    def frame_rate(self):
+        # Animate only while the window can be seen
+        if self.rain is not None and pygame.display.get_active():
+            return FRAME_RATE
+        return None
+
+    def enter(self):
+        # Play menu music
+        play_music(menu_music)
+        self.demo_at = time.monotonic() + ATTRACT_DELAY
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            return MainMenuScene()
+        return None
+
+    def update(self, now):
+        # Nobody playing: let the autopilot show the game
+        if now >= self.demo_at and pygame.display.get_active():
+            return GameScene(autopilot=True, demo=True)
+        # Update the blinking
+        if now - self.last_blink_time >= self.blink_interval:
+            self.press_start_visible = not self.press_start_visible
+            self.last_blink_time = now
+            self.redraw = True
+        return None
+
+    def wake_in(self, now):
+        return min(self.last_blink_time + self.blink_interval, self.demo_at) - now
+
+    def draw(self, now):
+        if self.rain is not None:
+            # Catch up at most a tenth of a second after the window was hidden
+            dt = 0.0 if self.last_frame_time is None else min(now - self.last_frame_time, 0.1)
+            self.last_frame_time = now
+            self.rain.update(dt)
+            self.rain.draw(screen)
+        else:
             screen.fill(BLACK)
-            message("Game Over!", RED, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
-            pygame.display.update()
-            time.sleep(2)
-            game_over = True
-            game_close = False
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT and dx == 0:
-                    dx = -retro_block_size
-                    dy = 0
-                elif event.key == pygame.K_RIGHT and dx == 0:
-                    dx = retro_block_size
-                    dy = 0
-                elif event.key == pygame.K_UP and dy == 0:
-                    dy = -retro_block_size
-                    dx = 0
-                elif event.key == pygame.K_DOWN and dy == 0:
-                    dy = retro_block_size
-                    dx = 0
-
-        x += dx
-        y += dy
-
-        # Boundary collision
-        if x >= retro_screen_width or x < 0 or y >= retro_screen_height or y < 0:
-            game_close = True
-
-        # Self-collision
-        snake_head = [x, y]
-        snake_list.append(snake_head)
-        if len(snake_list) > snake_length:
-            del snake_list[0]
-        for segment in snake_list[:-1]:
-            if segment == snake_head:
-                game_close = True
-
-        # Eating food
-        if x == food_x and y == food_y:
-            food_x = round(random.randrange(0, retro_screen_width - retro_block_size) / retro_block_size) * retro_block_size
-            food_y = round(random.randrange(0, retro_screen_height - retro_block_size) / retro_block_size) * retro_block_size
-            snake_length += 1
-
-        # Drawing everything on the retro screen
-        retro_screen.fill(BLACK)
-        for segment in snake_list:
-            pygame.draw.rect(retro_screen, WHITE, [segment[0], segment[1], retro_block_size, retro_block_size])
-        pygame.draw.rect(retro_screen, GREEN, [food_x, food_y, retro_block_size, retro_block_size])
-
-        # Scaling up the retro screen to the main screen
-        scaled_screen = pygame.transform.scale(retro_screen, (SCREEN_WIDTH, SCREEN_HEIGHT))
-        screen.blit(scaled_screen, (0, 0))
-
-        pygame.display.update()
-        clock.tick(snake_speed)
-
-    # Stop game music when returning to menu
-    pygame.mixer.music.stop()
-
-
-def draw_snake(snake_block, snake_list, growing_segments):
-    for idx, segment in enumerate(snake_list):
-        # Calculate distance from head
-        distance_from_head = len(snake_list) - idx - 1
-        if distance_from_head in growing_segments:
-            # Thickened segment
-            thickness = snake_block + 4
-            offset = -2
-            pygame.draw.rect(screen, YELLOW, [segment[0] + offset, segment[1] + offset, thickness, thickness])
-        else:
-            # Normal segment
-            pygame.draw.rect(screen, WHITE, [segment[0], segment[1], snake_block, snake_block])
+        # Display the game logo
+        title = render_text(font_large, "Cat-a-Pillar", GREEN)
+        title_rect = title.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT // 4))
 
-    # Draw the head (rounded)
-    head = snake_list[-1]
-    pygame.draw.rect(screen, RED, [head[0], head[1], snake_block, snake_block], border_radius=5)
+        # Display the subtitle "© Martin Fischbach" unter dem Titel
+        subtitle = render_text(font_small, "© Martin Fischbach", GREEN)
+        # Positioniere das Subtitle direkt unter dem Titel mit einem Abstand von 20 Pixeln
+        subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH / 2, title_rect.bottom + 20))
 
-    # Draw the tail (rounded)
-    if len(snake_list) > 1:
-        tail = snake_list[0]
-        pygame.draw.rect(screen, WHITE, [tail[0], tail[1], snake_block, snake_block], border_radius=5)
+        # Keep the title readable on top of the rain
+        screen.fill(BLACK, title_rect.union(subtitle_rect).inflate(30, 20))
+        screen.blit(title, title_rect)
+        screen.blit(subtitle, subtitle_rect)
 
+        # Blinking "Press Any Key to Start"
+        if self.press_start_visible:
+            prompt = render_text(font_small, "Press Any Key to Start", WHITE)
+            prompt_rect = prompt.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2))
+            screen.fill(BLACK, prompt_rect.inflate(20, 12))
+            screen.blit(prompt, prompt_rect)
+        return None
 
-def message(msg, color, x, y):
-    mesg = font_medium.render(msg, True, color)
-    rect = mesg.get_rect(center=(x, y))
-    screen.blit(mesg, rect)
 
+class MainMenuScene(Scene):
+    name = 'Main Menu'
+    menu_options = ['Start Game', 'Fun Mode', 'Retro Mode', 'Endless Mode', 'View Highscores', 'Clear Highscores',
+                    'Exit']
 
-def message_display(msg, color, x, y):
-    """Displays a multi-line message."""
-    lines = msg.split('\n')
-    for idx, line in enumerate(lines):
-        mesg = font_medium.render(line, True, color)
-        rect = mesg.get_rect(center=(x, y + idx * 40))
-        screen.blit(mesg, rect)
-    pygame.display.update()
-    time.sleep(2)  # Display the message for 2 seconds
+    # Define the secret cheat code: Up, Right, Down, Left, Up, Right, Down, Left, Up, Right, Down, Left
+    secret_code = [
+        pygame.K_UP, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT,
+        pygame.K_UP, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT,
+        pygame.K_UP, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT
+    ]
 
+    def __init__(self):
+        super().__init__()
+        self.selected = 0
+        self.input_sequence = []
+        # Timed message shown below the menu: (text, color, y, until)
+        self.notice = None
+
+    def enter(self):
+        play_music(menu_music)
+
+    def show_notice(self, text, color, y, duration):
+        self.notice = (text, color, y, time.monotonic() + duration)
+        self.redraw = True
+
+    def handle_event(self, event):
+        global autism_unlocked, autism_used  # Declare globals to modify them
+        if event.type != pygame.KEYDOWN:
+            return None
+
+        # Secret code detection
+        self.input_sequence.append(event.key)
+        # Keep the input_sequence length manageable
+        if len(self.input_sequence) > len(self.secret_code):
+            self.input_sequence.pop(0)
+        if self.input_sequence == self.secret_code:
+            # Unlock 'Autism' difficulty
+            if not autism_unlocked:
+                autism_unlocked = True
+                autism_used = False
+                self.show_notice("Cheat Code Activated!\n'Autism' Difficulty Unlocked!", GREEN, SCREEN_HEIGHT / 2 + 100, 2)
+        elif not self.secret_code[:len(self.input_sequence)] == self.input_sequence:
+            self.input_sequence = []
+
+        if event.key == pygame.K_UP:
+            self.selected = (self.selected - 1) % len(self.menu_options)
+        if event.key == pygame.K_DOWN:
+            self.selected = (self.selected + 1) % len(self.menu_options)
+        if event.key == pygame.K_RETURN:
+            option = self.menu_options[self.selected]
+            if option == 'Start Game':
+                return DifficultyScene('classic', None, back=self)
+            elif option == 'Fun Mode':
+                return FunLevelScene(back=self)
+            elif option == 'Retro Mode':
+                return GameScene('retro', None, RETRO_DIFFICULTY)
+            elif option == 'Endless Mode':
+                return DifficultyScene('endless', None, back=self)
+            elif option == 'View Highscores':
+                return HighscoreScene(back=self)
+            elif option == 'Clear Highscores':
+                clear_highscores()
+                self.show_notice("Highscores cleared!", GREEN, SCREEN_HEIGHT / 2 + 280, 1)
+            elif option == 'Exit':
+                quit_game()
+        return None
+
+    def update(self, now):
+        if self.notice is not None and now >= self.notice[3]:
+            self.notice = None
+            self.redraw = True
+        return None
+
+    def wake_in(self, now):
+        # Nothing to animate here: sleep until a key is pressed
+        return None if self.notice is None else self.notice[3] - now
+
+    def draw(self, now):
+        screen.fill(BLACK)
+        # **Änderung: Titel im Hauptmenü von "SnakeMF" zu "Cat-a-Pillar" geändert**
+        title = render_text(font_large, "Cat-a-Pillar", GREEN)
+        title_rect = title.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 6))
+        screen.blit(title, title_rect)
+
+        # **Änderung: Copyright-Text unter dem Titel hinzugefügt**
+        copyright_text = render_text(font_small, "© Martin Fischbach", GREEN)
+        copyright_rect = copyright_text.get_rect(center=(SCREEN_WIDTH / 2, title_rect.bottom + 20))
+        screen.blit(copyright_text, copyright_rect)
 
-def display_score(score):
-    value = font_small.render("Score: " + str(score), True, WHITE)
-    screen.blit(value, [10, 10])
+        for idx, option in enumerate(self.menu_options):
+            color = GREEN if idx == self.selected else LIGHT_GREY
+            text = render_text(font_small, option, color)
+            rect = text.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + idx * 40))
+            screen.blit(text, rect)
 
+        if self.notice is not None:
+            text, color, y, _ = self.notice
+            message_display(text, color, SCREEN_WIDTH / 2, y)
+        return None
 
-def select_difficulty():
-    global autism_unlocked, autism_used  # Access global variables
-    selecting = True
-    # Build the list of difficulties based on whether 'Autism' is unlocked
-    difficulties = list(difficulty_levels.keys())
-    if not autism_unlocked:
-        difficulties.remove('Autism')
-    selected = 0
 
-    # Variables for blinking effect
-    autism_blink_visible = True
-    last_blink_time = time.time()
+class DifficultyScene(Scene):
+    name = 'Select Difficulty'
     blink_interval = 0.5  # Blink every 0.5 seconds
 
-    while selecting:
+    def __init__(self, mode, level, back):
+        super().__init__()
+        self.mode = mode
+        self.level = level
+        self.back = back
+        # Build the list of difficulties based on whether 'Autism' is unlocked
+        self.difficulties = list(difficulty_levels.keys())
+        if not autism_unlocked:
+            self.difficulties.remove('Autism')
+        self.selected = 0
+        if mode == 'fun' and level in layout_pregenerators:
+            layout_pregenerators[level].prepare()
+
+        # Variables for blinking effect
+        self.autism_blink_visible = True
+        self.last_blink_time = time.monotonic()
+
+    def enter(self):
+        stop_music()
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_UP:
+                self.selected = (self.selected - 1) % len(self.difficulties)
+            if event.key == pygame.K_DOWN:
+                self.selected = (self.selected + 1) % len(self.difficulties)
+            if event.key == pygame.K_LEFT:
+                return self.back  # User wants to go back
+            if event.key == pygame.K_RETURN:
+                return GameScene(self.mode, self.level, self.difficulties[self.selected])
+        return None
+
+    def update(self, now):
+        # Handle blinking effect for 'Autism'
+        if 'Autism' in self.difficulties and now - self.last_blink_time >= self.blink_interval:
+            self.autism_blink_visible = not self.autism_blink_visible
+            self.last_blink_time = now
+            self.redraw = True
+        return None
+
+    def wake_in(self, now):
+        # Only the 'Autism' entry is animated; otherwise wait for a key
+        if 'Autism' not in self.difficulties:
+            return None
+        return self.last_blink_time + self.blink_interval - now
+
+    def draw(self, now):
         screen.fill(BLACK)
-        title = font_large.render("Select Difficulty", True, GREEN)
+        title = render_text(font_large, "Select Difficulty", GREEN)
         rect = title.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 4))
         screen.blit(title, rect)
 
-        for idx, level in enumerate(difficulties):
-            if level == 'Autism' and autism_unlocked:
-                # Handle blinking effect for 'Autism'
-                current_time = time.time()
-                if current_time - last_blink_time > blink_interval:
-                    autism_blink_visible = not autism_blink_visible
-                    last_blink_time = current_time
-                if autism_blink_visible:
-                    color = YELLOW if idx == selected else LIGHT_GREY
+        for idx, level in enumerate(self.difficulties):
+            if level == 'Autism':
+                # Blinking effect for 'Autism'
+                if self.autism_blink_visible:
+                    color = YELLOW if idx == self.selected else LIGHT_GREY
                 else:
                     color = BLACK  # Invisible when not visible
             else:
-                color = GREEN if idx == selected else LIGHT_GREY
-            text = font_small.render(level, True, color)
+                color = GREEN if idx == self.selected else LIGHT_GREY
+            text = render_text(font_small, level, color)
             rect = text.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + idx * 40))
             screen.blit(text, rect)
+        return None
+
+
+class FunLevelScene(Scene):
+    name = 'Fun Mode Level Select'
+
+    def __init__(self, back):
+        super().__init__()
+        self.back = back
+        self.selected = 0
+        # Only the names are read here; a level is loaded once it is picked
+        self.levels = [f"Level {number}: {levels.level_name(number)}" for number in FUN_LEVELS]
+
+    def enter(self):
+        stop_music()
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_UP:
+                self.selected = (self.selected - 1) % len(self.levels)
+            if event.key == pygame.K_DOWN:
+                self.selected = (self.selected + 1) % len(self.levels)
+            if event.key == pygame.K_LEFT:
+                return self.back  # Go back to main menu
+            if event.key == pygame.K_RETURN:
+                number = FUN_LEVELS[self.selected]
+                level = levels.load_level(number, BOARD_COLS, BOARD_ROWS)
+                if level.dense and number not in layout_pregenerators:
+                    layout_pregenerators[number] = LayoutPregenerator(number, level.cols, level.rows)
+                return DifficultyScene('fun', number, back=self)
+        return None
+
+    def draw(self, now):
+        screen.fill(BLACK)
+        title = render_text(font_large, "Fun Mode - Select Level", GREEN)
+        rect = title.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 6))
+        screen.blit(title, rect)
 
-        pygame.display.update()
+        for idx, level in enumerate(self.levels):
+            color = GREEN if idx == self.selected else LIGHT_GREY
+            text = render_text(font_small, level, color)
+            rect = text.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 3 + idx * 30))
+            screen.blit(text, rect)
+        return None
+
+
+class GameScene(Scene):
+    """Gameplay: feeds input into the rules engine and draws it every frame."""
+
+    name = 'Gameplay'
+    frame_rate = FRAME_RATE
+
+    def __init__(self, mode='classic', level=None, difficulty='Easy', autopilot=False, demo=False):
+        super().__init__()
+        seed = None
+        if mode == 'fun' and level in layout_pregenerators:
+            seed = layout_pregenerators[level].take()
+        self.state = GameState(mode, level, difficulty, seed=seed)
+        # The autopilot steers while set; a demo is all autopilot and ends
+        # with any key
+        self.autopilot = Autopilot(self.state) if autopilot else None
+        self.autopilot_used = autopilot
+        self.demo = demo
+        # Every game but a demo is recorded and saved as a replay when it ends
+        self.recorder = None if demo else ReplayRecorder(self.state)
+        if mode == 'retro':
+            self.renderer = RetroRenderer(screen, self.state, RETRO_BLOCK)
+        elif self.state.cols * SNAKE_BLOCK > SCREEN_WIDTH or self.state.rows * SNAKE_BLOCK > SCREEN_HEIGHT:
+            # Too big for the screen: a camera follows the head
+            self.renderer = ScrollingRenderer(screen, self.state, font_small, SNAKE_BLOCK)
+        else:
+            self.renderer = BoardRenderer(screen, self.state, font_small, SNAKE_BLOCK, dirty=DIRTY_RECT_RENDERING)
+        self.started = False
+
+        # Key hold status for sprint
+        self.key_hold_start_time = None
+
+        # Turns wait here until the tick that applies them, one per tick
+        self.pending_turns = deque(maxlen=MAX_PENDING_TURNS)
+
+        # Simulated time not yet consumed by ticks
+        self.accumulator = 0.0
+        self.previous_time = time.monotonic()
+
+        # Tick and time of the last HUD update, for the measured tick rate
+        self.hud_mark = None
+        self.hud_tick_rate = 0.0
+
+    def enter(self):
+        if not self.started:
+            # Play game music
+            play_music(game_music)
+            self.started = True
+        # Coming back from the pause screen: time spent paused doesn't count
+        self.renderer.invalidate()
+        self.previous_time = time.monotonic()
+
+    def handle_event(self, event):
+        state = self.state
+        if event.type in FOCUS_LOST_EVENTS:
+            # Window left in the background: pause instead of playing blind
+            return PauseScene(self)
+        if event.type == pygame.KEYDOWN and self.demo:
+            return MainMenuScene()
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                return PauseScene(self)
+            if event.key == AUTOPILOT_KEY:
+                self.autopilot = None if self.autopilot else Autopilot(state)
+                self.autopilot_used = True
+                self.pending_turns.clear()
+                self.renderer.invalidate()  # Take the label off again
+                return None
+            direction = KEY_DIRECTIONS.get(event.key)
+            last_direction = self.pending_turns[-1] if self.pending_turns else state.direction
+            if direction is not None and can_turn(last_direction, direction):
+                self.pending_turns.append(direction)
+                self.key_hold_start_time = time.monotonic()
+        if event.type == pygame.KEYUP:
+            if event.key in KEY_DIRECTIONS:
+                state.sprint = False
+                self.key_hold_start_time = None
+        return None
+
+    def update(self, now):
+        global autism_unlocked, autism_used
+        state = self.state
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    selected = (selected - 1) % len(difficulties)
-                if event.key == pygame.K_DOWN:
-                    selected = (selected + 1) % len(difficulties)
-                if event.key == pygame.K_LEFT:
-                    return None  # User wants to go back
-                if event.key == pygame.K_RETURN:
-                    return difficulties[selected]
-
-
-def get_player_name():
-    name = ""
-    entering = True
-
-    while entering:
+        # Sprint functionality
+        keys = pygame.key.get_pressed()
+        current_direction_key = DIRECTION_KEYS[self.pending_turns[-1] if self.pending_turns else state.direction]
+        if self.autopilot:
+            state.sprint = False
+        elif keys[current_direction_key]:
+            if self.key_hold_start_time is None:
+                self.key_hold_start_time = now
+            elif now - self.key_hold_start_time >= SPRINT_THRESHOLD:
+                state.sprint = True
+        else:
+            state.sprint = False
+            self.key_hold_start_time = None
+
+        # Run as many fixed-length ticks as real time has passed
+        self.accumulator = min(self.accumulator + now - self.previous_time, MAX_CATCH_UP)
+        self.previous_time = now
+        tick_length = 1.0 / state.tick_rate
+        while self.accumulator >= tick_length:
+            self.accumulator -= tick_length
+            if self.autopilot:
+                direction = self.autopilot(state)
+            else:
+                direction = self.pending_turns.popleft() if self.pending_turns else None
+            if self.recorder:
+                playing = self.recorder.step(direction)
+            else:
+                playing = state.step(direction)
+            if not playing:
+                if self.demo:
+                    return StartScene()
+                save_replay_in_background(self.recorder.finish())
+                # 'Autism' can only be played once per unlock
+                if state.mode == 'classic' and state.difficulty == 'Autism':
+                    autism_unlocked = False
+                    autism_used = False
+                return GameOverScene(state, self.autopilot_used)
+        return None
+
+    def draw(self, now):
+        # Only the parts of the board that changed are redrawn and pushed
+        alpha = self.accumulator * self.state.tick_rate if INTERPOLATE_MOVEMENT else 0.0
+        rects = self.renderer.draw(now, alpha)
+        if self.autopilot:
+            label = render_text(font_small, "Demo - Press Any Key" if self.demo else "Autopilot", WHITE)
+            rect = label.get_rect(midbottom=(SCREEN_WIDTH / 2, SCREEN_HEIGHT - 10))
+            screen.fill(BLACK, rect.inflate(20, 12))
+            screen.blit(label, rect)
+            if rects is not None:
+                rects.append(rect.inflate(20, 12))
+        return rects
+
+    def invalidate(self):
+        self.renderer.invalidate()
+
+    def hud_lines(self, now):
+        tick = self.state.tick
+        if self.hud_mark is not None and now > self.hud_mark[1]:
+            self.hud_tick_rate = (tick - self.hud_mark[0]) / (now - self.hud_mark[1])
+        self.hud_mark = (tick, now)
+        return [f"Ticks/s {self.hud_tick_rate:5.1f} of {self.state.tick_rate:g}"]
+
+
+class PauseScene(Scene):
+    name = 'Pause'
+
+    def __init__(self, game):
+        super().__init__()
+        self.game = game
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+            return self.game
+        return None
+
+    def draw(self, now):
+        screen.fill(BLACK)
+        message("Paused", GREEN, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 4)
+        instructions = [
+            "Game Controls:",
+            "- Arrow Keys: Move Snake",
+            "- Spacebar: Pause",
+            "- Sprint: Hold Direction Key",
+            "- Tab: Autopilot (No Highscore)",
+            "",
+            "Press Spacebar to Continue"
+        ]
+        for idx, line in enumerate(instructions):
+            text = render_text(font_small, line, WHITE)
+            rect = text.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + idx * 30))
+            screen.blit(text, rect)
+        return None
+
+
+class GameOverScene(Scene):
+    name = 'Game Over'
+
+    def __init__(self, state, autopilot_used=False):
+        super().__init__()
+        self.mode = state.mode
+        self.level = state.level
+        self.difficulty = state.difficulty
+        self.score = state.score
+        self.board_full = state.board_full
+        self.autopilot_used = autopilot_used
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+            if self.autopilot_used:
+                highscores = HighscoreScene(self.mode, self.level, back=StartScene(), after_game=True)
+                return MessageScene("Autopilot Score\nNot Saved.", WHITE, 2, highscores)
+            # After the game, enter highscore if applicable
+            if is_new_highscore(self.score, self.mode, self.level):
+                name_entry = NameEntryScene(self.mode, self.level, self.difficulty, self.score)
+                return MessageScene("New Highscore!", YELLOW, 2, name_entry, forward_keys=True)
+            highscores = HighscoreScene(self.mode, self.level, back=StartScene(), after_game=True)
+            return MessageScene("No Highscore Achieved.", WHITE, 2, highscores)
+        return None
+
+    def draw(self, now):
         screen.fill(BLACK)
-        prompt = font_medium.render("New Highscore! Enter your name:", True, WHITE)
+        message("Board Full!" if self.board_full else "Game Over!", RED, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 - 50)
+        message("Press Enter to Continue", WHITE, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + 10)
+        return None
+
+
+class MessageScene(Scene):
+    """Shows a message for a few seconds, then moves on to the next scene.
+
+    A key press moves on right away. With forward_keys the key is handed on
+    to the next scene as well, e.g. to start typing a name straight away.
+    """
+
+    name = 'Message'
+
+    def __init__(self, text, color, duration, next_scene, forward_keys=False):
+        super().__init__()
+        self.text = text
+        self.color = color
+        self.duration = duration
+        self.next_scene = next_scene
+        self.forward_keys = forward_keys
+        self.until = None
+
+    def enter(self):
+        self.until = time.monotonic() + self.duration
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if self.forward_keys:
+                pygame.event.post(event)
+            return self.next_scene
+        return None
+
+    def update(self, now):
+        return self.next_scene if now >= self.until else None
+
+    def wake_in(self, now):
+        return self.until - now
+
+    def draw(self, now):
+        screen.fill(BLACK)
+        message_display(self.text, self.color, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
+        return None
+
+
+class NameEntryScene(Scene):
+    name = 'Name Entry'
+
+    def __init__(self, mode, level, difficulty, score):
+        super().__init__()
+        self.mode = mode
+        self.level = level
+        self.difficulty = difficulty
+        self.score = score
+        self.player_name = ""
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_RETURN and self.player_name != "":
+                save_highscore(self.player_name, self.score, self.mode, self.level, self.difficulty)
+                return HighscoreScene(self.mode, self.level, back=StartScene(), after_game=True)
+            elif event.key == pygame.K_BACKSPACE:
+                self.player_name = self.player_name[:-1]
+            else:
+                if len(self.player_name) < 10 and event.unicode.isprintable():
+                    self.player_name += event.unicode
+        return None
+
+    def draw(self, now):
+        screen.fill(BLACK)
+        prompt = render_text(font_medium, "New Highscore! Enter your name:", WHITE)
         rect = prompt.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 3))
         screen.blit(prompt, rect)
 
-        name_surface = font_medium.render(name, True, GREEN)
+        name_surface = render_text(font_medium, self.player_name, GREEN)
         rect = name_surface.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2))
         screen.blit(name_surface, rect)
+        return None
 
-        pygame.display.update()
 
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN and name != "":
-                    entering = False
-                elif event.key == pygame.K_BACKSPACE:
-                    name = name[:-1]
-                else:
-                    if len(name) < 10 and event.unicode.isprintable():
-                        name += event.unicode
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+class HighscoreScene(Scene):
+    name = 'Highscores'
 
-    return name
+    def __init__(self, mode='classic', level=None, back=None, after_game=False):
+        super().__init__()
+        self.mode = mode
+        self.level = level
+        self.back = back
+        self.after_game = after_game
+        self.highscores = load_highscores(mode, level)
 
+    def enter(self):
+        if self.after_game:
+            # Stop game music when returning to menu
+            stop_music()
 
-def display_highscores(mode='classic', level=None):
-    highscores = load_highscores(mode, level)
-    showing = True
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
+            return self.back
+        return None
 
-    while showing:
+    def draw(self, now):
         screen.fill(BLACK)
-        if mode == 'classic':
+        if self.mode == 'classic':
             title_text = "Highscores"
+        elif self.mode == 'retro':
+            title_text = "Highscores - Retro"
+        elif self.mode == 'endless':
+            title_text = "Highscores - Endless"
         else:
-            title_text = f"Highscores - Level {level}"
-        title = font_large.render(title_text, True, GREEN)
+            title_text = f"Highscores - Level {self.level}"
+        title = render_text(font_large, title_text, GREEN)
         rect = title.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 6))
         screen.blit(title, rect)
 
-        for idx, (name, score) in enumerate(highscores[:10]):
-            text = font_small.render(f"{idx+1}. {name} - {score}", True, LIGHT_GREY)
+        for idx, (name, score) in enumerate(self.highscores[:10]):
+            text = render_text(font_small, f"{idx+1}. {name} - {score}", LIGHT_GREY)
             rect = text.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 3 + idx * 30))
             screen.blit(text, rect)
 
         message("Press any key to continue", WHITE, SCREEN_WIDTH / 2, SCREEN_HEIGHT * 5 / 6)
-        pygame.display.update()
+        return None
 
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
-                showing = False
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
 
+def run_scenes(scene):
+    """Run the game as one flat loop over scenes until the player quits.
 
-def select_fun_level():
-    levels = [
-        "Level 1: Wall around the playing field",
-        "Level 2: Obstacles on the playing field",
-        "Level 3: Wall & Obstacles",
-        "Level 4: Moving Obstacles",
-        "Level 5: Random Obstacles"
-    ]
-    selected = 0
-    selecting = True
+    Switching screens only replaces the current scene object, so the stack
+    stays flat however many rounds are played.
+    """
+    cpu_meter.enter(scene.name)
+    scene.enter()
+    profiler = frame_profiler
+    while True:
+        # Timing costs nothing unless the HUD is shown or a trace recorded
+        profiling = profiler.active
+        if profiling:
+            profiler.begin_frame()
+        now = time.monotonic()
+        if scene.frame_rate or scene.redraw:
+            rects = scene.draw(now)
+            if profiler.enabled:
+                hud_rect = perf_hud.draw(screen, now, scene.hud_lines)
+                if rects is not None:
+                    rects.append(hud_rect)
+            if profiling:
+                profiler.span('draw')
+            if rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(rects)
+            scene.redraw = False
+            if profiling:
+                profiler.span('display')
+            if deferred_startup:
+                # The first frame is up: now the rest of the start-up
+                run_deferred_startup()
+
+        if scene.frame_rate:
+            clock.tick(scene.frame_rate)
+            if profiling:
+                profiler.span('wait')
+            events = pygame.event.get()
+        else:
+            events = wait_for_events(scene.wake_in(time.monotonic()))
+            if profiling:
+                profiler.span('wait')
+            scene.redraw = bool(events)
 
-    while selecting:
-        screen.fill(BLACK)
-        title = font_large.render("Fun Mode - Select Level", True, GREEN)
-        rect = title.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 6))
-        screen.blit(title, rect)
+        next_scene = None
+        for idx, event in enumerate(events):
+            if event.type == pygame.QUIT:
+                quit_game()
+            if event.type == pygame.KEYDOWN and event.key == PERF_HUD_KEY:
+                profiler.enabled = not profiler.enabled
+                if not profiler.enabled:
+                    # Bring back what the HUD covered
+                    perf_hud.hide()
+                    scene.invalidate()
+                continue
+            next_scene = scene.handle_event(event)
+            if next_scene is not None:
+                # Input after a switch belongs to the next scene
+                for later_event in events[idx + 1:]:
+                    pygame.event.post(later_event)
+                break
+        if profiling:
+            profiler.span('events')
+        if next_scene is None:
+            next_scene = scene.update(time.monotonic())
+        if profiling:
+            profiler.span('update')
+            profiler.end_frame(scene.name)
+
+        if next_scene is not None and next_scene is not scene:
+            cpu_meter.leave()
+            cpu_meter.enter(next_scene.name)
+            scene = next_scene
+            scene.redraw = True
+            scene.enter()
 
-        for idx, level in enumerate(levels):
-            color = GREEN if idx == selected else LIGHT_GREY
-            text = font_small.render(level, True, color)
-            rect = text.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 3 + idx * 30))
-            screen.blit(text, rect)
 
-        pygame.display.update()
+def main_menu():
+    run_scenes(StartScene())
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    selected = (selected - 1) % len(levels)
-                if event.key == pygame.K_DOWN:
-                    selected = (selected + 1) % len(levels)
-                if event.key == pygame.K_LEFT:
-                    return  # Go back to main menu
-                if event.key == pygame.K_RETURN:
-                    difficulty = select_difficulty()
-                    if difficulty is not None:
-                        main(mode='fun', level=selected + 1, difficulty=difficulty)
-
-
-def generate_obstacles(level):
-    obstacles = []
-    moving_obstacles = []
-    snake_block = 20
-    obstacle_size = snake_block * 3  # Larger obstacles (60x60 pixels)
-    if level == 1:
-        # Wall around the playing field (handled in main())
-        pass
-    elif level == 2:
-        # Static obstacles on the field
-        for _ in range(5):
-            x = round(random.randrange(0, SCREEN_WIDTH - obstacle_size) / 20.0) * 20.0
-            y = round(random.randrange(0, SCREEN_HEIGHT - obstacle_size) / 20.0) * 20.0
-            rect = pygame.Rect(x, y, obstacle_size, obstacle_size)
-            obstacles.append(rect)
-    elif level == 3:
-        # Wall and obstacles
-        for _ in range(5):
-            x = round(random.randrange(0, SCREEN_WIDTH - obstacle_size) / 20.0) * 20.0
-            y = round(random.randrange(0, SCREEN_HEIGHT - obstacle_size) / 20.0) * 20.0
-            rect = pygame.Rect(x, y, obstacle_size, obstacle_size)
-            obstacles.append(rect)
-    elif level == 4:
-        # Moving obstacles
-        for _ in range(3):
-            x = round(random.randrange(0, SCREEN_WIDTH - obstacle_size) / 20.0) * 20.0
-            y = round(random.randrange(0, SCREEN_HEIGHT - obstacle_size) / 20.0) * 20.0
-            dx = random.choice([-snake_block // 2, snake_block // 2])
-            dy = random.choice([-snake_block // 2, snake_block // 2])
-            mobstacle = MovingObstacle(x, y, obstacle_size, obstacle_size, dx, dy)
-            moving_obstacles.append(mobstacle)
-    elif level == 5:
-        # Random obstacles (implement as needed)
-        pass
-    return obstacles, moving_obstacles
-
-
-class MovingObstacle:
-    def __init__(self, x, y, width, height, dx, dy):
-        self.rect = pygame.Rect(x, y, width, height)
-        self.dx = dx
-        self.dy = dy
-
-    def move(self):
-        self.rect.x += self.dx
-        self.rect.y += self.dy
-
-        # Check for boundary collision and change direction
-        if self.rect.left < 0 or self.rect.right > SCREEN_WIDTH:
-            self.dx = -self.dx
-        if self.rect.top < 0 or self.rect.bottom > SCREEN_HEIGHT:
-            self.dy = -self.dy
-
-    def draw(self, screen):
-        pygame.draw.rect(screen, LIGHT_GREY, self.rect)
-
-
-def pause_screen():
-    paused = True
-    while paused:
-        screen.fill(BLACK)
-        message("Paused", GREEN, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 4)
-        instructions = [
-            "Game Controls:",
-            "- Arrow Keys: Move Snake",
-            "- Spacebar: Pause",
-            "- Sprint: Hold Direction Key",
-            "",
-            "Press Spacebar to Continue"
-        ]
-        for idx, line in enumerate(instructions):
-            text = font_small.render(line, True, WHITE)
-            rect = text.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + idx * 30))
-            screen.blit(text, rect)
 
-        pygame.display.update()
-        clock.tick(5)
+def main(mode='classic', level=None, difficulty=None):
+    if difficulty is None:
+        run_scenes(DifficultyScene(mode, level, back=MainMenuScene()))
+    else:
+        run_scenes(GameScene(mode, level, difficulty))
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    paused = False
+
+def message(msg, color, x, y):
+    mesg = render_text(font_medium, msg, color)
+    rect = mesg.get_rect(center=(x, y))
+    screen.blit(mesg, rect)
 
 
-def winner_animation():
-    duration = 2  # Duration in seconds
-    start_time = time.time()
-    while time.time() - start_time < duration:
-        screen.fill(BLACK)
-        message("New Highscore!", YELLOW, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
-        pygame.display.update()
-        clock.tick(60)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+def message_display(msg, color, x, y):
+    """Displays a multi-line message."""
+    lines = msg.split('\n')
+    for idx, line in enumerate(lines):
+        mesg = render_text(font_medium, line, color)
+        rect = mesg.get_rect(center=(x, y + idx * 40))
+        screen.blit(mesg, rect)
 
 
 if __name__ == "__main__":
@@ -5,7 +5,7 @@ a = Analysis(
     ['catapillar.py'],
     pathex=[],
     binaries=[],
-    datas=[('assets/menu.wav', 'assets'), ('assets/game.wav', 'assets'), ('assets/PressStart2P.ttf', 'assets'), ('assets/snake.icns', 'assets')],
+    datas=[('assets/menu.wav', 'assets'), ('assets/game.wav', 'assets'), ('assets/PressStart2P.ttf', 'assets'), ('assets/snake.icns', 'assets'), ('levels/*.level', 'levels')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,759 @@
+"""Display-free rules engine for Cat-a-Pillar.
+
+Everything that decides what happens in a game (movement, wrap-around and
+walls, eating, growth, extra food and obstacles) lives here, without any
+window, mixer or clock. The interactive game in catapillar.py is only a
+frontend that feeds key presses into a GameState and draws the result, so
+bots, regression runs and balancing scripts can drive the very same rules
+headless at full speed.
+
+All positions are in board cells, not pixels.
+"""
+import functools
+import random
+import re
+from array import array
+from collections import deque
+
+from levelgen import dense_layout, random_layout, spawn_lane
+from levels import Level, load_level, level_numbers
+
+# Directions as (dx, dy) in cells
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+# Default board: the 800x600 window with 20 pixel cells
+BOARD_COLS = 40
+BOARD_ROWS = 30
+
+# Endless Mode: a wrap-around board far bigger than the window, with the
+# food always put down within ENDLESS_FOOD_RADIUS cells of the head
+ENDLESS_COLS = 1000
+ENDLESS_ROWS = 1000
+ENDLESS_FOOD_RADIUS = 12
+
+# Difficulty levels
+difficulty_levels = {
+    'Easy': {'speed': 10, 'point_value': 1, 'extra_time': 5},
+    'Medium': {'speed': 20, 'point_value': 2, 'extra_time': 4},
+    'Hard': {'speed': 25, 'point_value': 3, 'extra_time': 3},
+    'Harder': {'speed': 30, 'point_value': 4, 'extra_time': 2},
+    'Ridiculous': {'speed': 50, 'point_value': 6, 'extra_time': 2},
+    'Autism': {'speed': 100, 'point_value': 10, 'extra_time': 1}
+}
+
+# Fun Mode levels, as offered in the level menu: one per file in levels/
+FUN_LEVELS = level_numbers()
+
+OBSTACLE_SIZE = 3  # Obstacles are 3x3 cells
+EXTRA_FOOD_POINTS = 6  # Points needed before extra food shows up
+MAX_MULTIPLIER = 6
+MIN_MULTIPLIER = 3
+SPRINT_FACTOR = 1.5  # Holding the direction key speeds the snake up this much
+MAX_SEED = 2 ** 63  # Games are seeded with a random number below this
+HIT = 1 << 16  # Added to a moving obstacle count for a covered corner point
+
+_FREE_RUNS = re.compile(b'\x00+')
+
+
+class MovingObstacle:
+    """A block that bounces around the board by half a cell per tick."""
+
+    def __init__(self, x, y, width, height, dx, dy, cols=BOARD_COLS, rows=BOARD_ROWS):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.dx = dx
+        self.dy = dy
+        self.cols = cols
+        self.rows = rows
+
+    def move(self):
+        self.x += self.dx
+        self.y += self.dy
+
+        # Check for boundary collision and change direction
+        if self.x < 0 or self.x + self.width > self.cols:
+            self.dx = -self.dx
+        if self.y < 0 or self.y + self.height > self.rows:
+            self.dy = -self.dy
+
+    def collidepoint(self, x, y):
+        return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
+
+    def colliderect(self, x, y, width=1, height=1):
+        return (x < self.x + self.width and self.x < x + width
+                and y < self.y + self.height and self.y < y + height)
+
+
+class SnakeBody:
+    """The snake's cells from tail to head.
+
+    Segments are kept in a deque so pushing the head and popping the tail
+    are O(1), and a dict of occupied cells is updated alongside so that
+    collision and "is this cell occupied" checks don't depend on length.
+    The dict maps each cell to the running number it was pushed with,
+    which gives a cell's place in the body without walking it.
+    """
+
+    def __init__(self, cells=()):
+        self.segments = deque()
+        self.occupied = {}
+        self.pushed = 0
+        for cell in cells:
+            self.push_head(cell)
+
+    def push_head(self, cell):
+        self.segments.append(cell)
+        self.occupied[cell] = self.pushed
+        self.pushed += 1
+
+    def pop_tail(self):
+        cell = self.segments.popleft()
+        self.occupied.pop(cell, None)
+        return cell
+
+    def distance_from_head(self, cell):
+        return self.pushed - 1 - self.occupied[cell]
+
+    @property
+    def head(self):
+        return self.segments[-1]
+
+    @property
+    def tail(self):
+        return self.segments[0]
+
+    def __contains__(self, cell):
+        return cell in self.occupied
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __getitem__(self, index):
+        return self.segments[index]
+
+
+class FreeCells:
+    """Cells that are neither snake nor static obstacle.
+
+    Cells are stored as ids (y * cols + x) in a dense array, plus a second
+    array holding each id's position in it (-1 when not free). Adding,
+    removing (swap with the last entry) and picking a uniformly random free
+    cell are all O(1), however full the board is.
+    """
+
+    def __init__(self, cols, rows, blocked=(), mask=None):
+        self.cols = cols
+        self.rows = rows
+        if mask is None:
+            self.cells = array('i', range(cols * rows))
+            self.index = array('i', range(cols * rows))
+        else:
+            # Blocked cells given as a byte per cell id, nonzero if blocked;
+            # the free ones are added a run at a time
+            self.cells = array('i')
+            self.index = array('i', [-1]) * (cols * rows)
+            for run in _FREE_RUNS.finditer(bytes(mask)):
+                start, end = run.span()
+                self.index[start:end] = array('i', range(len(self.cells), len(self.cells) + end - start))
+                self.cells.extend(range(start, end))
+        for cell in blocked:
+            self.remove(cell)
+
+    def add(self, cell):
+        cell_id = cell[1] * self.cols + cell[0]
+        if self.index[cell_id] >= 0:
+            return
+        self.index[cell_id] = len(self.cells)
+        self.cells.append(cell_id)
+
+    def remove(self, cell):
+        cell_id = cell[1] * self.cols + cell[0]
+        position = self.index[cell_id]
+        if position < 0:
+            return
+        last = self.cells.pop()
+        if last != cell_id:
+            self.cells[position] = last
+            self.index[last] = position
+        self.index[cell_id] = -1
+
+    def sample(self, rng, reject=None, tries=16):
+        """Return a random free cell for which reject(cell) is false.
+
+        Cells rejected by the optional predicate (moving obstacles, the
+        other food) are retried a few times before falling back to a scan
+        of all free cells, so this always terminates. Returns None when no
+        cell qualifies, i.e. the board is full.
+        """
+        count = len(self.cells)
+        if count == 0:
+            return None
+        for _ in range(tries):
+            cell_id = self.cells[rng.randrange(count)]
+            cell = (cell_id % self.cols, cell_id // self.cols)
+            if reject is None or not reject(cell):
+                return cell
+        candidates = [cell for cell in self if not reject(cell)]
+        return rng.choice(candidates) if candidates else None
+
+    def sample_anywhere(self, rng, reject=None, tries=16):
+        """Like sample(), but drawing from all cells of the board rather than the free ones.
+
+        Which cell comes out then only depends on which cells are free, not
+        on the order they were freed in, so a game placing food this way can
+        be saved and restored without that order (see replay). On a mostly
+        free board a few tries are enough; on a nearly full one it falls
+        back to a scan in cell order.
+        """
+        cols = self.cols
+        index = self.index
+        for _ in range(tries):
+            cell_id = rng.randrange(len(index))
+            if index[cell_id] >= 0:
+                cell = (cell_id % cols, cell_id // cols)
+                if reject is None or not reject(cell):
+                    return cell
+        candidates = [(cell_id % cols, cell_id // cols) for cell_id in range(len(index)) if index[cell_id] >= 0]
+        if reject is not None:
+            candidates = [cell for cell in candidates if not reject(cell)]
+        return rng.choice(candidates) if candidates else None
+
+    def sample_near(self, rng, center, radius, wrap, reject=None, tries=16):
+        """Return a random free cell at most radius cells from center on either axis.
+
+        Cells around center are tried a few times; when none of them is
+        free (and not rejected), one is picked from the whole board by
+        sample_anywhere(), so on a board of any size this costs the same.
+        """
+        cx, cy = center
+        for _ in range(tries):
+            x = cx + rng.randint(-radius, radius)
+            y = cy + rng.randint(-radius, radius)
+            if wrap:
+                x %= self.cols
+                y %= self.rows
+            cell = (x, y)
+            if cell in self and (reject is None or not reject(cell)):
+                return cell
+        return self.sample_anywhere(rng, reject, tries)
+
+    def __contains__(self, cell):
+        x, y = cell
+        return 0 <= x < self.cols and 0 <= y < self.rows and self.index[y * self.cols + x] >= 0
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        cols = self.cols
+        return ((cell_id % cols, cell_id // cols) for cell_id in self.cells)
+
+
+class ObstacleGrid:
+    """Which board cells are covered by obstacles, one entry per cell.
+
+    Static obstacles are rasterized once when the level starts. For the
+    moving ones, each cell counts the obstacles that overlap it at all (as
+    MovingObstacle.colliderect() with a single cell), which food is kept
+    off, plus HIT for each one that covers the cell's corner point (as
+    collidepoint()), which the snake crashes on. Looking up a cell is O(1)
+    however many obstacles a level has.
+
+    Moving obstacles sit on whole or half cells and move by half a cell, so
+    they are tracked as whole numbers of half cells. A move changes their
+    footprint by one strip of cells at an edge or two, and move_obstacles()
+    only changes the counts of the strips an obstacle leaves and enters.
+    """
+
+    def __init__(self, cols, rows, obstacles=(), moving_obstacles=()):
+        self.cols = cols
+        self.rows = rows
+        self.static = bytearray(cols * rows)
+        for x, y, width, height in obstacles:
+            # Clipped to the board, one row of the rectangle at a time
+            left, right = max(x, 0), min(x + width, cols)
+            if left < right:
+                for row in range(max(y, 0), min(y + height, rows)):
+                    self.static[row * cols + left:row * cols + right] = b'\x01' * (right - left)
+        # Obstacles follow the same paths over and over, so the moves worked
+        # out are shared by all games on a board of this size
+        self.moves = _OBSTACLE_MOVES.setdefault((cols, rows), {})
+        self.reset_moving(moving_obstacles)
+
+    def reset_moving(self, moving_obstacles):
+        """Count the moving obstacles again from scratch, e.g. after they were replaced."""
+        cols, rows = self.cols, self.rows
+        # A list rather than an array: updating it doesn't box and unbox the counts
+        self.moving = [0] * (cols * rows)
+        self.tracked = []  # [moving obstacle, its next _ObstacleMove]
+        for mobstacle in moving_obstacles:
+            x, y = int(2 * mobstacle.x), int(2 * mobstacle.y)
+            for cell_id, count in _footprint(cols, rows, x, y, mobstacle.width, mobstacle.height).items():
+                self.moving[cell_id] += count
+            state = (x, y, int(2 * mobstacle.dx), int(2 * mobstacle.dy), mobstacle.width, mobstacle.height)
+            self.tracked.append([mobstacle, self._move(state)])
+
+    def _move(self, state):
+        move = self.moves.get(state)
+        if move is None:
+            if len(self.moves) >= MAX_OBSTACLE_MOVES:
+                self.moves.clear()
+            move = self.moves[state] = _ObstacleMove(self.cols, self.rows, state)
+        return move
+
+    def move_obstacles(self, body=()):
+        """Move every moving obstacle on by one tick, keeping the counts up to date.
+
+        Returns True if one slid over a cell of body (any container of
+        cells). Only the cells an obstacle newly covers are looked up, so
+        this assumes nothing of body was under one before.
+        """
+        moving = self.moving
+        hit = False
+        for tracked in self.tracked:
+            move = tracked[1]
+            base = move.base
+            for offset, delta in move.deltas:
+                moving[base + offset] += delta
+            if move.entered:
+                base_x, base_y = move.base_cell
+                for cx, cy in move.entered:
+                    if (base_x + cx, base_y + cy) in body:
+                        hit = True
+            if move.next is None:
+                move.next = self._move(move.next_state)
+            mobstacle = tracked[0]
+            mobstacle.x, mobstacle.y, mobstacle.dx, mobstacle.dy = move.position
+            tracked[1] = move.next
+        return hit
+
+    def is_static(self, x, y):
+        return self.static[y * self.cols + x] == 1
+
+    def overlaps_moving(self, x, y):
+        return self.moving[y * self.cols + x] > 0
+
+    def hits_moving(self, x, y):
+        return self.moving[y * self.cols + x] >= HIT
+
+    def is_blocked(self, x, y):
+        cell_id = y * self.cols + x
+        return self.static[cell_id] == 1 or self.moving[cell_id] > 0
+
+
+class _ObstacleMove:
+    """One tick of a moving obstacle from a state (x, y, dx, dy, width, height) in half cells.
+
+    Holds the (cell id, change of count) strips the move leaves and enters
+    and the (x, y) cells whose corner it newly covers, both relative to a
+    base cell, the obstacle's position after the move and, once known, the
+    move after it.
+    """
+
+    __slots__ = ('base', 'base_cell', 'deltas', 'entered', 'position', 'next_state', 'next')
+
+    def __init__(self, cols, rows, state):
+        x, y, dx, dy, width, height = state
+        new_x, new_y = x + dx, y + dy
+        max_x, max_y = 2 * (cols - width), 2 * (rows - height)
+        if 0 <= x <= max_x and 0 <= new_x <= max_x and 0 <= y <= max_y and 0 <= new_y <= max_y:
+            # Away from the edges the strips only depend on the half cells,
+            # so they are shared relative to the cell the obstacle starts in
+            self.base_cell = (x >> 1, y >> 1)
+            self.base = (y >> 1) * cols + (x >> 1)
+            self.deltas, self.entered = _pattern(cols, x & 1, y & 1, dx, dy, width, height)
+        else:
+            changes = _changes(cols, rows, x, y, new_x, new_y, width, height)
+            self.base_cell = (0, 0)
+            self.base = 0
+            self.deltas = tuple((cy * cols + cx, delta) for cx, cy, delta, _ in changes)
+            self.entered = tuple((cx, cy) for cx, cy, _, corner in changes if corner)
+        # As MovingObstacle.move()
+        if new_x < 0 or new_x > max_x:
+            dx = -dx
+        if new_y < 0 or new_y > max_y:
+            dy = -dy
+        self.position = (new_x / 2, new_y / 2, dx / 2, dy / 2)
+        self.next_state = (new_x, new_y, dx, dy, width, height)
+        self.next = None
+
+
+# Moving obstacle moves worked out so far, by board size; a board size
+# starts over once it has MAX_OBSTACLE_MOVES
+_OBSTACLE_MOVES = {}
+MAX_OBSTACLE_MOVES = 1 << 15
+
+
+def _footprint(cols, rows, x, y, width, height):
+    """The count an obstacle at (x, y) half cells adds to each cell id it covers."""
+    x1 = min(cols, (x + 2 * width + 1) >> 1)
+    y1 = min(rows, (y + 2 * height + 1) >> 1)
+    # Cell x is overlapped from floor(x / 2) on, its corner is covered from ceil(x / 2)
+    corner_x, corner_y = (x + 1) >> 1, (y + 1) >> 1
+    return {cy * cols + cx: HIT + 1 if cx >= corner_x and cy >= corner_y else 1
+            for cy in range(max(0, y >> 1), y1) for cx in range(max(0, x >> 1), x1)}
+
+
+def _changes(cols, rows, x, y, new_x, new_y, width, height):
+    """(x, y, change of count, corner newly covered) for each cell an obstacle's move changes."""
+    before = _footprint(cols, rows, x, y, width, height)
+    after = _footprint(cols, rows, new_x, new_y, width, height)
+    return [(cell_id % cols, cell_id // cols, after.get(cell_id, 0) - before.get(cell_id, 0),
+             before.get(cell_id, 0) < HIT <= after.get(cell_id, 0))
+            for cell_id in sorted(before.keys() | after.keys())
+            if before.get(cell_id, 0) != after.get(cell_id, 0)]
+
+
+@functools.lru_cache(maxsize=None)
+def _pattern(cols, odd_x, odd_y, dx, dy, width, height):
+    """The strips of a move clear of the edges, relative to the cell the obstacle starts in.
+
+    Returns (cell id offset, change of count) pairs on a board cols wide,
+    and the (x, y) offsets of the cells whose corner it newly covers.
+    """
+    # Worked out on a board just big enough
+    size = 2 * max(width, height) + 4
+    x, y = 4 + odd_x, 4 + odd_y
+    changes = [(cx - (x >> 1), cy - (y >> 1), delta, corner)
+               for cx, cy, delta, corner in _changes(size, size, x, y, x + dx, y + dy, width, height)]
+    return (tuple((cy * cols + cx, delta) for cx, cy, delta, _ in changes),
+            tuple((cx, cy) for cx, cy, _, corner in changes if corner))
+
+
+def can_turn(current, direction):
+    """True if the snake moving in current may turn to direction."""
+    if direction in (LEFT, RIGHT):
+        return current[0] == 0
+    if direction in (UP, DOWN):
+        return current[1] == 0
+    return False
+
+
+def covered_cells(x, y, width, height):
+    """Cells whose corner point is inside a moving obstacle at (x, y): those it crashes into."""
+    x0, y0 = (int(2 * x) + 1) >> 1, (int(2 * y) + 1) >> 1
+    return [(cx, cy) for cy in range(y0, y0 + height) for cx in range(x0, x0 + width)]
+
+
+def spawn_point(cols, rows):
+    """Where the snake starts out, moving right."""
+    return cols // 2, rows // 2
+
+
+def rect_cells(rect):
+    rx, ry, rw, rh = rect
+    return [(x, y) for y in range(ry, ry + rh) for x in range(rx, rx + rw)]
+
+
+def generate_obstacles(level, cols=BOARD_COLS, rows=BOARD_ROWS, rng=random):
+    """Return (obstacles, moving_obstacles) for a Fun Mode level.
+
+    level is a level number or a loaded Level; cols and rows are the board
+    for a level without a size of its own. Static obstacles are (x, y,
+    width, height) tuples in cells: the level's own, then any placed for
+    this game, which never cover the spawn lane or cut off part of the
+    board (see levelgen).
+    """
+    if not isinstance(level, Level):
+        level = load_level(level, cols, rows)
+    cols, rows, spawn, wrap = level.cols, level.rows, level.spawn, level.wrap
+    size = OBSTACLE_SIZE
+    obstacles = list(level.rects)
+    blocked = bytearray(level.mask)
+    keep_clear = spawn_lane(cols, rows, spawn, wrap)
+    for count, width, height in level.random_obstacles:
+        obstacles += random_layout(rng, cols, rows, count, ((width, height),), keep_clear, wrap, blocked)
+    moving_obstacles = [MovingObstacle(x, y, size, size, dx, dy, cols, rows) for x, y, dx, dy in level.moving]
+    for count, speed in level.random_moving:
+        for _ in range(count):
+            x = rng.randrange(0, cols - size + 1)
+            y = rng.randrange(0, rows - size + 1)
+            dx = rng.choice([-speed, speed])
+            dy = rng.choice([-speed, speed])
+            moving_obstacles.append(MovingObstacle(x, y, size, size, dx, dy, cols, rows))
+    if level.dense:
+        # A dense layout of its own seed, laid out once per seed and cached
+        obstacles += dense_layout(rng.randrange(MAX_SEED), cols, rows, spawn, wrap, level.dense, blocked)
+    return obstacles, moving_obstacles
+
+
+class GameState:
+    """One game of Cat-a-Pillar, advanced one tick at a time by step().
+
+    Time only moves when step() is called: each tick adds dt seconds to the
+    game clock (one tick at tick_rate by default), which drives the extra
+    food window. Setting sprint speeds the tick rate up by SPRINT_FACTOR.
+
+    With food_reachable_only, food is only placed on cells the head can
+    still reach. When no cell is left for the food, board_full is set and
+    the game ends.
+
+    A Fun Mode level is loaded from its level file (see levels), which sets
+    the wall, the obstacles, the spawn point and, if it has one of its own,
+    the board size. Endless Mode is played on an ENDLESS_COLS x ENDLESS_ROWS
+    board without a wall, with the food placed near the head; other games
+    are played on a BOARD_COLS x BOARD_ROWS board. Either way cols and rows
+    can set another size.
+
+    All randomness (obstacles, food) comes from the game's own rng. Unless
+    one is passed in, it is a random.Random seeded with seed, or with a
+    fresh random seed; the seed is kept so the game can be replayed.
+    """
+
+    def __init__(self, mode='classic', level=None, difficulty='Easy',
+                 cols=None, rows=None, rng=None, has_wall=None,
+                 food_reachable_only=False, seed=None):
+        settings = difficulty_levels[difficulty]
+        self.mode = mode
+        self.level = level
+        self.difficulty = difficulty
+        self.speed = settings['speed']
+        self.point_value = settings['point_value']
+        self.extra_point_time = settings['extra_time']
+
+        # Fun Mode levels come from level files; those with a board size of
+        # their own are always played on it
+        self.level_data = None
+        if mode == 'fun':
+            level_data = load_level(level, cols or BOARD_COLS, rows or BOARD_ROWS)
+            if (cols and cols != level_data.cols) or (rows and rows != level_data.rows):
+                raise ValueError(f"level {level} is played on a {level_data.cols}x{level_data.rows} board")
+            cols, rows = level_data.cols, level_data.rows
+            self.level_data = level_data
+        if mode == 'endless':
+            cols, rows = cols or ENDLESS_COLS, rows or ENDLESS_ROWS
+        self.cols = cols = cols or BOARD_COLS
+        self.rows = rows = rows or BOARD_ROWS
+        if rng is None:
+            if seed is None:
+                seed = random.randrange(MAX_SEED)
+            rng = random.Random(seed)
+        self.seed = seed
+        self.rng = rng
+
+        # Obstacles for Fun Mode
+        self.obstacles = []
+        self.moving_obstacles = []
+        if mode == 'fun':
+            self.obstacles, self.moving_obstacles = generate_obstacles(self.level_data, rng=self.rng)
+
+        # Check if level has walls; Retro Mode always has one
+        if has_wall is None:
+            has_wall = mode == 'retro' or (mode == 'fun' and not self.level_data.wrap)
+        self.has_wall = has_wall
+
+        self.obstacle_grid = ObstacleGrid(cols, rows, self.obstacles, self.moving_obstacles)
+        self.free_cells = FreeCells(cols, rows, mask=self.obstacle_grid.static)
+        self.food_reachable_only = food_reachable_only
+        # Food near the head, so it can be found on a board bigger than the screen
+        self.food_radius = ENDLESS_FOOD_RADIUS if mode == 'endless' else None
+
+        # Snake start position, moving to the right
+        self.x, self.y = self.level_data.spawn if self.level_data else spawn_point(cols, rows)
+        self.direction = RIGHT
+        self.sprint = False
+        self.snake = SnakeBody()
+        self.snake_length = 1
+
+        # Growth bulges travelling down the body, as the tick each one was
+        # created at; a bulge's distance from the head is how many ticks ago
+        # that was, so aging them costs nothing
+        self.bulge_ticks = deque()
+
+        self.score = 0
+        self.time = 0.0
+        self.tick = 0
+        self.game_over = False
+        self.board_full = False
+
+        # Extra food
+        self.extra_food_visible = False
+        self.extra_food_timer = 0.0
+        self.extra_food_x = None
+        self.extra_food_y = None
+        self.points_since_last_extra = 0
+
+        self.food_x = self.food_y = None
+        self.food_x, self.food_y = self._random_free_cell()
+
+    @property
+    def head(self):
+        return (self.x, self.y)
+
+    @property
+    def tick_rate(self):
+        """Ticks per second at the current speed."""
+        return self.speed * SPRINT_FACTOR if self.sprint else self.speed
+
+    def turn(self, direction):
+        """Change direction unless it would reverse onto the body.
+
+        Returns True if the direction changed.
+        """
+        if can_turn(self.direction, direction):
+            self.direction = direction
+            return True
+        return False
+
+    def is_blocked(self, x, y):
+        """True if a static or moving obstacle covers the cell."""
+        return self.obstacle_grid.is_blocked(x, y)
+
+    def reachable_cells(self):
+        """Free cells the head can reach, by flood fill over the board."""
+        free_cells = self.free_cells
+        seen = {self.head}
+        frontier = [self.head]
+        while frontier:
+            x, y = frontier.pop()
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if not self.has_wall:
+                    nx %= self.cols
+                    ny %= self.rows
+                cell = (nx, ny)
+                if cell not in seen and cell in free_cells:
+                    seen.add(cell)
+                    frontier.append(cell)
+        seen.discard(self.head)
+        return list(seen)
+
+    def _random_free_cell(self):
+        """Pick an empty cell for food, or (None, None) if the board is full."""
+        taken = {(self.x, self.y), (self.food_x, self.food_y)}
+        if self.extra_food_visible:
+            taken.add((self.extra_food_x, self.extra_food_y))
+        overlaps_moving = self.obstacle_grid.overlaps_moving
+
+        def reject(cell):
+            return cell in taken or overlaps_moving(*cell)
+
+        if self.food_reachable_only:
+            candidates = [cell for cell in self.reachable_cells() if not reject(cell)]
+            cell = self.rng.choice(candidates) if candidates else None
+        elif self.food_radius is not None:
+            cell = self.free_cells.sample_near(self.rng, self.head, self.food_radius, not self.has_wall, reject)
+        else:
+            cell = self.free_cells.sample(self.rng, reject)
+        return cell if cell is not None else (None, None)
+
+    def extra_food_time_left(self):
+        return self.extra_point_time - (self.time - self.extra_food_timer)
+
+    def extra_food_multiplier(self):
+        time_fraction = (self.time - self.extra_food_timer) / self.extra_point_time  # From 0 to 1
+        multiplier = MAX_MULTIPLIER - (MAX_MULTIPLIER - MIN_MULTIPLIER) * time_fraction
+        return max(multiplier, MIN_MULTIPLIER)
+
+    def bulge_distance(self, born):
+        """Distance from the head of a bulge created at tick born.
+
+        Bulges start one cell in on the tick they are created, like a
+        distance aged by one at the end of that tick.
+        """
+        return self.tick - born + 1
+
+    def bulge_indices(self):
+        """Snake indices (0 is the tail) of the thickened segments."""
+        length = len(self.snake)
+        indices = []
+        for born in self.bulge_ticks:
+            index = length - self.bulge_distance(born)
+            if 0 <= index < length:
+                indices.append(index)
+        return indices
+
+    def step(self, direction=None, dt=None):
+        """Advance the game by one tick.
+
+        Returns False once the snake has crashed.
+        """
+        if self.game_over:
+            return False
+        if direction is not None:
+            self.turn(direction)
+        self.time += 1.0 / self.tick_rate if dt is None else dt
+        self.tick += 1
+
+        # Movement
+        dx, dy = self.direction
+        x = self.x + dx
+        y = self.y + dy
+
+        # Screen wrapping or collision with wall
+        if not self.has_wall:
+            x %= self.cols
+            y %= self.rows
+        elif not (0 <= x < self.cols and 0 <= y < self.rows):
+            self.game_over = True
+            return False
+        self.x, self.y = x, y
+
+        # Moving obstacles, crashing into the head or sliding into the body
+        if self.moving_obstacles:
+            grid = self.obstacle_grid
+            if grid.move_obstacles(self.snake.occupied) or grid.hits_moving(x, y):
+                self.game_over = True
+                return False
+
+        # Extra food
+        if not self.extra_food_visible and self.points_since_last_extra >= EXTRA_FOOD_POINTS:
+            self.extra_food_x, self.extra_food_y = self._random_free_cell()
+            if self.extra_food_x is not None:
+                self.extra_food_visible = True
+                self.extra_food_timer = self.time
+        if self.extra_food_visible and self.extra_food_time_left() <= 0:
+            self.extra_food_visible = False
+            self.points_since_last_extra = 0
+
+        # Collision with self
+        snake_head = (x, y)
+        if snake_head in self.snake:
+            self.game_over = True
+            return False
+        self.snake.push_head(snake_head)
+        self.free_cells.remove(snake_head)
+
+        # Collision with obstacles
+        if self.obstacle_grid.is_static(x, y):
+            self.game_over = True
+            return False
+
+        # Eating food
+        if x == self.food_x and y == self.food_y:
+            self.food_x, self.food_y = self._random_free_cell()
+            if self.food_x is None:
+                self.board_full = True
+            self.score += self.point_value
+            self.points_since_last_extra += 1
+            self.bulge_ticks.append(self.tick)  # Start thickening from the head
+
+        # Eating extra food
+        if self.extra_food_visible and x == self.extra_food_x and y == self.extra_food_y:
+            self.extra_food_visible = False
+            self.score += int(self.point_value * self.extra_food_multiplier())
+            self.points_since_last_extra = 0
+            self.bulge_ticks.append(self.tick)
+
+        # The snake grows once a bulge has reached the tail
+        if self.bulge_ticks and self.bulge_distance(self.bulge_ticks[0]) >= len(self.snake):
+            self.snake_length += 1
+            self.bulge_ticks.popleft()
+
+        # Trim snake
+        if len(self.snake) > self.snake_length:
+            self.free_cells.add(self.snake.pop_tail())
+
+        if self.board_full:
+            self.game_over = True
+            return False
+        return True
@@ -0,0 +1,88 @@
+"""Font loading for Cat-a-Pillar without a system font scan on every start.
+
+The first pygame.font.SysFont() call asks fontconfig (or the registry, or
+the font folders) about every font on the system, which takes a good part
+of a cold start. system_font() resolves a font name the same way SysFont()
+does, but keeps the file it was resolved to in a small JSON file in the
+data directory (see use_disk_cache()), so the scan only happens the first
+time a font is asked for, or again once its file has gone away. A font that
+isn't installed at all is remembered as pygame's default font; delete the
+file to look again.
+"""
+import json
+import os
+import sys
+
+import pygame
+
+FONT_CACHE_VERSION = 1
+FONT_CACHE_FILE = 'fonts.json'
+
+_cache_path = None
+_paths = None  # 'name:style' -> [font file or None for pygame's default, synthetic bold]
+
+
+def use_disk_cache(directory):
+    """Keep the resolved font files in directory (None to scan every time)."""
+    global _cache_path, _paths
+    _cache_path = os.path.join(directory, FONT_CACHE_FILE) if directory else None
+    _paths = None
+
+
+def _load():
+    global _paths
+    _paths = {}
+    if not _cache_path:
+        return
+    try:
+        with open(_cache_path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    if isinstance(data, dict) and data.get('version') == FONT_CACHE_VERSION:
+        _paths = data.get('fonts', {})
+
+
+def _save():
+    if not _cache_path:
+        return
+    try:
+        # Written under a temporary name first, so no half-written file is left behind
+        with open(_cache_path + '.tmp', 'w') as f:
+            json.dump({'version': FONT_CACHE_VERSION, 'fonts': _paths}, f, indent=1)
+        os.replace(_cache_path + '.tmp', _cache_path)
+    except OSError as error:
+        print(f"Could not save the font cache: {error}", file=sys.stderr)
+
+
+def system_font(name, size, bold=False):
+    """pygame.font.SysFont(name, size, bold), from the cache when the font was resolved before."""
+    if _paths is None:
+        _load()
+    key = f"{name.lower()}:{'bold' if bold else 'regular'}"
+    entry = _paths.get(key)
+    if entry is not None:
+        path, set_bold = entry
+        if path is None or os.path.exists(path):
+            font = pygame.font.Font(path, size)
+            font.set_bold(set_bold)
+            return font
+
+    def constructor(path, size, set_bold, set_italic):
+        # Called by SysFont() with the file it picked and the styles it fakes
+        _paths[key] = [path, set_bold]
+        font = pygame.font.Font(path, size)
+        font.set_bold(set_bold)
+        return font
+
+    font = pygame.font.SysFont(name, size, bold, constructor=constructor)
+    _save()
+    return font
+
+
+def bundled_font(path, size, fallback, fallback_size):
+    """The font file shipped with the game, or the system font fallback if it can't be loaded."""
+    try:
+        return pygame.font.Font(path, size)
+    except (OSError, pygame.error):
+        return system_font(fallback, fallback_size)
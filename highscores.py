@@ -0,0 +1,324 @@
+"""Highscore storage for Cat-a-Pillar.
+
+All highscore tables live in one SQLite database (highscores.db) in the
+game's data directory, one row per entry, keyed by mode, level and
+difficulty. HighscoreStore keeps every table in memory, so "is this a
+highscore" and top-10 queries never hit the disk; the database is only read
+again when another game instance sharing the directory has written to it,
+which SQLite reports through PRAGMA data_version.
+
+Writes never block the game: save() and clear() update the in-memory copy
+right away and hand the SQL to HighscoreWriter, a background thread that
+applies everything queued so far in one transaction. A transaction either
+lands completely or not at all, so a crash mid-write can't lose a table.
+How hard each commit is pushed to disk is set with CATAPILLAR_HIGHSCORE_SYNC
+(off, normal or full, see SQLite's PRAGMA synchronous). Queued writes are
+flushed when the game exits.
+
+The old highscores*.txt files are imported once when the database is
+created.
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import traceback
+
+MAX_ENTRIES = 10  # Keep top 10
+FUN_LEVELS = range(1, 6)
+
+# Seconds to wait for another instance holding the database lock
+BUSY_TIMEOUT = 5.0
+
+SCHEMA_VERSION = 1
+
+# Writes waiting for the writer thread; save() only waits when this is full
+MAX_PENDING_WRITES = 64
+
+# fsync policy, mapped to PRAGMA synchronous
+SYNC_MODES = {'off': 'OFF', 'normal': 'NORMAL', 'full': 'FULL'}
+DEFAULT_SYNC = 'normal'
+
+# Entries imported from the old text files don't know their difficulty
+UNKNOWN_DIFFICULTY = ''
+
+
+def data_dir():
+    """The directory for highscores, created if it doesn't exist.
+
+    CATAPILLAR_DATA_DIR overrides the per-platform default.
+    """
+    base_dir = os.environ.get('CATAPILLAR_DATA_DIR')
+    if not base_dir:
+        if sys.platform == 'darwin':
+            # macOS specific directory
+            base_dir = os.path.expanduser('~/Library/Application Support/catapillar')
+        elif sys.platform.startswith('win'):
+            # Windows directory
+            base_dir = os.path.join(os.environ.get('APPDATA'), 'Catapillar')
+        else:
+            # For other operating systems, e.g., Linux
+            base_dir = os.path.expanduser('~/.catapillar')
+    os.makedirs(base_dir, exist_ok=True)
+    return base_dir
+
+
+def legacy_file_path(base_dir, mode='classic', level=None):
+    """Where the old text format kept the table for a mode and level."""
+    if mode == 'fun' and level is not None:
+        filename = f'highscores_level_{level}.txt'
+    else:
+        filename = 'highscores.txt'
+    return os.path.join(base_dir, filename)
+
+
+def read_legacy_file(filepath):
+    highscores = []
+    if os.path.exists(filepath):
+        with open(filepath, 'r') as f:
+            for line in f:
+                if line.strip() == '':
+                    continue
+                name, score = line.strip().rsplit(',', 1)
+                highscores.append((name, int(score)))
+    return highscores
+
+
+def table_key(mode='classic', level=None):
+    # Classic mode has no levels
+    return (mode, level if mode == 'fun' else None)
+
+
+class HighscoreWriter:
+    """Applies highscore writes on a background thread.
+
+    Writes are (sql, parameters) lists queued with submit(). The thread
+    takes everything that queued up while it was busy and commits it as one
+    transaction, so a burst of writes costs a single commit.
+    """
+
+    def __init__(self, path, sync=DEFAULT_SYNC, max_pending=MAX_PENDING_WRITES):
+        if sync not in SYNC_MODES:
+            raise ValueError(f"unknown sync mode {sync!r}, expected one of {sorted(SYNC_MODES)}")
+        self.path = path
+        self.sync = sync
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.lock = threading.Lock()
+        self.pending = 0  # Submitted writes not committed yet
+        self.thread = threading.Thread(target=self._run, name='highscore-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, statements):
+        with self.lock:
+            self.pending += 1
+        self.queue.put(statements)
+
+    def has_pending(self):
+        with self.lock:
+            return self.pending > 0
+
+    def flush(self):
+        """Wait until every write submitted so far is committed."""
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.flush()
+            self.queue.put(None)
+            self.thread.join()
+
+    def _run(self):
+        db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        db.execute(f'PRAGMA synchronous = {SYNC_MODES[self.sync]}')
+        stop = False
+        while not stop:
+            items = [self.queue.get()]
+            # Coalesce everything else that is already waiting
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            batch = [item for item in items if isinstance(item, list)]
+            if batch:
+                self._commit(db, batch)
+                with self.lock:
+                    self.pending -= len(batch)
+            for item in items:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    item.set()
+        db.close()
+
+    def _commit(self, db, batch):
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                for statements in batch:
+                    for sql, parameters in statements:
+                        db.execute(sql, parameters)
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        except sqlite3.Error:
+            # A full or broken disk must not take the game down with it
+            print('Could not save highscores:', file=sys.stderr)
+            traceback.print_exc()
+
+
+class HighscoreStore:
+    """Highscore tables in SQLite, answered from an in-memory copy."""
+
+    def __init__(self, path=None, max_entries=MAX_ENTRIES, sync=None):
+        if sync is None:
+            sync = os.environ.get('CATAPILLAR_HIGHSCORE_SYNC') or DEFAULT_SYNC
+        if path is None:
+            path = os.path.join(data_dir(), 'highscores.db')
+        self.path = path
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        # WAL lets other instances read while one of them writes
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self._create_schema()
+        self.writer = HighscoreWriter(path, sync)
+        self.tables = {}  # (mode, level, difficulty) -> [(name, score), ...] best first
+        self.data_version = None
+        self._refresh()
+
+    def _create_schema(self):
+        db = self.connection
+        if db.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+            return
+        # IMMEDIATE takes the write lock, so only one instance migrates
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            if db.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+                db.execute(
+                    'CREATE TABLE IF NOT EXISTS highscores ('
+                    ' id INTEGER PRIMARY KEY,'
+                    ' mode TEXT NOT NULL,'
+                    ' level INTEGER,'
+                    ' difficulty TEXT NOT NULL,'
+                    ' name TEXT NOT NULL,'
+                    ' score INTEGER NOT NULL)')
+                db.execute(
+                    'CREATE INDEX IF NOT EXISTS highscores_by_table'
+                    ' ON highscores (mode, level, difficulty, score DESC, id)')
+                self._import_legacy_files(os.path.dirname(self.path))
+                db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+    def _import_legacy_files(self, base_dir):
+        tables = [('classic', None)] + [('fun', level) for level in FUN_LEVELS]
+        for mode, level in tables:
+            entries = read_legacy_file(legacy_file_path(base_dir, mode, level))
+            self.connection.executemany(
+                'INSERT INTO highscores (mode, level, difficulty, name, score) VALUES (?, ?, ?, ?, ?)',
+                [(mode, level, UNKNOWN_DIFFICULTY, name, score) for name, score in entries])
+
+    def _refresh(self):
+        """Reload the in-memory tables if the database changed elsewhere.
+
+        data_version only changes when another connection commits; reading
+        it is served from SQLite's shared memory index, not the disk.
+        While our own writes are still queued the copy is ahead of the
+        database, so it is kept until they have landed.
+        """
+        if self.writer.has_pending():
+            return
+        version = self.connection.execute('PRAGMA data_version').fetchone()[0]
+        if version == self.data_version:
+            return
+        tables = {}
+        rows = self.connection.execute(
+            'SELECT mode, level, difficulty, name, score FROM highscores'
+            ' ORDER BY mode, level, difficulty, score DESC, id')
+        for mode, level, difficulty, name, score in rows:
+            tables.setdefault((mode, level, difficulty), []).append((name, score))
+        self.tables = tables
+        self.data_version = version
+
+    def top(self, mode='classic', level=None, difficulty=None, count=MAX_ENTRIES):
+        """The best entries of a table; difficulty None ranks all difficulties together."""
+        self._refresh()
+        mode, level = table_key(mode, level)
+        if difficulty is not None:
+            return self.tables.get((mode, level, difficulty), [])[:count]
+        entries = []
+        for (table_mode, table_level, _), table in self.tables.items():
+            if (table_mode, table_level) == (mode, level):
+                entries.extend(table)
+        # Stable sort keeps earlier entries first among equal scores
+        entries.sort(key=lambda x: x[1], reverse=True)
+        return entries[:count]
+
+    def is_new_highscore(self, score, mode='classic', level=None, difficulty=None):
+        highscores = self.top(mode, level, difficulty)
+        if len(highscores) < self.max_entries:
+            return True
+        return score > highscores[-1][1]
+
+    def save(self, name, score, mode='classic', level=None, difficulty=UNKNOWN_DIFFICULTY):
+        mode, level = table_key(mode, level)
+        self.writer.submit([
+            ('INSERT INTO highscores (mode, level, difficulty, name, score) VALUES (?, ?, ?, ?, ?)',
+             (mode, level, difficulty, name, score)),
+            ('DELETE FROM highscores WHERE mode = ? AND level IS ? AND difficulty = ? AND id NOT IN'
+             ' (SELECT id FROM highscores WHERE mode = ? AND level IS ? AND difficulty = ?'
+             '  ORDER BY score DESC, id LIMIT ?)',
+             (mode, level, difficulty, mode, level, difficulty, self.max_entries)),
+        ])
+        table = self.tables.setdefault((mode, level, difficulty), [])
+        table.append((name, score))
+        table.sort(key=lambda x: x[1], reverse=True)
+        del table[self.max_entries:]
+
+    def clear(self):
+        self.writer.submit([('DELETE FROM highscores', ())])
+        self.tables = {}
+
+    def flush(self):
+        """Wait for all queued writes to reach the database."""
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
+        self.connection.close()
+
+
+_default_store = None
+
+
+def default_store():
+    """The store in the data directory, opened on first use."""
+    global _default_store
+    if _default_store is None:
+        _default_store = HighscoreStore()
+        # Queued writes are flushed before the game exits
+        atexit.register(_default_store.close)
+    return _default_store
+
+
+def load_highscores(mode='classic', level=None, difficulty=None):
+    return default_store().top(mode, level, difficulty)
+
+
+def save_highscore(name, score, mode='classic', level=None, difficulty=UNKNOWN_DIFFICULTY):
+    default_store().save(name, score, mode, level, difficulty)
+
+
+def clear_highscores():
+    default_store().clear()
+
+
+def is_new_highscore(score, mode='classic', level=None, difficulty=None):
+    return default_store().is_new_highscore(score, mode, level, difficulty)
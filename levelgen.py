@@ -0,0 +1,312 @@
+"""Seeded obstacle layouts that never cut the board up.
+
+Obstacles are placed one at a time at random. A placement is kept only if
+it leaves the spawn lane (the cell the snake starts on and the cells ahead
+of it) clear and every free cell still connected to every other one, so
+no food can end up out of reach and no part of the board is closed off.
+Each placement is checked locally, on the ring of cells around the new
+obstacle: if the free cells on it form a single run, or a small flood fill
+around the obstacle joins the runs up, the free cells on either side of it
+are still connected. That keeps laying out a large board fast; the
+finished layout is checked with one flood fill over the whole board.
+
+Dense layouts (Level 5) are kept by seed, in memory and, once
+use_disk_cache() has been called, in files, so a seed is only ever laid out
+once. A LayoutPregenerator works out the layout of the next game on a
+background thread while the player is still in the menus.
+"""
+import os
+import random
+import re
+import sys
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+
+LAYOUT_VERSION = 1  # Bump when the same seed gives a different layout
+SPAWN_LANE = 8  # Cells kept clear ahead of the spawn point
+DENSE_SHAPES = ((3, 3), (2, 2), (1, 5), (5, 1), (1, 3), (3, 1))
+DENSE_CELLS_PER_OBSTACLE = 20  # Board cells per obstacle on a dense level
+MAX_PLACEMENT_TRIES = 8  # Random spots tried per obstacle before giving it up
+LOCAL_SEARCH = 6  # Cells around a new obstacle searched for a way around it
+MAX_CACHED_LAYOUTS = 64  # Layouts kept in memory
+MAX_SAVED_LAYOUTS = 256  # Layout files kept on disk
+LAYOUT_EXTENSION = '.layout'
+
+_FREE_RUNS = re.compile(b'\x00+')
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_dir = None
+
+
+def spawn_lane(cols, rows, spawn, wrap):
+    """The spawn point and the SPAWN_LANE cells to the right of it, where the snake heads first."""
+    x, y = spawn
+    lane = []
+    for cx in range(x, x + SPAWN_LANE + 1):
+        if wrap:
+            cx %= cols
+        elif cx >= cols:
+            break
+        lane.append((cx, y))
+    return lane
+
+
+def all_connected(blocked, cols, rows, wrap):
+    """True if the free cells of blocked (one byte per cell id) form one region.
+
+    Works on the runs of free cells in each row rather than on single
+    cells: every run is joined with the runs it touches in the row below
+    (and across the edges where there is no wall), and the free cells are
+    connected if that leaves a single group.
+    """
+    data = bytes(blocked)
+    parent = []
+
+    def find(run):
+        while parent[run] != run:
+            parent[run] = parent[parent[run]]
+            run = parent[run]
+        return run
+
+    def join(run, other):
+        run, other = find(run), find(other)
+        if run != other:
+            parent[run] = other
+
+    row_runs = []  # Per row, (start, end, run number) of each free run
+    for y in range(rows):
+        offset = y * cols
+        runs = []
+        for match in _FREE_RUNS.finditer(data, offset, offset + cols):
+            runs.append((match.start() - offset, match.end() - offset, len(parent)))
+            parent.append(len(parent))
+        if wrap and len(runs) > 1 and runs[0][0] == 0 and runs[-1][1] == cols:
+            join(runs[0][2], runs[-1][2])
+        row_runs.append(runs)
+
+    pairs = list(zip(row_runs, row_runs[1:]))
+    if wrap and rows > 2:
+        pairs.append((row_runs[-1], row_runs[0]))
+    for upper, lower in pairs:
+        idx = other = 0
+        while idx < len(upper) and other < len(lower):
+            start, end, run = upper[idx]
+            lower_start, lower_end, lower_run = lower[other]
+            if start < lower_end and lower_start < end:
+                join(run, lower_run)
+            if end < lower_end:
+                idx += 1
+            else:
+                other += 1
+    return len({find(run) for run in range(len(parent))}) <= 1
+
+
+def _stays_connected(blocked, cols, rows, wrap, x, y, width, height):
+    """True if the free cells around a newly blocked rectangle are still joined.
+
+    The ring of cells around it is walked clockwise from the top left
+    corner, off-board cells counting as blocked. If its free cells form a
+    single run, they are joined along the ring. Otherwise the runs must
+    meet in a flood fill kept to LOCAL_SEARCH cells around the rectangle;
+    runs only joined further away count as cut off, so this may turn down
+    a placement that would have been fine, but never lets one through
+    that cuts the board up.
+    """
+    def free(cx, cy):
+        if wrap:
+            return not blocked[(cy % rows) * cols + cx % cols]
+        return 0 <= cx < cols and 0 <= cy < rows and not blocked[cy * cols + cx]
+
+    ring = [(cx, y - 1) for cx in range(x - 1, x + width + 1)]
+    ring += [(x + width, cy) for cy in range(y, y + height)]
+    ring += [(cx, y + height) for cx in range(x + width, x - 2, -1)]
+    ring += [(x - 1, cy) for cy in range(y + height - 1, y - 1, -1)]
+    is_free = [free(cx, cy) for cx, cy in ring]
+    # Every change from blocked to free starts a run of free cells
+    starts = [ring[idx] for idx in range(len(ring)) if is_free[idx] and not is_free[idx - 1]]
+    if len(starts) <= 1:
+        return True
+
+    # Cells are kept in coordinates relative to the rectangle, not wrapped,
+    # so every step taken is between cells that really are neighbors
+    left, top = x - LOCAL_SEARCH, y - LOCAL_SEARCH
+    right, bottom = x + width + LOCAL_SEARCH, y + height + LOCAL_SEARCH
+    targets = set(starts[1:])
+    seen = {starts[0]}
+    frontier = [starts[0]]
+    while frontier:
+        cx, cy = frontier.pop()
+        for nx, ny in ((cx - 1, cy), (cx + 1, cy), (cx, cy - 1), (cx, cy + 1)):
+            if (nx, ny) in seen or not (left <= nx < right and top <= ny < bottom) or not free(nx, ny):
+                continue
+            targets.discard((nx, ny))
+            if not targets:
+                return True
+            seen.add((nx, ny))
+            frontier.append((nx, ny))
+    return False
+
+
+def random_layout(rng, cols, rows, count, shapes, keep_clear=(), wrap=False, blocked=None):
+    """Up to count obstacles of the given (width, height) shapes, as (x, y, width, height).
+
+    No obstacle covers a cell in keep_clear, and all free cells stay
+    connected. A shape that finds no such spot in MAX_PLACEMENT_TRIES is
+    left out, so the layout may have fewer obstacles on a crowded board.
+    blocked (a byte per cell id) holds the obstacles already on the board,
+    if any, and gets the new ones added.
+    """
+    if blocked is None:
+        blocked = bytearray(cols * rows)
+    keep_clear = set(keep_clear)
+    obstacles = []
+    for _ in range(count):
+        width, height = rng.choice(shapes)
+        if width > cols or height > rows:
+            continue
+        for _ in range(MAX_PLACEMENT_TRIES):
+            x = rng.randrange(0, cols - width + 1)
+            y = rng.randrange(0, rows - height + 1)
+            cells = [cy * cols + cx for cy in range(y, y + height) for cx in range(x, x + width)]
+            if any((cell % cols, cell // cols) in keep_clear for cell in cells):
+                continue
+            if all(blocked[cell] for cell in cells):
+                continue
+            added = [cell for cell in cells if not blocked[cell]]
+            for cell in added:
+                blocked[cell] = 1
+            if _stays_connected(blocked, cols, rows, wrap, x, y, width, height):
+                obstacles.append((x, y, width, height))
+                break
+            for cell in added:
+                blocked[cell] = 0
+    # Checked as a whole once more, whatever the ring tests said
+    if not all_connected(blocked, cols, rows, wrap):
+        raise RuntimeError("obstacle layout cut the board up")
+    return obstacles
+
+
+def generate_dense_layout(seed, cols, rows, spawn, wrap, cells_per_obstacle=DENSE_CELLS_PER_OBSTACLE,
+                          blocked=None):
+    """The dense layout for seed, worked out from scratch around the obstacles in blocked."""
+    count = cols * rows // cells_per_obstacle
+    blocked = bytearray(blocked) if blocked is not None else None
+    return random_layout(random.Random(seed), cols, rows, count, DENSE_SHAPES,
+                         spawn_lane(cols, rows, spawn, wrap), wrap, blocked)
+
+
+def dense_layout(seed, cols, rows, spawn, wrap, cells_per_obstacle=DENSE_CELLS_PER_OBSTACLE, blocked=None):
+    """The dense layout for seed, from the caches if it was laid out before."""
+    base = zlib.crc32(blocked) if blocked is not None and any(blocked) else 0
+    key = (seed, cols, rows, spawn, wrap, cells_per_obstacle, base)
+    with _cache_lock:
+        obstacles = _cache.get(key)
+        if obstacles is not None:
+            _cache.move_to_end(key)
+            return obstacles
+    path = _layout_path(key)
+    obstacles = _load_layout(path) if path else None
+    if obstacles is None:
+        obstacles = generate_dense_layout(seed, cols, rows, spawn, wrap, cells_per_obstacle, blocked)
+        if path:
+            _save_layout(path, obstacles)
+    with _cache_lock:
+        _cache[key] = obstacles
+        while len(_cache) > MAX_CACHED_LAYOUTS:
+            _cache.popitem(last=False)
+    return obstacles
+
+
+def use_disk_cache(directory):
+    """Keep dense layouts in files in directory as well (None to stop)."""
+    global _cache_dir
+    if directory:
+        directory = os.path.join(directory, f'v{LAYOUT_VERSION}')
+        os.makedirs(directory, exist_ok=True)
+    _cache_dir = directory
+
+
+def _layout_path(key):
+    if not _cache_dir:
+        return None
+    seed, cols, rows, (x, y), wrap, cells_per_obstacle, base = key
+    name = (f"{cols}x{rows}-{x}-{y}-{'wrap' if wrap else 'wall'}-{cells_per_obstacle}-{base:08x}"
+            f"-{seed:016x}{LAYOUT_EXTENSION}")
+    return os.path.join(_cache_dir, name)
+
+
+def _load_layout(path):
+    """Obstacles from a layout file: (x, y, width, height) as little-endian uint16s."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) % 8:
+        return None
+    values = array('H')
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return [tuple(values[idx:idx + 4]) for idx in range(0, len(values), 4)]
+
+
+def _save_layout(path, obstacles):
+    values = array('H', [value for obstacle in obstacles for value in obstacle])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    try:
+        # Written under a temporary name first, so no half-written layout is left behind
+        with open(path + '.tmp', 'wb') as f:
+            f.write(values.tobytes())
+        os.replace(path + '.tmp', path)
+        directory = os.path.dirname(path)
+        saved = [entry for entry in os.scandir(directory) if entry.name.endswith(LAYOUT_EXTENSION)]
+        if len(saved) > MAX_SAVED_LAYOUTS:
+            saved.sort(key=lambda entry: entry.stat().st_mtime)
+            for old in saved[:-MAX_SAVED_LAYOUTS]:
+                os.remove(old.path)
+    except OSError as error:
+        print(f"Could not save level layout: {error}", file=sys.stderr)
+
+
+class LayoutPregenerator:
+    """Works out the next game of a level on a background thread.
+
+    prepare() picks the seed of the next game and sets up a GameState with
+    it on a worker thread, which leaves its layout in the caches. take()
+    hands that seed out (waiting for the worker if it isn't done yet) and
+    prepares the one after it, so a game started with the seed finds its
+    layout ready.
+    """
+
+    def __init__(self, level, cols, rows):
+        self.level = level
+        self.cols = cols
+        self.rows = rows
+        self.seed = None
+        self.thread = None
+
+    def prepare(self):
+        if self.thread is not None:
+            return
+        from engine import GameState, MAX_SEED
+        self.seed = random.randrange(MAX_SEED)
+
+        def run(seed=self.seed):
+            GameState('fun', self.level, cols=self.cols, rows=self.rows, seed=seed)
+
+        self.thread = threading.Thread(target=run, name='layout-pregenerator', daemon=True)
+        self.thread.start()
+
+    def take(self):
+        """The seed of the next game, whose layout is ready."""
+        self.prepare()
+        self.thread.join()
+        seed = self.seed
+        self.thread = None
+        self.prepare()
+        return seed
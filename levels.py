@@ -0,0 +1,345 @@
+"""Fun Mode levels, defined in text files in the levels directory.
+
+A level file N.level defines level N as `key: value` lines. Blank lines and
+anything after a '#' are ignored, up to the map:
+
+    name: Wall & Obstacles       shown in the level menu
+    topology: wall               a wall around the board, or wrap (default)
+    size: 200 150                board size in cells (default: the map's size)
+    spawn: 20 15                 where the snake starts, moving right
+                                 (default: the middle of the board)
+    obstacle: X Y WIDTH HEIGHT   a static obstacle
+    moving: X Y DX DY            an obstacle moving DX, DY cells per tick
+                                 (multiples of 0.5), bouncing off the edges
+    random: COUNT WIDTH HEIGHT   static obstacles placed anew every game
+    random_moving: COUNT SPEED   moving obstacles placed anew every game
+    dense: CELLS                 a dense layout, one obstacle per CELLS cells,
+                                 laid out anew every game (see levelgen)
+    map:                         the rest of the file is the board, one line
+                                 per row: '#' is an obstacle, 'S' the spawn
+                                 point, anything else free
+
+A level without a size or a map fits whatever board it is played on.
+
+Loading a level compiles it for its board: the fixed obstacles (map and
+obstacle lines) become a collision mask with one byte per cell, which the
+engine takes over as it is, and a render layer of rectangles, the runs of
+obstacle cells merged row over row, so a wall or a block of any size is
+drawn and listed as one rectangle. Compiled levels are kept in memory and,
+once use_disk_cache() has been called, in files named after the SHA-256 of
+the level file with the mask packed to a bit per cell, so a level file is
+only parsed again after it changes. Nothing is loaded until a level is
+asked for.
+"""
+import hashlib
+import os
+import re
+import struct
+import sys
+from array import array
+
+from levelgen import all_connected
+
+LEVEL_EXTENSION = '.level'
+COMPILED_EXTENSION = '.compiled'
+COMPILED_MAGIC = b'CATL'
+COMPILED_VERSION = 1
+COMPILED_HEADER = struct.Struct('<4sHII')  # Magic, version, name bytes, numbers
+TOPOLOGIES = ('wrap', 'wall')
+MOVING_SIZE = 3  # Moving obstacles are 3x3 cells, as OBSTACLE_SIZE in the engine
+
+# Map characters to mask bytes
+_MAP_CELLS = bytes(1 if chr(byte) == '#' else 0 for byte in range(256))
+_BITS = bytes.maketrans(b'\x00\x01', b'01')
+_UNBITS = bytes.maketrans(b'01', b'\x00\x01')
+_FILE_NAME = re.compile(r'^(\d+)' + re.escape(LEVEL_EXTENSION) + '$')
+_RUNS = re.compile(b'\x01+')
+
+_levels = {}  # (number, cols, rows) -> compiled Level
+_cache_dir = None
+
+
+class LevelError(Exception):
+    """A level file that can't be played: a syntax error or an impossible board."""
+
+
+class Level:
+    """A level compiled for one board size.
+
+    mask holds a byte per cell (y * cols + x), 1 under a fixed obstacle;
+    rects are the same obstacles as (x, y, width, height) rectangles.
+    moving holds (x, y, dx, dy) for every fixed moving obstacle,
+    random_obstacles (count, width, height) and random_moving (count,
+    speed) for the ones placed anew every game.
+    """
+
+    def __init__(self, number, name, cols, rows, wrap, spawn, mask, rects,
+                 moving=(), random_obstacles=(), random_moving=(), dense=0):
+        self.number = number
+        self.name = name
+        self.cols = cols
+        self.rows = rows
+        self.wrap = wrap
+        self.spawn = spawn
+        self.mask = mask
+        self.rects = rects
+        self.moving = list(moving)
+        self.random_obstacles = list(random_obstacles)
+        self.random_moving = list(random_moving)
+        self.dense = dense
+
+
+def levels_dir():
+    """The directory with the level files, next to this module or in the app bundle."""
+    base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+    path = os.path.join(base_path, 'levels')
+    if not os.path.isdir(path):
+        path = os.path.abspath('levels')
+    return path
+
+
+def level_path(number):
+    return os.path.join(levels_dir(), f'{number}{LEVEL_EXTENSION}')
+
+
+def level_numbers():
+    """The numbers of all level files, in order."""
+    try:
+        names = os.listdir(levels_dir())
+    except OSError:
+        return ()
+    return tuple(sorted(int(match.group(1)) for match in map(_FILE_NAME.match, names) if match))
+
+
+def level_name(number):
+    """The name of a level, read from the top of its file without loading the rest."""
+    with open(level_path(number), encoding='utf-8') as f:
+        for line in f:
+            key, _, value = line.split('#', 1)[0].partition(':')
+            if key.strip() == 'name':
+                return value.strip()
+            if key.strip() == 'map':
+                break
+    return f'Level {number}'
+
+
+def load_level(number, cols, rows):
+    """Level number compiled for its board, or for a cols x rows board if it has no size of its own."""
+    level = _levels.get((number, cols, rows))
+    if level is None:
+        level = _levels[(number, cols, rows)] = read_level(level_path(number), number, cols, rows, _cache_dir)
+    return level
+
+
+def read_level(path, number, cols, rows, cache_dir=None):
+    """The level file at path compiled, from cache_dir if it was compiled there before."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    cache_path = None
+    if cache_dir:
+        digest = hashlib.sha256(data).hexdigest()
+        cache_path = os.path.join(cache_dir, f'{digest}-{cols}x{rows}{COMPILED_EXTENSION}')
+        level = _load_compiled(cache_path, number)
+        if level is not None:
+            return level
+    level = compile_level(parse_level(data.decode('utf-8'), path), number, cols, rows)
+    if cache_path:
+        _save_compiled(cache_path, level)
+    return level
+
+
+def use_disk_cache(directory):
+    """Keep compiled levels in files in directory as well (None to stop)."""
+    global _cache_dir
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    _cache_dir = directory
+
+
+def parse_level(text, path='<level>'):
+    """The settings of a level file as a dict."""
+    settings = {'name': '', 'topology': 'wrap', 'size': None, 'spawn': None, 'obstacle': [],
+                'moving': [], 'random': [], 'random_moving': [], 'dense': 0, 'map': None}
+    counts = {'size': 2, 'spawn': 2, 'obstacle': 4, 'moving': 4, 'random': 3, 'random_moving': 2, 'dense': 1}
+    lines = text.splitlines()
+    for line_number, line in enumerate(lines, 1):
+        content = line.split('#', 1)[0].strip()
+        if not content:
+            continue
+        key, colon, value = content.partition(':')
+        key = key.strip()
+        value = value.strip()
+        if not colon or key not in settings:
+            raise LevelError(f"{path}:{line_number}: expected one of {', '.join(settings)} and a ':'")
+        if key == 'map':
+            rows = [row.rstrip() for row in lines[line_number:]]
+            while rows and not rows[-1]:
+                rows.pop()
+            settings['map'] = rows
+            break
+        if key == 'name':
+            settings['name'] = value
+        elif key == 'topology':
+            if value not in TOPOLOGIES:
+                raise LevelError(f"{path}:{line_number}: topology must be one of {', '.join(TOPOLOGIES)}")
+            settings['topology'] = value
+        else:
+            try:
+                numbers = [float(part) if key in ('moving', 'random_moving') else int(part)
+                           for part in value.split()]
+            except ValueError:
+                raise LevelError(f"{path}:{line_number}: {key} takes numbers") from None
+            if len(numbers) != counts[key]:
+                raise LevelError(f"{path}:{line_number}: {key} takes {counts[key]} numbers")
+            # Only velocities may be negative
+            if any(number < 0 for number in (numbers[:2] if key == 'moving' else numbers)):
+                raise LevelError(f"{path}:{line_number}: {key} takes no negative numbers here")
+            if key in ('moving', 'random_moving') and not all((2 * n).is_integer() for n in numbers):
+                raise LevelError(f"{path}:{line_number}: moving obstacles sit and move on half cells")
+            if key in ('size', 'spawn', 'dense'):
+                settings[key] = numbers if len(numbers) > 1 else numbers[0]
+            else:
+                settings[key].append(tuple(numbers))
+    return settings
+
+
+def compile_level(settings, number, cols, rows):
+    """A Level from parsed settings, for a cols x rows board unless it has a size of its own."""
+    name = settings['name'] or f'Level {number}'
+    board_map = settings['map']
+    if settings['size']:
+        cols, rows = settings['size']
+    elif board_map:
+        cols, rows = max(len(row) for row in board_map), len(board_map)
+    if cols <= 0 or rows <= 0:
+        raise LevelError(f"{name}: the board has no cells")
+    wrap = settings['topology'] == 'wrap'
+
+    mask = bytearray(cols * rows)
+    spawn = settings['spawn']
+    if board_map:
+        if len(board_map) > rows or max(len(row) for row in board_map) > cols:
+            raise LevelError(f"{name}: the map is larger than the {cols}x{rows} board")
+        for y, row in enumerate(board_map):
+            row = row.encode('ascii', 'replace')  # A byte per cell
+            mask[y * cols:y * cols + len(row)] = row.translate(_MAP_CELLS)
+            if b'S' in row:
+                spawn = (row.index(b'S'), y)
+    for x, y, width, height in settings['obstacle']:
+        if width <= 0 or height <= 0 or x + width > cols or y + height > rows:
+            raise LevelError(f"{name}: obstacle {x} {y} {width} {height} is not on the board")
+        for row in range(y, y + height):
+            mask[row * cols + x:row * cols + x + width] = b'\x01' * width
+    if spawn is None:
+        spawn = (cols // 2, rows // 2)
+    spawn = tuple(spawn)
+    if not (0 <= spawn[0] < cols and 0 <= spawn[1] < rows) or mask[spawn[1] * cols + spawn[0]]:
+        raise LevelError(f"{name}: the spawn point {spawn} is not a free cell")
+    if not all_connected(mask, cols, rows, wrap):
+        raise LevelError(f"{name}: some free cells can't be reached from the others")
+    for x, y, _, _ in settings['moving']:
+        if x + MOVING_SIZE > cols or y + MOVING_SIZE > rows:
+            raise LevelError(f"{name}: moving obstacle at {x:g} {y:g} is not on the board")
+
+    random_moving = [(int(count), speed) for count, speed in settings['random_moving']]
+    return Level(number, name, cols, rows, wrap, spawn, mask, mask_rects(mask, cols, rows),
+                 settings['moving'], settings['random'], random_moving, settings['dense'])
+
+
+def mask_rects(mask, cols, rows):
+    """The cells set in mask as rectangles: runs in a row, merged with the same runs below them."""
+    rects = []
+    open_runs = {}  # (x, width) -> the row the rectangle started on
+    for y in range(rows):
+        row = bytes(mask[y * cols:(y + 1) * cols])
+        runs = {(match.start(), match.end() - match.start()) for match in _RUNS.finditer(row)}
+        for run in list(open_runs):
+            if run not in runs:
+                x, width = run
+                top = open_runs.pop(run)
+                rects.append((x, top, width, y - top))
+        for run in runs:
+            open_runs.setdefault(run, y)
+    for (x, width), top in open_runs.items():
+        rects.append((x, top, width, rows - top))
+    rects.sort(key=lambda rect: (rect[1], rect[0]))
+    return rects
+
+
+def pack_mask(mask):
+    """A byte-per-cell mask as bits, cell 0 in the lowest bit of the first byte."""
+    digits = bytes(mask).translate(_BITS)[::-1]
+    return int(digits or b'0', 2).to_bytes((len(mask) + 7) // 8, 'little')
+
+
+def unpack_mask(data, cells):
+    digits = format(int.from_bytes(data, 'little'), f'0{cells}b').encode('ascii')
+    return bytearray(digits[::-1].translate(_UNBITS))
+
+
+def _encode(level):
+    """A compiled level as bytes: header, name, the numbers as int32s, packed mask."""
+    numbers = [level.cols, level.rows, level.wrap, level.spawn[0], level.spawn[1], level.dense,
+               len(level.rects), len(level.moving), len(level.random_obstacles), len(level.random_moving)]
+    for rect in level.rects:
+        numbers.extend(rect)
+    for mobstacle in level.moving:
+        numbers.extend(int(2 * value) for value in mobstacle)  # In half cells
+    for random_obstacles in level.random_obstacles:
+        numbers.extend(random_obstacles)
+    for count, speed in level.random_moving:
+        numbers.extend((count, int(2 * speed)))
+    numbers = array('i', numbers)
+    if sys.byteorder == 'big':
+        numbers.byteswap()
+    name = level.name.encode('utf-8')
+    header = COMPILED_HEADER.pack(COMPILED_MAGIC, COMPILED_VERSION, len(name), len(numbers))
+    return header + name + numbers.tobytes() + pack_mask(level.mask)
+
+
+def _decode(data, number):
+    magic, version, name_size, count = COMPILED_HEADER.unpack_from(data)
+    if magic != COMPILED_MAGIC or version != COMPILED_VERSION:
+        raise ValueError("not a compiled level of this version")
+    pos = COMPILED_HEADER.size
+    name = data[pos:pos + name_size].decode('utf-8')
+    pos += name_size
+    numbers = array('i')
+    numbers.frombytes(data[pos:pos + 4 * count])
+    if sys.byteorder == 'big':
+        numbers.byteswap()
+    pos += 4 * count
+    cols, rows, wrap, spawn_x, spawn_y, dense, rects, moving, random_obstacles, random_moving = numbers[:10]
+    idx = 10
+
+    def take(count, size):
+        nonlocal idx
+        items = [tuple(numbers[idx + at:idx + at + size]) for at in range(0, count * size, size)]
+        idx += count * size
+        return items
+
+    rects = take(rects, 4)
+    moving = [tuple(value / 2 for value in mobstacle) for mobstacle in take(moving, 4)]
+    random_obstacles = take(random_obstacles, 3)
+    random_moving = [(count, speed / 2) for count, speed in take(random_moving, 2)]
+    mask = unpack_mask(data[pos:], cols * rows)
+    return Level(number, name, cols, rows, bool(wrap), (spawn_x, spawn_y), mask, rects,
+                 moving, random_obstacles, random_moving, dense)
+
+
+def _load_compiled(path, number):
+    try:
+        with open(path, 'rb') as f:
+            return _decode(f.read(), number)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def _save_compiled(path, level):
+    try:
+        # Written under a temporary name first, so no half-written level is left behind
+        with open(path + '.tmp', 'wb') as f:
+            f.write(_encode(level))
+        os.replace(path + '.tmp', path)
+    except OSError as error:
+        print(f"Could not save compiled level: {error}", file=sys.stderr)
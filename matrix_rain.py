@@ -0,0 +1,160 @@
+"""Matrix-style falling glyph rain for the start screen.
+
+Every glyph is rendered once per shade of green into a GlyphSheet, so a
+frame is nothing but one Surface.blits() call from that sheet. The state of
+the rain lives in NumPy arrays, one entry per column (where its bright head
+is, how fast it falls, how long its trail is) plus a grid with the glyph
+shown in every cell, and the cells to draw each frame are worked out for
+all columns at once.
+
+MatrixRain keeps to a per-frame time budget: when drawing takes longer than
+that on average it thins out the rain by switching columns off, and turns
+them back on when there is time to spare.
+
+NumPy is optional. Without it `available` is False and the start screen
+goes without the rain.
+"""
+import time
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the installation
+    np = None
+
+available = np is not None
+
+GLYPHS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ@#$%&*+=<>?'
+SHADES = 12  # Brightness steps from the head to the end of a trail
+HEAD_COLOR = (200, 255, 200)
+TRAIL_COLOR = (0, 230, 0)
+TAIL_COLOR = (0, 40, 0)
+
+MIN_SPEED = 8.0   # Cells per second
+MAX_SPEED = 25.0
+MIN_TRAIL = 6     # Cells
+MAX_TRAIL = 24
+GLYPH_CHANGES = 0.02  # Share of the grid that changes glyph per second
+
+FRAME_BUDGET = 0.006  # Seconds per frame for update() and draw() together
+MIN_DENSITY = 0.25    # Never switch off more than this share of columns
+BUDGET_SMOOTHING = 0.1
+
+
+def shade_color(shade):
+    """Color of shade 0 (the head) to SHADES - 1 (the faintest trail)."""
+    if shade == 0:
+        return HEAD_COLOR
+    fraction = (shade - 1) / (SHADES - 2)
+    return tuple(round(a + (b - a) * fraction) for a, b in zip(TRAIL_COLOR, TAIL_COLOR))
+
+
+class GlyphSheet:
+    """Every glyph in every shade, one row per shade, on an opaque black sheet."""
+
+    def __init__(self, font, glyphs=GLYPHS):
+        self.glyphs = glyphs
+        self.width = max(font.size(char)[0] for char in glyphs)
+        self.height = font.get_linesize()
+        self.surface = pygame.Surface((self.width * len(glyphs), self.height * SHADES)).convert()
+        self.surface.fill((0, 0, 0))
+        for shade in range(SHADES):
+            color = shade_color(shade)
+            for idx, char in enumerate(glyphs):
+                glyph = font.render(char, True, color, (0, 0, 0))
+                self.surface.blit(glyph, (idx * self.width, shade * self.height))
+
+
+class MatrixRain:
+    """Falling glyph columns filling a surface of the given size."""
+
+    def __init__(self, size, font, seed=None, budget=FRAME_BUDGET):
+        if not available:
+            raise ImportError("MatrixRain needs NumPy")
+        self.sheet = GlyphSheet(font)
+        self.cols = size[0] // self.sheet.width + 1
+        self.rows = size[1] // self.sheet.height + 1
+        self.budget = budget
+        self.rng = np.random.default_rng(seed)
+
+        cols = self.cols
+        self.head = self.rng.uniform(-self.rows, self.rows, cols)  # Row of the head, fractional
+        self.speed = self.rng.uniform(MIN_SPEED, MAX_SPEED, cols)
+        self.trail = self.rng.integers(MIN_TRAIL, MAX_TRAIL + 1, cols)
+        self.glyphs = self.rng.integers(0, len(self.sheet.glyphs), (self.rows, cols))
+
+        # Columns currently drawn, switched off and on to keep to the budget
+        self.active = np.ones(cols, dtype=bool)
+        self.density = 1.0
+        self.frame_time = 0.0  # Spent on the current frame so far
+        self.average = None    # Smoothed time per frame
+
+        # Precomputed per-cell values used by draw()
+        self.offsets = np.arange(MAX_TRAIL)[:, None]  # Distance from the head
+        self.x = np.arange(cols) * self.sheet.width
+
+    def update(self, dt):
+        """Move the rain on by dt seconds."""
+        start = time.perf_counter()
+        rng = self.rng
+        self.head += self.speed * dt
+
+        # Columns whose trail has left the bottom start again above the top
+        done = self.head - self.trail > self.rows
+        count = int(done.sum())
+        if count:
+            self.head[done] = -rng.uniform(0, self.rows / 2, count)
+            self.speed[done] = rng.uniform(MIN_SPEED, MAX_SPEED, count)
+            self.trail[done] = rng.integers(MIN_TRAIL, MAX_TRAIL + 1, count)
+
+        changes = rng.poisson(GLYPH_CHANGES * self.glyphs.size * dt)
+        if changes:
+            rows = rng.integers(0, self.rows, changes)
+            cols = rng.integers(0, self.cols, changes)
+            self.glyphs[rows, cols] = rng.integers(0, len(self.sheet.glyphs), changes)
+        self.frame_time += time.perf_counter() - start
+
+    def blits(self):
+        """The blits() entries for one frame."""
+        rows = np.floor(self.head).astype(np.int64) - self.offsets  # (MAX_TRAIL, cols)
+        visible = (rows >= 0) & (rows < self.rows) & (self.offsets < self.trail) & self.active
+        offset, col = np.nonzero(visible)
+        row = rows[offset, col]
+        shade = np.minimum(offset * SHADES // self.trail[col], SHADES - 1)
+
+        sheet = self.sheet
+        width, height = sheet.width, sheet.height
+        surface = sheet.surface
+        xs = self.x[col].tolist()
+        ys = (row * height).tolist()
+        area_xs = (self.glyphs[row, col] * width).tolist()
+        area_ys = (shade * height).tolist()
+        return [(surface, (x, y), (ax, ay, width, height))
+                for x, y, ax, ay in zip(xs, ys, area_xs, area_ys)]
+
+    def draw(self, surface):
+        """Clear surface to black and draw the rain on it."""
+        start = time.perf_counter()
+        surface.fill((0, 0, 0))
+        surface.blits(self.blits(), doreturn=False)
+        self.frame_time += time.perf_counter() - start
+        self._keep_budget()
+
+    def _keep_budget(self):
+        """Thin out or fill up the rain depending on the recent frame times."""
+        frame_time, self.frame_time = self.frame_time, 0.0
+        if self.budget is None:
+            return
+        if self.average is None:
+            self.average = frame_time
+        self.average += (frame_time - self.average) * BUDGET_SMOOTHING
+        if self.average > self.budget and self.density > MIN_DENSITY:
+            self.density = max(MIN_DENSITY, self.density - 0.05)
+        elif self.average < self.budget / 2 and self.density < 1.0:
+            self.density = min(1.0, self.density + 0.05)
+        else:
+            return
+        # Every nth column stays on, spread evenly over the screen
+        keep = np.arange(self.cols) * self.density
+        self.active = np.floor(keep) != np.floor(keep - self.density)
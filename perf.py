@@ -0,0 +1,211 @@
+"""Performance measurement helpers for Cat-a-Pillar.
+
+CpuMeter records how much process CPU time each screen uses relative to the
+wall time it was shown, so idle menus can be checked to really be idle. Set
+CATAPILLAR_CPU_STATS=1 to print the numbers when the game exits.
+
+FrameProfiler splits every pass of the main loop into spans (drawing,
+display.update(), waiting for the next frame, event handling, simulation)
+and keeps the last few seconds of them for the in-game HUD that F3 toggles.
+With CATAPILLAR_TRACE=<file> every frame is also recorded and written as
+Chrome trace-event JSON when the game exits, to be opened in
+chrome://tracing or https://ui.perfetto.dev. While neither is on, the loop
+skips the profiler entirely.
+"""
+import atexit
+import json
+import os
+import time
+from collections import deque
+
+import pygame
+
+from text import render_text
+
+
+class CpuMeter:
+    """CPU time per screen as a share of the time the screen was shown.
+
+    run_scenes() enters a screen when its scene becomes active and leaves it
+    on the switch. Screens can be nested; time is always booked to the
+    innermost screen only.
+    """
+
+    def __init__(self):
+        self.totals = {}  # screen -> [cpu seconds, wall seconds]
+        self.stack = []
+        self.mark = None
+
+    def _book(self):
+        cpu, wall = time.process_time(), time.perf_counter()
+        if self.stack:
+            totals = self.totals.setdefault(self.stack[-1], [0.0, 0.0])
+            totals[0] += cpu - self.mark[0]
+            totals[1] += wall - self.mark[1]
+        self.mark = (cpu, wall)
+
+    def enter(self, screen):
+        self._book()
+        self.stack.append(screen)
+
+    def leave(self):
+        self._book()
+        self.stack.pop()
+
+    def usage(self):
+        """Return {screen: (cpu percent of one core, seconds shown)}."""
+        self._book()
+        return {screen: (100.0 * cpu / wall if wall else 0.0, wall)
+                for screen, (cpu, wall) in self.totals.items()}
+
+    def report(self):
+        lines = [f"{'screen':<24} {'cpu %':>7} {'shown s':>9}"]
+        for screen, (percent, wall) in sorted(self.usage().items()):
+            lines.append(f"{screen:<24} {percent:>7.1f} {wall:>9.1f}")
+        return '\n'.join(lines)
+
+
+cpu_meter = CpuMeter()
+
+if os.environ.get('CATAPILLAR_CPU_STATS'):
+    atexit.register(lambda: print(cpu_meter.report()))
+
+
+# Spans of one pass of the main loop, in the order they happen
+FRAME_SPANS = ('draw', 'display', 'wait', 'events', 'update')
+FRAME_WINDOW = 240         # Frames kept for the HUD percentiles
+MAX_TRACE_EVENTS = 2000000  # Beyond this the trace stops growing
+
+HUD_REFRESH = 0.25  # Seconds between HUD text updates
+HUD_MARGIN = 4
+HUD_BACKGROUND = (0, 0, 0)
+HUD_COLOR = (0, 255, 0)
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class FrameProfiler:
+    """Per-frame timings of the main loop, split into consecutive spans.
+
+    run_scenes() calls begin_frame() at the top of the loop, span() at the
+    end of every phase and end_frame() at the bottom; each span lasts from
+    the previous call to this one. It only does so while `active`.
+    """
+
+    def __init__(self, window=FRAME_WINDOW):
+        self.enabled = False  # HUD shown
+        self.frames = deque(maxlen=window)  # (frame seconds, {span: seconds})
+        self.trace = None  # Trace events while tracing, else None
+        self.origin = time.perf_counter()
+        self.frame_start = self.mark = 0.0
+        self.spans = {}
+
+    @property
+    def active(self):
+        return self.enabled or self.trace is not None
+
+    def start_trace(self):
+        self.trace = []
+
+    def begin_frame(self):
+        self.frame_start = self.mark = time.perf_counter()
+        self.spans = {}
+
+    def span(self, name):
+        now = time.perf_counter()
+        self.spans[name] = self.spans.get(name, 0.0) + now - self.mark
+        if self.trace is not None:
+            self._trace_event(name, self.mark, now)
+        self.mark = now
+
+    def end_frame(self, scene_name):
+        self.frames.append((self.mark - self.frame_start, self.spans))
+        if self.trace is not None:
+            self._trace_event(scene_name, self.frame_start, self.mark, 'frame')
+
+    def _trace_event(self, name, start, end, category='span'):
+        if len(self.trace) < MAX_TRACE_EVENTS:
+            self.trace.append({
+                'name': name, 'cat': category, 'ph': 'X', 'pid': 1, 'tid': 1,
+                'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6,
+            })
+
+    def fps(self):
+        total = sum(frame for frame, _ in self.frames)
+        return len(self.frames) / total if total else 0.0
+
+    def stats(self):
+        """Return {span: (p50, p95, p99)} in seconds over the recent frames.
+
+        The 'frame' entry is the whole pass of the loop.
+        """
+        samples = {'frame': sorted(frame for frame, _ in self.frames)}
+        for name in FRAME_SPANS:
+            samples[name] = sorted(spans.get(name, 0.0) for _, spans in self.frames)
+        return {name: tuple(percentile(values, fraction) for fraction in (0.5, 0.95, 0.99))
+                for name, values in samples.items() if values}
+
+    def write_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.trace or [], 'displayTimeUnit': 'ms'}, f)
+
+
+class PerfHud:
+    """Overlay in the top right corner with the FrameProfiler numbers.
+
+    The text is only rebuilt every HUD_REFRESH seconds; in between the same
+    surface is blitted again.
+    """
+
+    def __init__(self, profiler, font):
+        self.profiler = profiler
+        self.font = font
+        self.surface = None
+        self.updated = None
+
+    def _build(self, now, extra_lines):
+        profiler = self.profiler
+        lines = [f"FPS {profiler.fps():5.1f}"] + list(extra_lines(now))
+        lines.append(f"{'ms':<8}{'p50':>6}{'p95':>6}{'p99':>6}")
+        for name, values in profiler.stats().items():
+            lines.append(f"{name:<8}" + ''.join(f"{value * 1e3:6.2f}" for value in values))
+        rendered = [render_text(self.font, line, HUD_COLOR) for line in lines]
+        width = max(text.get_width() for text in rendered) + 2 * HUD_MARGIN
+        height = sum(text.get_height() for text in rendered) + 2 * HUD_MARGIN
+        if self.surface is not None:
+            # Never shrink while shown, so the new box covers the old one
+            width = max(width, self.surface.get_width())
+            height = max(height, self.surface.get_height())
+        self.surface = pygame.Surface((width, height)).convert()
+        self.surface.fill(HUD_BACKGROUND)
+        y = HUD_MARGIN
+        for text in rendered:
+            self.surface.blit(text, (HUD_MARGIN, y))
+            y += text.get_height()
+
+    def draw(self, surface, now, extra_lines=lambda now: ()):
+        """Draw the HUD onto surface and return the rect it covers.
+
+        extra_lines(now) gives more lines to show below the FPS; it is only
+        called when the text is rebuilt.
+        """
+        if self.updated is None or now - self.updated >= HUD_REFRESH:
+            self._build(now, extra_lines)
+            self.updated = now
+        rect = self.surface.get_rect(topright=(surface.get_width(), 0))
+        surface.blit(self.surface, rect)
+        return rect
+
+    def hide(self):
+        self.surface = None
+        self.updated = None
+
+
+frame_profiler = FrameProfiler()
+
+if os.environ.get('CATAPILLAR_TRACE'):
+    frame_profiler.start_trace()
+    atexit.register(frame_profiler.write_trace, os.environ['CATAPILLAR_TRACE'])
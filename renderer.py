@@ -0,0 +1,728 @@
+"""Board rendering for Cat-a-Pillar.
+
+BoardRenderer draws a GameState onto the screen. Static obstacles are
+pre-rendered once into a background layer and the snake lives on its own
+persistent body layer, which is only patched around the cells that changed
+since the last frame (new head, old head, old and new tail, moving growth
+bulges). Each frame only the rectangles that changed are recomposed from the
+layers and passed to pygame.display.update(), so the cost of a frame depends
+on what moved and not on the board size or the snake's length.
+
+Boards bigger than the screen are drawn by ScrollingRenderer instead, which
+only looks at the cells in view of a camera that follows the head and
+shows the whole board on a minimap.
+"""
+from array import array
+from collections import deque
+
+import pygame
+
+from text import render_text
+
+# Colors
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+RED = (200, 0, 0)
+GREEN = (0, 200, 0)
+YELLOW = (200, 200, 0)
+DARK_GREY = (30, 30, 30)
+LIGHT_GREY = (200, 200, 200)
+
+# Thickened segments stick out this many pixels on every side
+BULGE = 2
+
+
+# Placeholder color for the transparent parts of sprites
+SPRITE_KEY = (255, 0, 255)
+
+SPRITE_NAMES = ('body', 'thick', 'head', 'tail', 'food', 'extra', 'obstacle')
+
+
+class SpriteAtlas:
+    """Every board shape drawn once into one converted surface.
+
+    Each sprite sits in a frame one cell plus BULGE pixels on every side, so
+    all of them, thickened segments included, are placed by blitting their
+    frame to the cell's top left corner minus BULGE. Transparent pixels (the
+    rounded corners, around the food) use a color key.
+    """
+
+    def __init__(self, block):
+        self.block = block
+        self.frame = block + 2 * BULGE
+        self.surface = pygame.Surface((self.frame * len(SPRITE_NAMES), self.frame)).convert()
+        self.surface.fill(SPRITE_KEY)
+        self.rects = {}
+        for idx, name in enumerate(SPRITE_NAMES):
+            self.rects[name] = pygame.Rect(idx * self.frame, 0, self.frame, self.frame)
+
+        # The cell inside each frame
+        cell = {name: pygame.Rect(rect.x + BULGE, rect.y + BULGE, block, block)
+                for name, rect in self.rects.items()}
+        surface = self.surface
+        pygame.draw.rect(surface, WHITE, cell['body'])
+        # Thickened segment
+        pygame.draw.rect(surface, YELLOW, self.rects['thick'])
+        pygame.draw.rect(surface, RED, cell['head'], border_radius=5)
+        pygame.draw.rect(surface, WHITE, cell['tail'], border_radius=5)
+        pygame.draw.circle(surface, GREEN, (cell['food'].x + block // 2, cell['food'].y + block // 2), block // 2)
+        pygame.draw.circle(surface, YELLOW, (cell['extra'].x + block // 2, cell['extra'].y + block // 2), block // 2)
+        pygame.draw.rect(surface, LIGHT_GREY, cell['obstacle'])
+        # Run-length encoded color key: transparent runs are skipped outright
+        surface.set_colorkey(SPRITE_KEY, pygame.RLEACCEL)
+
+    def blit_at(self, name, x, y, clip=None):
+        """A blits() entry drawing sprite name with its cell at pixel (x, y).
+
+        With clip, only the part inside that rectangle is drawn, and None is
+        returned when nothing of the sprite is inside.
+        """
+        area = self.rects[name]
+        dest = pygame.Rect(x - BULGE, y - BULGE, self.frame, self.frame)
+        if clip is None:
+            return (self.surface, dest, area)
+        part = dest.clip(clip)
+        if not part:
+            return None
+        return (self.surface, part, pygame.Rect(area.x + part.x - dest.x, area.y + part.y - dest.y, part.w, part.h))
+
+    def cell_blit(self, name, cell, clip=None):
+        block = self.block
+        return self.blit_at(name, cell[0] * block, cell[1] * block, clip)
+
+    def tile_blits(self, rect, clip=None):
+        """Entries filling a pixel rect (obstacle) with obstacle tiles."""
+        block = self.block
+        blits = []
+        for y in range(rect.top, rect.bottom, block):
+            for x in range(rect.left, rect.right, block):
+                entry = self.blit_at('obstacle', x, y, clip)
+                if entry is not None:
+                    blits.append(entry)
+        return blits
+
+
+def thick_cells(snake, bulge_indices):
+    """Cells drawn as yellow thickened segments."""
+    return {snake[index] for index in bulge_indices}
+
+
+def snake_blits(atlas, snake, bulge_indices):
+    """blits() entries for the whole snake, tail first."""
+    # One flag per segment, so the body is resolved in a single pass
+    thick = bytearray(len(snake))
+    for index in bulge_indices:
+        thick[index] = 1
+    surface = atlas.surface
+    areas = (atlas.rects['body'], atlas.rects['thick'])
+    block = atlas.block
+    blits = [(surface, (x * block - BULGE, y * block - BULGE), areas[is_thick])
+             for (x, y), is_thick in zip(snake, thick)]
+
+    # The head and the tail are drawn again on top, rounded
+    blits.append(atlas.cell_blit('head', snake[-1]))
+    if len(snake) > 1:
+        blits.append(atlas.cell_blit('tail', snake[0]))
+    return blits
+
+
+def draw_snake(surface, atlas, snake, bulge_indices):
+    surface.blits(snake_blits(atlas, snake, bulge_indices), doreturn=False)
+
+
+class BoardRenderer:
+    """Draws one game onto the screen, either fully or by dirty rectangles.
+
+    draw() returns the list of rectangles that changed, ready for
+    pygame.display.update(). Call invalidate() whenever something else has
+    drawn over the screen (pause screen etc.) to force a full frame.
+
+    draw() takes how far (0 to 1) the game is between two ticks; when that
+    is above 0 the head is additionally drawn that far towards its next cell
+    for smooth sub-cell movement.
+    """
+
+    def __init__(self, screen, state, font, snake_block, dirty=True):
+        self.screen = screen
+        self.state = state
+        self.font = font
+        self.block = snake_block
+        self.dirty = dirty
+        self.screen_rect = screen.get_rect()
+        self.atlas = SpriteAtlas(snake_block)
+
+        # Background layer: static obstacles, drawn once per level
+        self.background = pygame.Surface(self.screen_rect.size).convert()
+        self.background.fill(BLACK)
+        for obstacle in state.obstacles:
+            self.background.blits(self.atlas.tile_blits(self.board_rect(obstacle)), doreturn=False)
+
+        # Body layer: the snake, black is transparent
+        self.body_layer = pygame.Surface(self.screen_rect.size).convert()
+        self.body_layer.set_colorkey(BLACK)
+
+        # What was on screen last frame, to work out what changed
+        self.moving_rects = []
+        self.food_cell = None
+        self.extra_cell = None
+        self.score_surface = None
+        self.score_rect = pygame.Rect(10, 10, 0, 0)
+        self.drawn_score = None
+        self.head_overlay = None
+        self.full_redraw = True
+
+    def board_rect(self, rect):
+        x, y, width, height = rect
+        block = self.block
+        return pygame.Rect(x * block, y * block, width * block, height * block)
+
+    def cell_rect(self, cell):
+        return pygame.Rect(cell[0] * self.block, cell[1] * self.block, self.block, self.block)
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    # Per-frame snapshot of everything outside the body layer
+    def _moving_rects(self):
+        return [self.board_rect((m.x, m.y, m.width, m.height)) for m in self.state.moving_obstacles]
+
+    def _food_cell(self):
+        state = self.state
+        return None if state.food_x is None else (state.food_x, state.food_y)
+
+    def _extra_food_cell(self, now):
+        state = self.state
+        if not state.extra_food_visible:
+            return None
+        # Blink frequency increases as time runs out
+        blink_frequency = max(0.1, state.extra_food_time_left() / state.extra_point_time)
+        if (now * (1 / blink_frequency)) % 2 < 1:
+            return (state.extra_food_x, state.extra_food_y)
+        return None
+
+    def _update_score(self):
+        """Re-render the score only when it changed; return the old rect or None."""
+        score = self.state.score
+        if score == self.drawn_score:
+            return None
+        old_rect = self.score_rect.copy()
+        self.drawn_score = score
+        self.score_surface = render_text(self.font, "Score: " + str(score), WHITE)
+        self.score_rect = self.score_surface.get_rect(topleft=(10, 10))
+        return old_rect
+
+    def _head_overlay_rect(self, alpha):
+        snake = self.state.snake
+        if alpha <= 0 or not snake or self.state.game_over:
+            return None
+        dx, dy = self.state.direction
+        shift = alpha * self.block
+        return self.cell_rect(snake.head).move(round(dx * shift), round(dy * shift))
+
+    def _compose(self, rect, blits):
+        """Add the blits rebuilding one screen rectangle from the layers, bottom to top.
+
+        Everything is cut to rect by hand, so the blits of all rectangles
+        can go to the screen in one Surface.blits() call.
+        """
+        atlas = self.atlas
+        blits.append((self.background, rect, rect))
+        for mrect in self.moving_rects:
+            if rect.colliderect(mrect):
+                blits.extend(atlas.tile_blits(mrect, rect))
+        for name, cell in (('food', self.food_cell), ('extra', self.extra_cell)):
+            if cell is not None:
+                entry = atlas.cell_blit(name, cell, rect)
+                if entry is not None:
+                    blits.append(entry)
+        blits.append((self.body_layer, rect, rect))
+        part = self.score_rect.clip(rect)
+        if part:
+            area = pygame.Rect(part.x - self.score_rect.x, part.y - self.score_rect.y, part.w, part.h)
+            blits.append((self.score_surface, part, area))
+
+    def _redraw_body(self):
+        snake = self.state.snake
+        self.body_layer.fill(BLACK)
+        if snake:
+            draw_snake(self.body_layer, self.atlas, snake, self.state.bulge_indices())
+        self.drawn_cells = deque(snake)
+        self.drawn_pushed = snake.pushed
+        self.drawn_thick = thick_cells(snake, self.state.bulge_indices())
+
+    def _patch_body_cell(self, cell, thick, blits):
+        """Clear the body layer around one cell and add the blits redrawing it.
+
+        The blits are cut to the cleared region and come in the same order
+        as in draw_snake(). Regions of neighbouring cells overlap, but each
+        one gets everything that reaches into it, so the patches can be
+        applied in any order.
+        """
+        snake = self.state.snake
+        atlas = self.atlas
+        region = self.cell_rect(cell).inflate(2 * BULGE, 2 * BULGE)
+        # Clipped first: fill() shifts rects hanging over the top or left edge
+        self.body_layer.fill(BLACK, region.clip(self.screen_rect))
+
+        x, y = cell
+        neighbours = []
+        for ny in (y - 1, y, y + 1):
+            for nx in (x - 1, x, x + 1):
+                seq = snake.occupied.get((nx, ny))
+                if seq is not None:
+                    neighbours.append((seq, (nx, ny)))
+        neighbours.sort()
+        sprites = [('thick' if segment in thick else 'body', segment) for _, segment in neighbours]
+        if neighbours:
+            head, tail = snake.head, snake.tail
+            if abs(head[0] - x) <= 1 and abs(head[1] - y) <= 1:
+                sprites.append(('head', head))
+            if len(snake) > 1 and abs(tail[0] - x) <= 1 and abs(tail[1] - y) <= 1:
+                sprites.append(('tail', tail))
+        for name, segment in sprites:
+            entry = atlas.cell_blit(name, segment, region)
+            if entry is not None:
+                blits.append(entry)
+        return region
+
+    def _sync_body(self):
+        """Bring the body layer up to date; return the screen rects touched."""
+        snake = self.state.snake
+        pushed = snake.pushed - self.drawn_pushed
+        if pushed > len(snake):
+            # Many ticks since the last frame: cheaper to start over
+            self._redraw_body()
+            return [self.screen_rect]
+
+        drawn = self.drawn_cells
+        changed = set()
+        if drawn:
+            changed.add(drawn[0])   # Old tail
+            changed.add(drawn[-1])  # Old head
+        for offset in range(len(snake) - pushed, len(snake)):
+            drawn.append(snake[offset])
+            changed.add(snake[offset])
+        while len(drawn) > len(snake):
+            changed.add(drawn.popleft())
+        if snake:
+            changed.add(snake.tail)
+        thick = thick_cells(snake, self.state.bulge_indices())
+        changed |= thick ^ self.drawn_thick
+        self.drawn_thick = thick
+        self.drawn_pushed = snake.pushed
+        blits = []
+        regions = [self._patch_body_cell(cell, thick, blits) for cell in changed]
+        self.body_layer.blits(blits, doreturn=False)
+        return regions
+
+    def draw(self, now, alpha=0.0):
+        """Draw the current state and return the rectangles that changed."""
+        old_overlay = self.head_overlay
+        self.head_overlay = self._head_overlay_rect(alpha)
+        old_moving = self.moving_rects
+        old_food = self.food_cell
+        old_extra = self.extra_cell
+        self.moving_rects = self._moving_rects()
+        self.food_cell = self._food_cell()
+        self.extra_cell = self._extra_food_cell(now)
+        old_score_rect = self._update_score()
+
+        blits = []
+        if self.full_redraw or not self.dirty:
+            self.full_redraw = False
+            self._redraw_body()
+            self._compose(self.screen_rect, blits)
+            self._draw_head_overlay(blits)
+            self.screen.blits(blits, doreturn=False)
+            return [self.screen_rect]
+
+        dirty_rects = self._sync_body()
+        for old, new in zip(old_moving, self.moving_rects):
+            if old != new:
+                dirty_rects.append(old.union(new))
+        if old_food != self.food_cell:
+            dirty_rects.extend(self.cell_rect(cell) for cell in (old_food, self.food_cell) if cell is not None)
+        if old_extra != self.extra_cell:
+            dirty_rects.extend(self.cell_rect(cell) for cell in (old_extra, self.extra_cell) if cell is not None)
+        if old_score_rect is not None:
+            dirty_rects.append(old_score_rect.union(self.score_rect))
+        dirty_rects.extend(rect for rect in (old_overlay, self.head_overlay) if rect is not None)
+
+        for rect in dirty_rects:
+            self._compose(rect, blits)
+        self._draw_head_overlay(blits)
+        self.screen.blits(blits, doreturn=False)
+        return dirty_rects
+
+    def _draw_head_overlay(self, blits):
+        if self.head_overlay is not None:
+            blits.append(self.atlas.blit_at('head', self.head_overlay.x, self.head_overlay.y))
+
+
+# Minimap of boards bigger than the screen: longest side in pixels, and
+# the gap to the screen corner
+MINIMAP_SIZE = 150
+MINIMAP_MARGIN = 10
+
+
+class Minimap:
+    """The whole board shrunk down to at most size pixels a side.
+
+    Static obstacles are scaled down into the base image once. The snake
+    has a layer of its own with a count of segments per minimap pixel; only
+    the cells pushed and popped since the last frame change the counts, and
+    a pixel is only drawn or cleared when its count goes from or to 0, so
+    keeping it up to date doesn't depend on the snake's length.
+    """
+
+    def __init__(self, state, size=MINIMAP_SIZE):
+        self.state = state
+        cols, rows = state.cols, state.rows
+        scale = min(size / cols, size / rows)
+        self.width, self.height = max(1, round(cols * scale)), max(1, round(rows * scale))
+
+        mask = pygame.image.frombuffer(bytes(state.obstacle_grid.static), (cols, rows), 'P')
+        mask.set_palette([BLACK, LIGHT_GREY])
+        mask = mask.convert(24)
+        if scale < 1:
+            # Averaged, so obstacles smaller than a pixel still show up dimmed
+            self.base = pygame.transform.smoothscale(mask, (self.width, self.height)).convert()
+        else:
+            self.base = pygame.transform.scale(mask, (self.width, self.height)).convert()
+
+        self.snake_layer = pygame.Surface((self.width, self.height)).convert()
+        self.snake_layer.set_colorkey(BLACK)
+        self.counts = array('I', [0]) * (self.width * self.height)
+        self.drawn_cells = None
+        self.drawn_pushed = 0
+
+    def pixel(self, cell):
+        return (cell[0] * self.width // self.state.cols, cell[1] * self.height // self.state.rows)
+
+    def _add(self, cell):
+        x, y = self.pixel(cell)
+        index = y * self.width + x
+        self.counts[index] += 1
+        if self.counts[index] == 1:
+            self.snake_layer.set_at((x, y), WHITE)
+
+    def _remove(self, cell):
+        x, y = self.pixel(cell)
+        index = y * self.width + x
+        self.counts[index] -= 1
+        if self.counts[index] == 0:
+            self.snake_layer.set_at((x, y), BLACK)
+
+    def sync(self):
+        """Bring the snake layer up to date with the cells pushed and popped since last time."""
+        snake = self.state.snake
+        pushed = snake.pushed - self.drawn_pushed
+        if self.drawn_cells is None or pushed > len(snake):
+            # Many ticks since the last frame: cheaper to start over
+            self.snake_layer.fill(BLACK)
+            self.counts = array('I', [0]) * (self.width * self.height)
+            self.drawn_cells = deque()
+            pushed = len(snake)
+        drawn = self.drawn_cells
+        for offset in range(len(snake) - pushed, len(snake)):
+            drawn.append(snake[offset])
+            self._add(snake[offset])
+        while len(drawn) > len(snake):
+            self._remove(drawn.popleft())
+        self.drawn_pushed = snake.pushed
+
+    def draw(self, surface, topleft, view):
+        """Draw the minimap at topleft, with view (a rect in board cells) outlined."""
+        state = self.state
+        self.sync()
+        left, top = topleft
+        surface.blit(self.base, topleft)
+        surface.blit(self.snake_layer, topleft)
+        for mobstacle in state.moving_obstacles:
+            x, y = self.pixel((mobstacle.x, mobstacle.y))
+            surface.fill(LIGHT_GREY, (left + x, top + y, 2, 2))
+        dots = [(RED, state.head)]
+        if state.food_x is not None:
+            dots.append((GREEN, (state.food_x, state.food_y)))
+        if state.extra_food_visible:
+            dots.append((YELLOW, (state.extra_food_x, state.extra_food_y)))
+        for color, cell in dots:
+            x, y = self.pixel(cell)
+            surface.fill(color, (left + x - 1, top + y - 1, 3, 3))
+
+        # The part of the board on screen, wrapped around the minimap edges
+        # where the board has no wall
+        x, y = self.pixel((int(view.x), int(view.y)))
+        width = max(1, view.width * self.width // state.cols)
+        height = max(1, view.height * self.height // state.rows)
+        frame = pygame.Rect(left, top, self.width, self.height)
+        clip = surface.get_clip()
+        surface.set_clip(frame)
+        for shift_x in (0, -self.width) if x + width > self.width else (0,):
+            for shift_y in (0, -self.height) if y + height > self.height else (0,):
+                pygame.draw.rect(surface, WHITE, (left + x + shift_x, top + y + shift_y, width, height), 1)
+        surface.set_clip(clip)
+        pygame.draw.rect(surface, DARK_GREY, frame.inflate(2, 2), 1)
+
+
+class ScrollingRenderer:
+    """Draws a board bigger than the screen through a camera that follows the head.
+
+    Only the cells in view are ever looked at: obstacles come from the
+    collision mask and the snake from its occupied cells, cell by cell, so
+    the cost of a frame is bounded by the number of visible cells, not the
+    board size. It is not constant: it grows with how much of the view the
+    snake covers, up to that bound. Along an axis where the board is bigger
+    than the screen the camera keeps the head in the middle, wrapping
+    around the board edges where there is no wall and stopping at them
+    where there is; along one where it fits, the board stays centred.
+    Outside the board is drawn in dark grey. A Minimap in the corner shows
+    the whole board.
+
+    Like BoardRenderer, draw() returns the rectangles that changed and
+    takes how far the game is between two ticks; the camera follows the
+    head as it slides. Frames in between ticks change nothing otherwise.
+    """
+
+    def __init__(self, screen, state, font, snake_block, minimap_size=MINIMAP_SIZE):
+        self.screen = screen
+        self.state = state
+        self.font = font
+        self.block = snake_block
+        self.screen_rect = screen.get_rect()
+        self.atlas = SpriteAtlas(snake_block)
+        self.board_size = (state.cols * snake_block, state.rows * snake_block)
+        self.view_size = self.screen_rect.size
+        # Per axis: does the camera move along it, and wrap around the board
+        self.scrolls = tuple(board > view for board, view in zip(self.board_size, self.view_size))
+        self.wraps = tuple(scrolls and not state.has_wall for scrolls in self.scrolls)
+        self.minimap = Minimap(state, minimap_size)
+        self.minimap_topleft = (self.screen_rect.right - MINIMAP_MARGIN - self.minimap.width,
+                                self.screen_rect.bottom - MINIMAP_MARGIN - self.minimap.height)
+        self.score_surface = None
+        self.drawn_score = None
+        self.drawn = None
+
+    def invalidate(self):
+        self.drawn = None
+
+    def _head_pixel(self, alpha):
+        """Board pixel at the middle of the head, slid alpha of the way to the next cell."""
+        state = self.state
+        block = self.block
+        shift = alpha * block if alpha > 0 and not state.game_over else 0
+        dx, dy = state.direction
+        return (state.x * block + block // 2 + dx * shift, state.y * block + block // 2 + dy * shift)
+
+    def camera(self, alpha=0.0):
+        """The board pixel at the top left corner of the screen."""
+        corner = []
+        for axis, center in enumerate(self._head_pixel(alpha)):
+            board, view = self.board_size[axis], self.view_size[axis]
+            if not self.scrolls[axis]:
+                corner.append((board - view) // 2)  # Negative: the board is centred
+            elif self.wraps[axis]:
+                corner.append(round(center - view / 2) % board)
+            else:
+                corner.append(min(max(round(center - view / 2), 0), board - view))
+        return tuple(corner)
+
+    def _visible(self, axis, corner):
+        """(board cell, screen pixel) of every cell in view along one axis.
+
+        Includes a cell more on either side, for the parts of thickened
+        segments sticking out of cells just off screen.
+        """
+        block = self.block
+        count = self.state.rows if axis else self.state.cols
+        cells = []
+        for cell in range(corner // block - 1, (corner + self.view_size[axis]) // block + 2):
+            board_cell = cell % count if self.wraps[axis] else cell
+            if 0 <= board_cell < count:
+                cells.append((board_cell, cell * block - corner))
+        return cells
+
+    def _screen_offsets(self, axis, pixel, size, corner):
+        """Screen coordinates along one axis of something size pixels long at board pixel pixel.
+
+        Where the board wraps around, something near its far edge can be
+        in view at both sides of the screen at once.
+        """
+        offset = pixel - corner
+        if not self.wraps[axis]:
+            return (offset,)
+        board = self.board_size[axis]
+        offset %= board
+        return (offset, offset - board) if offset > board - size else (offset,)
+
+    def _cell_blits(self, name, cell, corner, blits):
+        block = self.block
+        frame = block + 2 * BULGE
+        for x in self._screen_offsets(0, cell[0] * block - BULGE, frame, corner[0]):
+            for y in self._screen_offsets(1, cell[1] * block - BULGE, frame, corner[1]):
+                blits.append(self.atlas.blit_at(name, x + BULGE, y + BULGE))
+
+    def _extra_food_cell(self, now):
+        state = self.state
+        if not state.extra_food_visible:
+            return None
+        # Blink frequency increases as time runs out, as in BoardRenderer
+        blink_frequency = max(0.1, state.extra_food_time_left() / state.extra_point_time)
+        if (now * (1 / blink_frequency)) % 2 < 1:
+            return (state.extra_food_x, state.extra_food_y)
+        return None
+
+    def draw(self, now, alpha=0.0):
+        """Draw the view around the head and return the rectangles that changed."""
+        state = self.state
+        corner = self.camera(alpha)
+        extra_cell = self._extra_food_cell(now)
+        drawn = (corner, state.tick, extra_cell)
+        if drawn == self.drawn:
+            return []
+        self.drawn = drawn
+
+        screen = self.screen
+        block = self.block
+        atlas = self.atlas
+        columns = self._visible(0, corner[0])
+        rows = self._visible(1, corner[1])
+
+        # The board, with what lies beyond its walls in dark grey
+        screen.fill(DARK_GREY)
+        board = pygame.Rect((0, 0), self.board_size).move(-corner[0], -corner[1])
+        for axis in (0, 1):
+            if self.wraps[axis]:
+                board[axis], board[axis + 2] = 0, self.view_size[axis]
+        screen.fill(BLACK, board)
+
+        # Static obstacles from the collision mask, a run of cells at a time
+        static = state.obstacle_grid.static
+        cols = state.cols
+        for board_y, screen_y in rows:
+            row = board_y * cols
+            start = None
+            for board_x, screen_x in columns:
+                if static[row + board_x]:
+                    if start is None:
+                        start = screen_x
+                elif start is not None:
+                    screen.fill(LIGHT_GREY, (start, screen_y, screen_x - start, block))
+                    start = None
+            if start is not None:
+                screen.fill(LIGHT_GREY, (start, screen_y, columns[-1][1] + block - start, block))
+
+        blits = []
+        for mobstacle in state.moving_obstacles:
+            for x in self._screen_offsets(0, round(mobstacle.x * block), mobstacle.width * block, corner[0]):
+                for y in self._screen_offsets(1, round(mobstacle.y * block), mobstacle.height * block, corner[1]):
+                    blits.extend(atlas.tile_blits(pygame.Rect(x, y, mobstacle.width * block,
+                                                              mobstacle.height * block)))
+        if state.food_x is not None:
+            self._cell_blits('food', (state.food_x, state.food_y), corner, blits)
+        if extra_cell is not None:
+            self._cell_blits('extra', extra_cell, corner, blits)
+
+        # The segments in view, tail first as in draw_snake()
+        snake = state.snake
+        occupied = snake.occupied
+        segments = []
+        for board_y, screen_y in rows:
+            for board_x, screen_x in columns:
+                seq = occupied.get((board_x, board_y))
+                if seq is not None:
+                    segments.append((seq, (board_x, board_y), screen_x, screen_y))
+        segments.sort()
+        thick = thick_cells(snake, state.bulge_indices()) if segments else ()
+        surface = atlas.surface
+        areas = (atlas.rects['body'], atlas.rects['thick'])
+        ends = []
+        for _, cell, x, y in segments:
+            blits.append((surface, (x - BULGE, y - BULGE), areas[cell in thick]))
+            if cell == snake.head:
+                ends.append(('head', x, y))
+            elif cell == snake.tail and len(snake) > 1:
+                ends.append(('tail', x, y))
+        blits.extend(atlas.blit_at(name, x, y) for name, x, y in ends)
+        if alpha > 0 and snake and not state.game_over:
+            # The head slid towards its next cell, as in BoardRenderer
+            head_x, head_y = self._head_pixel(alpha)
+            for x in self._screen_offsets(0, round(head_x) - block // 2, block, corner[0]):
+                for y in self._screen_offsets(1, round(head_y) - block // 2, block, corner[1]):
+                    blits.append(atlas.blit_at('head', x, y))
+        screen.blits(blits, doreturn=False)
+
+        if state.score != self.drawn_score:
+            self.drawn_score = state.score
+            self.score_surface = render_text(self.font, "Score: " + str(state.score), WHITE)
+        screen.blit(self.score_surface, (10, 10))
+
+        view = pygame.Rect(corner[0] // block, corner[1] // block,
+                           self.view_size[0] // block, self.view_size[1] // block)
+        self.minimap.draw(screen, self.minimap_topleft, view)
+        return [self.screen_rect]
+
+
+class RetroRenderer:
+    """Draws a game in plain squares at a small cell size, upscaled to the screen.
+
+    The board is drawn into a low-resolution surface and scaled by a whole
+    number (nearest neighbour) straight into the screen surface, so no
+    surface is allocated per frame. A screen that isn't a whole multiple of
+    the board gets it scaled as far as a whole number goes into a surface
+    of its own, centered in black. Like BoardRenderer, draw() returns the
+    rectangles that changed; frames between ticks change nothing.
+    """
+
+    def __init__(self, screen, state, block):
+        self.screen = screen
+        self.state = state
+        self.block = block
+        self.screen_rect = screen.get_rect()
+        self.surface = pygame.Surface((state.cols * block, state.rows * block)).convert(screen)
+        width, height = self.surface.get_size()
+        scale = min(self.screen_rect.width // width, self.screen_rect.height // height)
+        if (width * scale, height * scale) == self.screen_rect.size:
+            self.scaled = None
+        else:
+            # Scaled into a surface of its own and blitted; squeezed into
+            # the screen if it doesn't even fit once
+            size = (width * scale, height * scale) if scale else self.screen_rect.size
+            self.scaled = pygame.Surface(size).convert(screen)
+            self.scaled_rect = self.scaled.get_rect(center=self.screen_rect.center)
+
+        # One plain square per color
+        self.tiles = {}
+        for color in (WHITE, GREEN, YELLOW):
+            tile = pygame.Surface((block, block)).convert(screen)
+            tile.fill(color)
+            self.tiles[color] = tile
+        self.drawn = None
+
+    def invalidate(self):
+        self.drawn = None
+
+    def draw(self, now, alpha=0.0):
+        state = self.state
+        # Everything on the board only changes on a tick
+        drawn = (state.tick, state.extra_food_visible)
+        if drawn == self.drawn:
+            return []
+        self.drawn = drawn
+
+        block = self.block
+        tiles = self.tiles
+        blits = [(tiles[WHITE], (x * block, y * block)) for x, y in state.snake]
+        if state.food_x is not None:
+            blits.append((tiles[GREEN], (state.food_x * block, state.food_y * block)))
+        if state.extra_food_visible:
+            blits.append((tiles[YELLOW], (state.extra_food_x * block, state.extra_food_y * block)))
+        self.surface.fill(BLACK)
+        self.surface.blits(blits, doreturn=False)
+        if self.scaled is None:
+            pygame.transform.scale(self.surface, self.screen_rect.size, self.screen)
+        else:
+            pygame.transform.scale(self.surface, self.scaled.get_size(), self.scaled)
+            self.screen.fill(BLACK)
+            self.screen.blit(self.scaled, self.scaled_rect)
+        return [self.screen_rect]
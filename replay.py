@@ -0,0 +1,510 @@
+"""Recording and playing back games of Cat-a-Pillar.
+
+A game is fully determined by its settings, its seed and the input given on
+each tick, so that is all a replay stores:
+
+    header    MAGIC, format version, mode, level, difficulty, board size,
+              wall and food options, seed
+    records   one varint per input: (ticks since the previous record << 3)
+              | kind, kind being a turn (0-3, the index in DIRECTIONS),
+              sprint on/off, a keyframe or the end of the game
+    index     the tick and file offset of every keyframe, the final tick and
+              a checksum of the final state
+    trailer   the offset of the index and INDEX_MAGIC
+
+Keyframes are full snapshots of the game state (including the random
+generator), written every KEYFRAME_INTERVAL ticks. Seeking to a tick looks
+up the last keyframe before it in the index with a binary search, restores
+it and plays at most KEYFRAME_INTERVAL ticks forward. Playing a replay to
+the end and comparing the checksum verifies it.
+
+    python replay.py FILE [--seek TICK]
+"""
+import argparse
+import bisect
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+
+from engine import GameState, SnakeBody, FreeCells, MovingObstacle, DIRECTIONS
+
+MAGIC = b'CATR'
+INDEX_MAGIC = b'CATI'
+VERSION = 4  # 4: levels from level files; 3: obstacles laid out by levelgen
+KEYFRAME_INTERVAL = 512
+TRAILER = struct.Struct('<Q4s')
+DOUBLE = struct.Struct('<d')
+
+# Record kinds besides the turns 0-3
+SPRINT_ON = 4
+SPRINT_OFF = 5
+KEYFRAME = 6
+END = 7
+
+REPLAY_EXTENSION = '.catreplay'
+MAX_SAVED_REPLAYS = 20
+
+
+class ReplayError(Exception):
+    """The file is not a replay, or it is damaged."""
+
+
+def write_varint(buf, value):
+    while value > 0x7f:
+        buf.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def read_varint(data, pos):
+    """Return (value, position after it)."""
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("replay ends in the middle of a number")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def zigzag(value):
+    """Map signed to unsigned ints so small negative numbers stay short."""
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+class Writer:
+    def __init__(self):
+        self.buf = bytearray()
+
+    def uint(self, value):
+        write_varint(self.buf, value)
+
+    def int(self, value):
+        write_varint(self.buf, zigzag(value))
+
+    def optional(self, value):
+        """A small int or None."""
+        write_varint(self.buf, 0 if value is None else value + 1)
+
+    def double(self, value):
+        self.buf += DOUBLE.pack(value)
+
+    def text(self, value):
+        data = value.encode('utf-8')
+        write_varint(self.buf, len(data))
+        self.buf += data
+
+
+class Reader:
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+
+    def uint(self):
+        value, self.pos = read_varint(self.data, self.pos)
+        return value
+
+    def int(self):
+        return unzigzag(self.uint())
+
+    def optional(self):
+        value = self.uint()
+        return None if value == 0 else value - 1
+
+    def double(self):
+        if self.pos + DOUBLE.size > len(self.data):
+            raise ReplayError("replay ends in the middle of a number")
+        value, = DOUBLE.unpack_from(self.data, self.pos)
+        self.pos += DOUBLE.size
+        return value
+
+    def text(self):
+        length = self.uint()
+        value = bytes(self.data[self.pos:self.pos + length]).decode('utf-8')
+        self.pos += length
+        return value
+
+
+def snapshot(state):
+    """Everything about a game that can change after it was created, as bytes."""
+    out = Writer()
+    out.uint(state.tick)
+    out.double(state.time)
+    out.uint(state.x)
+    out.uint(state.y)
+    out.uint(DIRECTIONS.index(state.direction))
+    out.uint(state.sprint)
+    out.uint(state.score)
+    out.uint(state.snake_length)
+    out.uint(state.points_since_last_extra)
+    out.uint(state.game_over)
+    out.uint(state.board_full)
+    out.optional(state.food_x)
+    out.optional(state.food_y)
+    out.uint(state.extra_food_visible)
+    out.double(state.extra_food_timer)
+    out.optional(state.extra_food_x)
+    out.optional(state.extra_food_y)
+
+    out.uint(len(state.bulge_ticks))
+    for born in state.bulge_ticks:
+        out.uint(state.tick - born)
+
+    # Snake cells as ids, each one relative to the one before
+    cols = state.cols
+    snake = state.snake
+    out.uint(snake.pushed)
+    out.uint(len(snake))
+    previous = 0
+    for x, y in snake:
+        cell_id = y * cols + x
+        out.int(cell_id - previous)
+        previous = cell_id
+
+    # Half-cell units, so the positions are whole numbers
+    out.uint(len(state.moving_obstacles))
+    for mobstacle in state.moving_obstacles:
+        for value in (mobstacle.x, mobstacle.y, mobstacle.dx, mobstacle.dy):
+            out.int(round(value * 2))
+
+    # The order of the free cells decides where food is placed next; it is
+    # mostly ascending, so the differences are short. Food placed near the
+    # head (Endless Mode) doesn't depend on it, so on those boards, too big
+    # to write out every keyframe, it is left out
+    if state.food_radius is None:
+        out.uint(len(state.free_cells.cells))
+        previous = 0
+        for cell_id in state.free_cells.cells:
+            out.int(cell_id - previous)
+            previous = cell_id
+
+    version, internal, gauss_next = state.rng.getstate()
+    out.uint(version)
+    out.uint(len(internal))
+    for value in internal:
+        out.uint(value)
+    out.uint(gauss_next is not None)
+    if gauss_next is not None:
+        out.double(gauss_next)
+    return bytes(out.buf)
+
+
+def restore(state, data):
+    """Put a snapshot back into a game created with the same settings and seed."""
+    inp = Reader(data)
+    state.tick = inp.uint()
+    state.time = inp.double()
+    state.x = inp.uint()
+    state.y = inp.uint()
+    state.direction = DIRECTIONS[inp.uint()]
+    state.sprint = bool(inp.uint())
+    state.score = inp.uint()
+    state.snake_length = inp.uint()
+    state.points_since_last_extra = inp.uint()
+    state.game_over = bool(inp.uint())
+    state.board_full = bool(inp.uint())
+    state.food_x = inp.optional()
+    state.food_y = inp.optional()
+    state.extra_food_visible = bool(inp.uint())
+    state.extra_food_timer = inp.double()
+    state.extra_food_x = inp.optional()
+    state.extra_food_y = inp.optional()
+
+    state.bulge_ticks.clear()
+    for _ in range(inp.uint()):
+        state.bulge_ticks.append(state.tick - inp.uint())
+
+    cols = state.cols
+    pushed = inp.uint()
+    length = inp.uint()
+    snake = SnakeBody()
+    snake.pushed = pushed - length
+    cell_id = 0
+    for _ in range(length):
+        cell_id += inp.int()
+        snake.push_head((cell_id % cols, cell_id // cols))
+    state.snake = snake
+
+    mobstacles = []
+    for template in state.moving_obstacles[:inp.uint()]:
+        x, y, dx, dy = (inp.int() / 2 for _ in range(4))
+        mobstacles.append(MovingObstacle(x, y, template.width, template.height, dx, dy, state.cols, state.rows))
+    state.moving_obstacles = mobstacles
+    state.obstacle_grid.reset_moving(mobstacles)
+
+    if state.food_radius is None:
+        free_cells = state.free_cells
+        free_cells.cells = array('i')
+        cell_id = 0
+        for _ in range(inp.uint()):
+            cell_id += inp.int()
+            free_cells.cells.append(cell_id)
+        free_cells.index = array('i', [-1]) * (state.cols * state.rows)
+        for position, cell_id in enumerate(free_cells.cells):
+            free_cells.index[cell_id] = position
+    else:
+        # Any order will do: worked out again from the board and the snake
+        state.free_cells = FreeCells(state.cols, state.rows, snake, mask=state.obstacle_grid.static)
+
+    version = inp.uint()
+    internal = tuple(inp.uint() for _ in range(inp.uint()))
+    gauss_next = inp.double() if inp.uint() else None
+    state.rng.setstate((version, internal, gauss_next))
+
+
+def state_checksum(state):
+    return zlib.crc32(snapshot(state))
+
+
+class ReplayRecorder:
+    """Records a game while driving it.
+
+    Create it right after the GameState and call step() instead of
+    state.step(); set state.sprint as usual. finish() returns the replay.
+    Games with a custom rng or a dt per step can't be recorded.
+    """
+
+    def __init__(self, state, keyframe_interval=KEYFRAME_INTERVAL):
+        if state.seed is None or state.tick != 0:
+            raise ValueError("only games created from a seed can be recorded from the start")
+        self.state = state
+        self.keyframe_interval = keyframe_interval
+        self.sprint = False
+        self.last_tick = 0
+        self.keyframes = []  # (tick, offset)
+        self.finished = None
+
+        out = self.out = Writer()
+        out.buf += MAGIC
+        out.uint(VERSION)
+        out.text(state.mode)
+        out.optional(state.level)
+        out.text(state.difficulty)
+        out.uint(state.cols)
+        out.uint(state.rows)
+        out.uint(state.has_wall)
+        out.uint(state.food_reachable_only)
+        out.uint(state.seed)
+
+    def _record(self, tick, kind):
+        self.out.uint((tick - self.last_tick) << 3 | kind)
+        self.last_tick = tick
+
+    def step(self, direction=None):
+        state = self.state
+        if state.game_over:
+            return False
+        tick = state.tick + 1
+        if state.sprint != self.sprint:
+            self.sprint = state.sprint
+            self._record(tick, SPRINT_ON if state.sprint else SPRINT_OFF)
+        if direction is not None:
+            self._record(tick, DIRECTIONS.index(direction))
+        alive = state.step(direction)
+        if alive and state.tick % self.keyframe_interval == 0:
+            self.keyframes.append((state.tick, len(self.out.buf)))
+            self._record(state.tick, KEYFRAME)
+            data = snapshot(state)
+            self.out.uint(len(data))
+            self.out.buf += data
+        return alive
+
+    def finish(self):
+        """End the recording and return the replay file contents."""
+        if self.finished is None:
+            state = self.state
+            out = self.out
+            self._record(state.tick, END)
+            index_offset = len(out.buf)
+            out.uint(len(self.keyframes))
+            previous_tick = previous_offset = 0
+            for tick, offset in self.keyframes:
+                out.uint(tick - previous_tick)
+                out.uint(offset - previous_offset)
+                previous_tick, previous_offset = tick, offset
+            out.uint(state.tick)
+            out.uint(state_checksum(state))
+            out.buf += TRAILER.pack(index_offset, INDEX_MAGIC)
+            self.finished = bytes(out.buf)
+        return self.finished
+
+
+class Replay:
+    """A recorded game that can be played back, seeked and verified."""
+
+    def __init__(self, data):
+        self.data = data
+        if data[:len(MAGIC)] != MAGIC or len(data) < len(MAGIC) + TRAILER.size:
+            raise ReplayError("not a Cat-a-Pillar replay")
+        index_offset, index_magic = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+        if index_magic != INDEX_MAGIC or index_offset >= len(data):
+            raise ReplayError("replay is incomplete")
+
+        inp = Reader(data, len(MAGIC))
+        version = inp.uint()
+        if version != VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        self.mode = inp.text()
+        self.level = inp.optional()
+        self.difficulty = inp.text()
+        self.cols = inp.uint()
+        self.rows = inp.uint()
+        self.has_wall = bool(inp.uint())
+        self.food_reachable_only = bool(inp.uint())
+        self.seed = inp.uint()
+        self.records_offset = inp.pos
+
+        inp = Reader(data, index_offset)
+        self.keyframe_ticks = []
+        self.keyframe_offsets = []
+        tick = offset = 0
+        for _ in range(inp.uint()):
+            tick += inp.uint()
+            offset += inp.uint()
+            self.keyframe_ticks.append(tick)
+            self.keyframe_offsets.append(offset)
+        self.end_tick = inp.uint()
+        self.checksum = inp.uint()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def new_state(self):
+        """The game as it was on tick 0."""
+        return GameState(self.mode, self.level, self.difficulty, cols=self.cols, rows=self.rows,
+                         has_wall=self.has_wall, food_reachable_only=self.food_reachable_only,
+                         seed=self.seed)
+
+    def state_at(self, tick):
+        """The game as it was after the given tick, found via the nearest keyframe."""
+        tick = max(0, min(tick, self.end_tick))
+        state = self.new_state()
+        pos = self.records_offset
+        keyframe = bisect.bisect_right(self.keyframe_ticks, tick) - 1
+        if keyframe >= 0:
+            inp = Reader(self.data, self.keyframe_offsets[keyframe])
+            inp.uint()  # The keyframe's own record
+            length = inp.uint()
+            restore(state, self.data[inp.pos:inp.pos + length])
+            pos = inp.pos + length
+        self._play(state, pos, tick)
+        return state
+
+    def play(self):
+        """Play the whole game headless, as fast as possible; return the final state."""
+        state = self.new_state()
+        self._play(state, self.records_offset, self.end_tick)
+        return state
+
+    def verify(self):
+        """True if playing the replay gives the recorded final state."""
+        return state_checksum(self.play()) == self.checksum
+
+    def _play(self, state, pos, until):
+        """Apply the records from pos on to state, up to and including tick until."""
+        data = self.data
+        record_tick = state.tick
+        pending = None
+
+        def advance_to(target):
+            nonlocal pending
+            while state.tick < target:
+                direction, pending = pending, None
+                state.step(direction)
+
+        while True:
+            value, next_pos = read_varint(data, pos)
+            kind = value & 7
+            record_tick += value >> 3
+            if record_tick > until or kind == END:
+                break
+            pos = next_pos
+            if kind == KEYFRAME:
+                advance_to(record_tick)
+                length, pos = read_varint(data, pos)
+                pos += length
+            elif kind in (SPRINT_ON, SPRINT_OFF):
+                advance_to(record_tick - 1)
+                state.sprint = kind == SPRINT_ON
+            else:
+                advance_to(record_tick - 1)
+                pending = DIRECTIONS[kind]
+        advance_to(until)
+
+
+def replays_dir():
+    from highscores import data_dir
+    path = os.path.join(data_dir(), 'replays')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def save_replay(data, directory=None, max_saved=MAX_SAVED_REPLAYS):
+    """Write a replay next to the others and drop the oldest beyond max_saved."""
+    directory = directory or replays_dir()
+    name = time.strftime('%Y%m%d-%H%M%S') + f'-{zlib.crc32(data):08x}' + REPLAY_EXTENSION
+    path = os.path.join(directory, name)
+    # Written under a temporary name first, so no half-written replay is left behind
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+
+    saved = sorted(entry for entry in os.listdir(directory) if entry.endswith(REPLAY_EXTENSION))
+    for old in saved[:-max_saved]:
+        os.remove(os.path.join(directory, old))
+    return path
+
+
+def save_replay_in_background(data):
+    """save_replay() on its own thread; the interpreter waits for it at exit."""
+    def run():
+        try:
+            save_replay(data)
+        except OSError as error:
+            print(f"Could not save replay: {error}", file=sys.stderr)
+
+    thread = threading.Thread(target=run, name='replay-writer')
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play back and verify a Cat-a-Pillar replay.")
+    parser.add_argument('file')
+    parser.add_argument('--seek', type=int, help="show the state after this tick")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.file)
+    print(f"{replay.mode} level={replay.level} difficulty={replay.difficulty} seed={replay.seed} "
+          f"ticks={replay.end_tick} keyframes={len(replay.keyframe_ticks)} bytes={len(replay.data)}")
+    start = time.perf_counter()
+    state = replay.play()
+    elapsed = time.perf_counter() - start
+    ok = state_checksum(state) == replay.checksum
+    print(f"played {state.tick} ticks in {elapsed:.3f} s, score {state.score}, "
+          f"checksum {'ok' if ok else 'MISMATCH'}")
+    if args.seek is not None:
+        start = time.perf_counter()
+        state = replay.state_at(args.seek)
+        print(f"tick {state.tick}: score {state.score}, length {len(state.snake)}, "
+              f"head {state.head} (seek took {(time.perf_counter() - start) * 1e3:.2f} ms)")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
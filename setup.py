@@ -1,6 +1,7 @@
 from setuptools import setup
 import sys
 import os
+import glob
 
 APP = ['catapillar.py']
 DATA_FILES = [
@@ -8,12 +9,13 @@ DATA_FILES = [
     os.path.join('assets', 'game.wav'),
     os.path.join('assets', 'PressStart2P.ttf'),
     os.path.join('assets', 'snake.icns'),
+    ('levels', glob.glob(os.path.join('levels', '*.level'))),
     # Optional: Füge weitere Ressourcen hinzu, z.B. ein Icon
     # os.path.join('assets', 'app_icon.icns'),
 ]
 OPTIONS = {
     'argv_emulation': True,
-    'packages': ['pygame'],
+    'packages': ['pygame', 'numpy'],
     'resources': DATA_FILES,  
     # Optional: Füge ein App-Icon hinzu
     'iconfile': 'assets/snake.icns',  # Stelle sicher, dass diese Datei existiert
@@ -0,0 +1,131 @@
+"""Cached text rendering for Cat-a-Pillar.
+
+Menus and the HUD draw the same handful of strings every frame. Instead of
+calling font.render() each time, every glyph is rasterized once per font and
+color into a GlyphAtlas, strings are composed from the atlas with one batched
+Surface.blits() call, and whole composed strings are kept in an LRU cache, so
+a string is only built again when its content changes.
+
+Only fixed-width fonts like the bundled PressStart2P go through the atlas;
+proportional fallback fonts need kerning, so their strings are rendered by
+the font as usual and only the LRU cache applies.
+"""
+import string
+from collections import OrderedDict
+
+import pygame
+
+ATLAS_WIDTH = 512
+CACHE_SIZE = 256
+SAMPLE_GLYPHS = string.ascii_letters + string.digits + string.punctuation
+
+
+class GlyphAtlas:
+    """Every glyph of one font in one color, packed into a single surface.
+
+    Glyphs can reach above the font's ascent (PressStart2P does by a pixel
+    at some sizes), which makes them taller than font.get_height(). Rows
+    are as tall as the tallest glyph seen, starting with printable ASCII,
+    and every glyph is put on the same baseline in its row.
+    """
+
+    def __init__(self, font, color, antialias=True):
+        self.font = font
+        self.color = color
+        self.antialias = antialias
+        self.baseline = max(self._top(char) for char in SAMPLE_GLYPHS)
+        self.height = self.baseline - font.get_descent()
+        self._clear()
+
+    def _clear(self):
+        self.surface = pygame.Surface((ATLAS_WIDTH, self.height), pygame.SRCALPHA)
+        self.glyphs = {}  # char -> (area in the atlas, advance)
+        self.next_x = 0
+        self.next_y = 0
+
+    def _top(self, char):
+        """Pixels from the top of char rendered on its own down to the baseline."""
+        metrics = self.font.metrics(char)[0]
+        return max(self.font.get_ascent(), metrics[3] if metrics else 0)
+
+    def _add_glyph(self, char):
+        glyph = self.font.render(char, self.antialias, self.color)
+        top = self._top(char)
+        if top > self.baseline or self.baseline - top + glyph.get_height() > self.height:
+            # Doesn't fit in the rows: start over with rows it fits in
+            self.height += max(top - self.baseline, 0)
+            self.baseline = max(self.baseline, top)
+            self.height = max(self.height, self.baseline - top + glyph.get_height())
+            self._clear()
+        width = glyph.get_width()
+        if self.next_x + width > ATLAS_WIDTH:
+            self.next_x = 0
+            self.next_y += self.height
+        if self.next_y + self.height > self.surface.get_height():
+            # Out of room: double the atlas and keep what is already packed
+            grown = pygame.Surface((ATLAS_WIDTH, self.surface.get_height() * 2), pygame.SRCALPHA)
+            grown.blit(self.surface, (0, 0))
+            self.surface = grown
+        area = pygame.Rect(self.next_x, self.next_y, width, self.height)
+        self.surface.blit(glyph, (self.next_x, self.next_y + self.baseline - top))
+        self.next_x += width
+        self.glyphs[char] = (area, self.font.size(char)[0])
+        return self.glyphs[char]
+
+    def render(self, text):
+        """Compose text from the atlas into a new surface."""
+        # Add the missing glyphs first, as one may start the atlas over
+        for char in set(text).difference(self.glyphs):
+            self._add_glyph(char)
+        glyphs = self.glyphs
+        blits = []
+        x = 0
+        for char in text:
+            area, advance = glyphs[char]
+            blits.append((self.surface, (x, 0), area))
+            x += advance
+        surface = pygame.Surface((x, self.height), pygame.SRCALPHA)
+        # Transparent pixels in the text color keep antialiased edges exact
+        surface.fill((*self.color[:3], 0))
+        surface.blits(blits, doreturn=False)
+        return surface
+
+
+def is_monospace(font):
+    return font.size('i')[0] == font.size('W')[0] == font.size('.')[0]
+
+
+class TextRenderer:
+    """font.render() replacement backed by glyph atlases and an LRU of strings."""
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self.atlases = {}
+        self.strings = OrderedDict()
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.strings.get(key)
+        if surface is not None:
+            self.strings.move_to_end(key)
+            return surface
+        atlas = self.atlases.get((font, color))
+        if atlas is None and (font, color) not in self.atlases:
+            atlas = self.atlases[(font, color)] = GlyphAtlas(font, color) if is_monospace(font) else None
+        surface = atlas.render(text) if atlas is not None else font.render(text, True, color)
+        self.strings[key] = surface
+        if len(self.strings) > self.max_entries:
+            self.strings.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.atlases.clear()
+        self.strings.clear()
+
+
+_default_renderer = TextRenderer()
+
+
+def render_text(font, text, color):
+    """Return a surface with text in color, drawn from the shared cache."""
+    return _default_renderer.render(font, text, tuple(color))
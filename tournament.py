@@ -0,0 +1,275 @@
+"""Headless tournaments between bots, on every difficulty and Fun Mode level.
+
+Every combination of bot, difficulty and level is played a number of times
+by a pool of worker processes, one per core by default. Each finished game
+is appended to a JSON Lines file as soon as it comes back, so a run can be
+stopped at any time and started again with the same arguments to pick up
+where it left off: games already in the file are not played again. Every
+game has a fixed seed derived from its place in the tournament, so a run
+is reproducible and resuming it gives the same results as running it in
+one go. When all games are in, the score distribution and the speed
+(ticks per second) of every combination are printed.
+
+A bot is a function that gets the GameState at the start of a game and
+returns the controller for that game, which is called with the state
+before every tick and returns a direction to turn to, or None. Bots are
+named either from BOTS or as module:function.
+
+    python tournament.py --bots random greedy --games 100 -o results.jsonl
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+
+from autopilot import BODY_LOOKAHEAD, autopilot_bot
+from engine import (GameState, MovingObstacle, DIRECTIONS, FUN_LEVELS, can_turn, covered_cells,
+                    difficulty_levels)
+
+DEFAULT_GAMES = 20
+DEFAULT_OUTPUT = 'tournament.jsonl'
+MAX_TICKS = 100000  # Games still running after this many ticks are stopped
+RANDOM_TURN_CHANCE = 0.1
+PROGRESS_INTERVAL = 0.5  # Seconds between progress lines
+
+
+def random_bot(state):
+    """Turns at random now and then, whatever is in the way."""
+    rng = random.Random(state.seed)
+
+    def control(state):
+        if rng.random() < RANDOM_TURN_CHANCE:
+            return rng.choice(DIRECTIONS)
+        return None
+    return control
+
+
+def next_cell(state, direction):
+    """The cell the head moves to in direction, or None if that is the wall."""
+    x, y = state.x + direction[0], state.y + direction[1]
+    if not state.has_wall:
+        return x % state.cols, y % state.rows
+    if 0 <= x < state.cols and 0 <= y < state.rows:
+        return x, y
+    return None
+
+
+def obstacle_cover(state, ticks):
+    """Cells the moving obstacles will crash into within the next ticks ticks."""
+    cells = set()
+    for mobstacle in state.moving_obstacles:
+        mobstacle = MovingObstacle(mobstacle.x, mobstacle.y, mobstacle.width, mobstacle.height,
+                                   mobstacle.dx, mobstacle.dy, state.cols, state.rows)
+        for _ in range(ticks):
+            mobstacle.move()
+            cells.update(covered_cells(mobstacle.x, mobstacle.y, mobstacle.width, mobstacle.height))
+    return cells
+
+
+def is_safe(state, cell, cover=()):
+    """True if moving into cell can't crash on the next tick.
+
+    Moving obstacles are given a cell of room on every side, since they
+    move half a cell before the head is checked against them. Cells in
+    cover (see obstacle_cover()) are avoided too, as a moving obstacle
+    would slide over them while they are still part of the body.
+    """
+    if cell is None or cell in state.snake or cell in cover:
+        return False
+    x, y = cell
+    if any(ox <= x < ox + width and oy <= y < oy + height for ox, oy, width, height in state.obstacles):
+        return False
+    return not any(mobstacle.colliderect(x - 1, y - 1, 3, 3) for mobstacle in state.moving_obstacles)
+
+
+def board_distance(state, cell, target):
+    """Steps from cell to target, going around the edges where there is no wall."""
+    dx = abs(cell[0] - target[0])
+    dy = abs(cell[1] - target[1])
+    if not state.has_wall:
+        dx = min(dx, state.cols - dx)
+        dy = min(dy, state.rows - dy)
+    return dx + dy
+
+
+def greedy_bot(state):
+    """Heads for the nearest food without crashing on the next tick.
+
+    Cells moving obstacles are about to slide over are avoided as well.
+    """
+    def control(state):
+        target = (state.food_x, state.food_y)
+        if state.extra_food_visible:
+            target = (state.extra_food_x, state.extra_food_y)
+        options = [state.direction] + [direction for direction in DIRECTIONS
+                                       if can_turn(state.direction, direction)]
+        cover = ()
+        if state.moving_obstacles:
+            cover = obstacle_cover(state, min(state.snake_length, BODY_LOOKAHEAD) + 1)
+        best = None
+        for direction in options:
+            cell = next_cell(state, direction)
+            if not is_safe(state, cell, cover):
+                continue
+            distance = board_distance(state, cell, target) if target[0] is not None else 0
+            if best is None or distance < best[0]:
+                best = (distance, direction)
+        if best is None or best[1] == state.direction:
+            return None
+        return best[1]
+    return control
+
+
+BOTS = {
+    'random': random_bot,
+    'greedy': greedy_bot,
+    'autopilot': autopilot_bot,
+}
+
+
+def load_bot(name):
+    """The bot called name in BOTS, or the function a module:function name points to."""
+    if name in BOTS:
+        return BOTS[name]
+    module_name, _, function = name.partition(':')
+    if not function:
+        raise ValueError(f"unknown bot {name!r}; use one of {', '.join(BOTS)} or module:function")
+    return getattr(importlib.import_module(module_name), function)
+
+
+def game_seed(base_seed, bot, mode, level, difficulty, game):
+    """Seed of one game, the same whenever the same tournament is run."""
+    key = f'{base_seed}/{bot}/{mode}/{level}/{difficulty}/{game}'.encode()
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], 'little') >> 1
+
+
+def play(task):
+    """Play one game in a worker process and return its result as a dict."""
+    bot, mode, level, difficulty, game, seed, max_ticks = task
+    state = GameState(mode, level, difficulty, seed=seed)
+    control = load_bot(bot)(state)
+    start = time.perf_counter()
+    while state.tick < max_ticks and state.step(control(state)):
+        pass
+    elapsed = time.perf_counter() - start
+    return {
+        'bot': bot, 'mode': mode, 'level': level, 'difficulty': difficulty,
+        'game': game, 'seed': seed,
+        'score': state.score, 'length': state.snake_length, 'ticks': state.tick,
+        'crashed': state.game_over and not state.board_full,
+        'board_full': state.board_full, 'seconds': elapsed,
+    }
+
+
+def result_key(result):
+    return (result['bot'], result['mode'], result['level'], result['difficulty'], result['game'])
+
+
+def load_results(path):
+    """Results already in the output file.
+
+    A last line cut off by an interrupted run is removed from the file, so
+    that game is played again and the next result starts on a line of its
+    own.
+    """
+    results = []
+    if not os.path.exists(path):
+        return results
+    with open(path, 'r+b') as f:
+        data = f.read()
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            f.truncate(complete)
+    for line in data[:complete].splitlines():
+        try:
+            results.append(json.loads(line))
+        except ValueError:
+            continue
+    return results
+
+
+def summarize(results):
+    """Print the score distribution and speed of every combination."""
+    groups = {}
+    for result in results:
+        groups.setdefault(result_key(result)[:4], []).append(result)
+    print(f"{'bot':<12} {'mode':<8} {'level':>5} {'difficulty':<11} {'games':>6} {'mean':>8} "
+          f"{'p10':>6} {'median':>7} {'p90':>6} {'max':>6} {'ticks':>8} {'ticks/s':>9}")
+    for (bot, mode, level, difficulty), group in sorted(
+            groups.items(), key=lambda item: tuple(str(part) for part in item[0])):
+        scores = sorted(result['score'] for result in group)
+        deciles = statistics.quantiles(scores, n=10, method='inclusive') if len(scores) > 1 else scores * 9
+        ticks = sum(result['ticks'] for result in group)
+        seconds = sum(result['seconds'] for result in group)
+        print(f"{bot:<12} {mode:<8} {str(level or '-'):>5} {difficulty:<11} {len(group):>6} "
+              f"{statistics.mean(scores):>8.1f} {deciles[0]:>6.0f} {statistics.median(scores):>7.0f} "
+              f"{deciles[-1]:>6.0f} {scores[-1]:>6} {ticks / len(group):>8.0f} "
+              f"{ticks / seconds if seconds else 0:>9,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless Cat-a-Pillar tournaments between bots.")
+    parser.add_argument('--bots', nargs='+', default=['greedy'],
+                        help=f"bots from {', '.join(BOTS)} or module:function (default: greedy)")
+    parser.add_argument('--difficulties', nargs='+', default=list(difficulty_levels),
+                        choices=list(difficulty_levels), metavar='DIFFICULTY')
+    parser.add_argument('--levels', nargs='+', type=int, default=list(FUN_LEVELS),
+                        choices=list(FUN_LEVELS), metavar='LEVEL', help="Fun Mode levels")
+    parser.add_argument('--classic', action='store_true', help="also play Classic Mode")
+    parser.add_argument('--games', type=int, default=DEFAULT_GAMES,
+                        help="games per combination (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0, help="tournament seed (default: %(default)s)")
+    parser.add_argument('--max-ticks', type=int, default=MAX_TICKS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT,
+                        help="JSON Lines file to append to and resume from (default: %(default)s)")
+    args = parser.parse_args()
+
+    for bot in args.bots:
+        load_bot(bot)  # Fail before starting the pool
+    settings = [('fun', level) for level in args.levels]
+    if args.classic:
+        settings.insert(0, ('classic', None))
+
+    results = load_results(args.output)
+    done = {result_key(result) for result in results}
+    tasks = []
+    for bot in args.bots:
+        for mode, level in settings:
+            for difficulty in args.difficulties:
+                for game in range(args.games):
+                    if (bot, mode, level, difficulty, game) not in done:
+                        seed = game_seed(args.seed, bot, mode, level, difficulty, game)
+                        tasks.append((bot, mode, level, difficulty, game, seed, args.max_ticks))
+    if done:
+        print(f"resuming: {len(done)} games already played, {len(tasks)} to go", file=sys.stderr)
+
+    start = shown = time.perf_counter()
+    ticks = 0
+    with open(args.output, 'a') as f, multiprocessing.Pool(args.workers) as pool:
+        for count, result in enumerate(pool.imap_unordered(play, tasks, chunksize=4), 1):
+            f.write(json.dumps(result) + '\n')
+            f.flush()
+            results.append(result)
+            ticks += result['ticks']
+            now = time.perf_counter()
+            if now - shown >= PROGRESS_INTERVAL or count == len(tasks):
+                shown = now
+                print(f"\r{count}/{len(tasks)} games, {ticks / (now - start):,.0f} ticks/s over all workers",
+                      end='', file=sys.stderr, flush=True)
+    if tasks:
+        print(file=sys.stderr)
+
+    wanted = {(bot, mode, level, difficulty) for bot in args.bots for mode, level in settings
+              for difficulty in args.difficulties}
+    summarize([result for result in results if result_key(result)[:4] in wanted])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,524 @@
+"""Many games of Cat-a-Pillar at once, stepped in lockstep with NumPy.
+
+VecEnv holds num_envs independent games as arrays with one row per game
+(struct of arrays): head position and direction, the body as a ring buffer
+of cell ids, an occupancy grid, the free cells, food, extra food, score,
+growth bulges and the obstacles of the Fun Mode levels. One step(actions)
+call advances every game by one tick and returns grid observations, the
+points scored and which games ended; ended games start over on their own.
+
+The rules are exactly those of engine.GameState, down to the random
+numbers: every game is set up by a GameState with its own seed and keeps
+that game's random.Random, and food is picked from the free cells in the
+same order FreeCells keeps them. A game in a VecEnv therefore plays out
+tick for tick like GameState(..., seed=env.seeds[i]) given the same turns,
+which `python vec_env.py --check` verifies. The rare events that draw
+random numbers (placing food and extra food) run per game in Python;
+everything else is batched.
+
+    python vec_env.py [--envs N] [--steps N] [--check]
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from engine import (GameState, DIRECTIONS, MAX_SEED, OBSTACLE_SIZE, EXTRA_FOOD_POINTS,
+                    MAX_MULTIPLIER, MIN_MULTIPLIER, rect_cells)
+
+# Actions are indices into DIRECTIONS; NO_TURN keeps the current direction
+NO_TURN = -1
+DIRECTION_DX = np.array([dx for dx, _ in DIRECTIONS])
+DIRECTION_DY = np.array([dy for _, dy in DIRECTIONS])
+
+# Observation channels
+BODY, HEAD, FOOD, EXTRA_FOOD, OBSTACLE = range(5)
+CHANNELS = 5
+
+SAMPLE_TRIES = 16  # Same as FreeCells.sample()
+
+
+class VecEnv:
+    """num_envs games with the same settings, advanced together by step().
+
+    All games share mode, level, difficulty and board size. Each one gets a
+    fresh seed from a generator seeded with seed whenever it (re)starts;
+    the seed of the game currently running in row i is seeds[i].
+    """
+
+    def __init__(self, num_envs, mode='classic', level=None, difficulty='Easy',
+                 cols=None, rows=None, seed=None):
+        self.num_envs = n = num_envs
+        self.mode = mode
+        self.level = level
+        self.difficulty = difficulty
+        self.seed_rng = random.Random(seed)
+
+        # Settings that are the same for every game; the board size is the
+        # level's own if it has one
+        template = GameState(mode, level, difficulty, cols, rows, seed=0)
+        self.cols = cols = template.cols
+        self.rows = rows = template.rows
+        cells = cols * rows
+        self.has_wall = template.has_wall
+        self.food_radius = template.food_radius
+        self.point_value = template.point_value
+        self.extra_point_time = template.extra_point_time
+        self.tick_length = 1.0 / template.tick_rate
+
+        self.seeds = [None] * n
+        self.rngs = [None] * n
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.dx = np.zeros(n, dtype=np.int64)
+        self.dy = np.zeros(n, dtype=np.int64)
+
+        # Body as a ring buffer of cell ids (y * cols + x) from tail to head
+        self.body = np.zeros((n, cells), dtype=np.int32)
+        self.tail = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        self.snake_length = np.zeros(n, dtype=np.int64)
+        self.occupied = np.zeros((n, cells), dtype=bool)
+
+        # Static obstacles, and the free cells in FreeCells order
+        self.blocked = np.zeros((n, cells), dtype=bool)
+        self.free_cells = np.zeros((n, cells), dtype=np.int32)
+        self.free_index = np.zeros((n, cells), dtype=np.int32)
+        self.free_count = np.zeros(n, dtype=np.int64)
+
+        self.food_x = np.zeros(n, dtype=np.int64)  # -1 when the board is full
+        self.food_y = np.zeros(n, dtype=np.int64)
+        self.extra_visible = np.zeros(n, dtype=bool)
+        self.extra_x = np.zeros(n, dtype=np.int64)
+        self.extra_y = np.zeros(n, dtype=np.int64)
+        self.extra_timer = np.zeros(n)
+        self.points_since_extra = np.zeros(n, dtype=np.int64)
+
+        self.score = np.zeros(n, dtype=np.int64)
+        self.time = np.zeros(n)
+        self.tick = np.zeros(n, dtype=np.int64)
+
+        # Birth ticks of the growth bulges, as a ring buffer per game; there
+        # are never more of them than cells in the snake plus one
+        self.bulges = np.zeros((n, cells + 2), dtype=np.int64)
+        self.bulge_start = np.zeros(n, dtype=np.int64)
+        self.bulge_count = np.zeros(n, dtype=np.int64)
+
+        # Moving obstacles, all OBSTACLE_SIZE square
+        moving = len(template.moving_obstacles)
+        self.mo_x = np.zeros((n, moving))
+        self.mo_y = np.zeros((n, moving))
+        self.mo_dx = np.zeros((n, moving))
+        self.mo_dy = np.zeros((n, moving))
+
+        self.observation = np.zeros((n, CHANNELS, rows, cols), dtype=np.uint8)
+        self.reset()
+
+    def reset(self):
+        """Start a new game in every row and return the observations."""
+        for env in range(self.num_envs):
+            self._reset_env(env)
+        return self.observe()
+
+    def _reset_env(self, env):
+        """Set row env up the way GameState sets up a game with a new seed."""
+        seed = self.seed_rng.randrange(MAX_SEED)
+        state = GameState(self.mode, self.level, self.difficulty, self.cols, self.rows, seed=seed)
+        self.seeds[env] = seed
+        self.rngs[env] = state.rng
+        self.x[env], self.y[env] = state.x, state.y
+        self.dx[env], self.dy[env] = state.direction
+
+        self.tail[env] = self.length[env] = 0
+        self.snake_length[env] = state.snake_length
+        self.occupied[env] = False
+
+        self.blocked[env] = False
+        for obstacle in state.obstacles:
+            for x, y in rect_cells(obstacle):
+                if 0 <= x < self.cols and 0 <= y < self.rows:
+                    self.blocked[env, y * self.cols + x] = True
+        count = len(state.free_cells)
+        self.free_cells[env, :count] = state.free_cells.cells
+        self.free_index[env] = state.free_cells.index
+        self.free_count[env] = count
+
+        self.food_x[env] = -1 if state.food_x is None else state.food_x
+        self.food_y[env] = -1 if state.food_y is None else state.food_y
+        self.extra_visible[env] = False
+        self.points_since_extra[env] = 0
+        self.score[env] = 0
+        self.time[env] = 0.0
+        self.tick[env] = 0
+        self.bulge_start[env] = self.bulge_count[env] = 0
+
+        for idx, mobstacle in enumerate(state.moving_obstacles):
+            self.mo_x[env, idx], self.mo_y[env, idx] = mobstacle.x, mobstacle.y
+            self.mo_dx[env, idx], self.mo_dy[env, idx] = mobstacle.dx, mobstacle.dy
+
+    def _free_remove(self, envs, cell_ids):
+        """FreeCells.remove() of one cell in each of the given rows."""
+        position = self.free_index[envs, cell_ids]
+        free = position >= 0
+        envs, cell_ids, position = envs[free], cell_ids[free], position[free]
+        self.free_count[envs] -= 1
+        last = self.free_cells[envs, self.free_count[envs]]
+        self.free_cells[envs, position] = last
+        self.free_index[envs, last] = position
+        self.free_index[envs, cell_ids] = -1
+
+    def _free_add(self, envs, cell_ids):
+        """FreeCells.add() of one cell in each of the given rows."""
+        missing = self.free_index[envs, cell_ids] < 0
+        envs, cell_ids = envs[missing], cell_ids[missing]
+        count = self.free_count[envs]
+        self.free_index[envs, cell_ids] = count
+        self.free_cells[envs, count] = cell_ids
+        self.free_count[envs] += 1
+
+    def _random_free_cell(self, env):
+        """GameState._random_free_cell() for row env, with its random numbers."""
+        taken = {(int(self.x[env]), int(self.y[env])), (int(self.food_x[env]), int(self.food_y[env]))}
+        if self.extra_visible[env]:
+            taken.add((int(self.extra_x[env]), int(self.extra_y[env])))
+        moving = list(zip(self.mo_x[env].tolist(), self.mo_y[env].tolist()))
+        size = OBSTACLE_SIZE
+
+        def reject(cell):
+            x, y = cell
+            return cell in taken or any(x < mx + size and mx < x + 1 and y < my + size and my < y + 1
+                                        for mx, my in moving)
+
+        cols = self.cols
+        rng = self.rngs[env]
+        if self.food_radius is not None:
+            # The same draws as FreeCells.sample_near()
+            head_x, head_y = int(self.x[env]), int(self.y[env])
+            free_index = self.free_index[env]
+            for _ in range(SAMPLE_TRIES):
+                x = head_x + rng.randint(-self.food_radius, self.food_radius)
+                y = head_y + rng.randint(-self.food_radius, self.food_radius)
+                if not self.has_wall:
+                    x %= cols
+                    y %= self.rows
+                if (0 <= x < cols and 0 <= y < self.rows and free_index[y * cols + x] >= 0
+                        and not reject((x, y))):
+                    return (x, y)
+            # Then as FreeCells.sample_anywhere()
+            for _ in range(SAMPLE_TRIES):
+                cell_id = rng.randrange(len(free_index))
+                if free_index[cell_id] >= 0 and not reject((cell_id % cols, cell_id // cols)):
+                    return (cell_id % cols, cell_id // cols)
+            candidates = [(cell_id % cols, cell_id // cols) for cell_id in np.flatnonzero(free_index >= 0).tolist()]
+            candidates = [cell for cell in candidates if not reject(cell)]
+            return rng.choice(candidates) if candidates else None
+
+        # The same draws as FreeCells.sample()
+        count = int(self.free_count[env])
+        if count == 0:
+            return None
+        cells = self.free_cells[env]
+        for _ in range(SAMPLE_TRIES):
+            cell_id = int(cells[rng.randrange(count)])
+            cell = (cell_id % cols, cell_id // cols)
+            if not reject(cell):
+                return cell
+        candidates = [cell for cell in ((cell_id % cols, cell_id // cols) for cell_id in cells[:count].tolist())
+                      if not reject(cell)]
+        return rng.choice(candidates) if candidates else None
+
+    def _push_bulge(self, envs):
+        end = (self.bulge_start[envs] + self.bulge_count[envs]) % self.bulges.shape[1]
+        self.bulges[envs, end] = self.tick[envs]
+        self.bulge_count[envs] += 1
+
+    def step(self, actions=None):
+        """Advance every game by one tick, like GameState.step().
+
+        actions holds an index into DIRECTIONS (or NO_TURN) per game; None
+        turns no snake. Returns (observations, rewards, dones, info):
+        rewards are the points scored this tick, and for the games that
+        ended, info['final_score'] and info['final_tick'] hold their score
+        and length in ticks before the row was reset for a new game.
+        """
+        cols, rows, cells = self.cols, self.rows, self.cols * self.rows
+        score_before = self.score.copy()
+        # Where things were, to take them off the observations afterwards
+        before = (self.x.copy(), self.y.copy(), self.food_x.copy(), self.food_y.copy(),
+                  self.extra_visible.copy(), self.extra_x.copy(), self.extra_y.copy())
+
+        if actions is not None:
+            actions = np.asarray(actions)
+            turning = actions != NO_TURN
+            dx = DIRECTION_DX[actions]
+            dy = DIRECTION_DY[actions]
+            # can_turn(): only ever at a right angle
+            turning &= dx * self.dx + dy * self.dy == 0
+            self.dx[turning] = dx[turning]
+            self.dy[turning] = dy[turning]
+        self.time += self.tick_length
+        self.tick += 1
+
+        # Movement, with wrap-around or crashing into the wall
+        x = self.x + self.dx
+        y = self.y + self.dy
+        if self.has_wall:
+            crashed = (x < 0) | (x >= cols) | (y < 0) | (y >= rows)
+            alive = ~crashed
+            self.x[alive] = x[alive]
+            self.y[alive] = y[alive]
+        else:
+            self.x = x % cols
+            self.y = y % rows
+            crashed = np.zeros(self.num_envs, dtype=bool)
+        x, y = self.x, self.y
+
+        # Moving obstacles, crashing into the head or sliding into the body
+        if self.mo_x.shape[1]:
+            size = OBSTACLE_SIZE
+            self.mo_x += self.mo_dx
+            self.mo_y += self.mo_dy
+            self.mo_dx[(self.mo_x < 0) | (self.mo_x + size > cols)] *= -1
+            self.mo_dy[(self.mo_y < 0) | (self.mo_y + size > rows)] *= -1
+            hit = ((self.mo_x <= x[:, None]) & (x[:, None] < self.mo_x + size)
+                   & (self.mo_y <= y[:, None]) & (y[:, None] < self.mo_y + size))
+            crashed |= hit.any(axis=1)
+            # Cells whose corner is inside an obstacle, as for the head
+            offsets = np.arange(size)
+            xs = np.ceil(self.mo_x).astype(np.int64)[:, :, None] + offsets  # (n, moving, size)
+            ys = np.ceil(self.mo_y).astype(np.int64)[:, :, None] + offsets
+            inside = ((xs >= 0) & (xs < cols))[:, :, None, :] & ((ys >= 0) & (ys < rows))[:, :, :, None]
+            ids = np.clip(ys, 0, rows - 1)[:, :, :, None] * cols + np.clip(xs, 0, cols - 1)[:, :, None, :]
+            under = self.occupied[np.arange(self.num_envs)[:, None, None, None], ids] & inside
+            crashed |= under.any(axis=(1, 2, 3))
+
+        # Extra food shows up after enough points and goes away in time
+        spawn = ~crashed & ~self.extra_visible & (self.points_since_extra >= EXTRA_FOOD_POINTS)
+        for env in np.flatnonzero(spawn).tolist():
+            cell = self._random_free_cell(env)
+            if cell is not None:
+                self.extra_x[env], self.extra_y[env] = cell
+                self.extra_visible[env] = True
+                self.extra_timer[env] = self.time[env]
+        expired = (~crashed & self.extra_visible
+                   & (self.extra_point_time - (self.time - self.extra_timer) <= 0))
+        self.extra_visible[expired] = False
+        self.points_since_extra[expired] = 0
+
+        # Collision with self, checked before the tail moves on
+        envs = np.flatnonzero(~crashed)
+        heads = y[envs] * cols + x[envs]
+        hit = self.occupied[envs, heads]
+        crashed[envs[hit]] = True
+        envs, heads = envs[~hit], heads[~hit]
+
+        self.body[envs, (self.tail[envs] + self.length[envs]) % cells] = heads
+        self.length[envs] += 1
+        self.occupied[envs, heads] = True
+        self._free_remove(envs, heads)
+        pushed = envs, heads
+
+        # Collision with static obstacles
+        hit = self.blocked[envs, heads]
+        crashed[envs[hit]] = True
+        envs = envs[~hit]
+
+        # Eating food
+        board_full = np.zeros(self.num_envs, dtype=bool)
+        eaters = envs[(x[envs] == self.food_x[envs]) & (y[envs] == self.food_y[envs])]
+        for env in eaters.tolist():
+            cell = self._random_free_cell(env)
+            if cell is None:
+                self.food_x[env] = self.food_y[env] = -1
+                board_full[env] = True
+            else:
+                self.food_x[env], self.food_y[env] = cell
+        self.score[eaters] += self.point_value
+        self.points_since_extra[eaters] += 1
+        self._push_bulge(eaters)
+
+        # Eating extra food
+        visible = envs[self.extra_visible[envs]]
+        eaters = visible[(x[visible] == self.extra_x[visible]) & (y[visible] == self.extra_y[visible])]
+        for env in eaters.tolist():
+            time_fraction = (float(self.time[env]) - float(self.extra_timer[env])) / self.extra_point_time
+            multiplier = MAX_MULTIPLIER - (MAX_MULTIPLIER - MIN_MULTIPLIER) * time_fraction
+            self.score[env] += int(self.point_value * max(multiplier, MIN_MULTIPLIER))
+        self.extra_visible[eaters] = False
+        self.points_since_extra[eaters] = 0
+        self._push_bulge(eaters)
+
+        # The snake grows once a bulge has reached the tail
+        pending = envs[self.bulge_count[envs] > 0]
+        first = self.bulges[pending, self.bulge_start[pending]]
+        growing = pending[self.tick[pending] - first + 1 >= self.length[pending]]
+        self.snake_length[growing] += 1
+        self.bulge_start[growing] = (self.bulge_start[growing] + 1) % self.bulges.shape[1]
+        self.bulge_count[growing] -= 1
+
+        # Trim snake
+        trimmed = envs[self.length[envs] > self.snake_length[envs]]
+        tails = self.body[trimmed, self.tail[trimmed]]
+        self.tail[trimmed] = (self.tail[trimmed] + 1) % cells
+        self.length[trimmed] -= 1
+        self.occupied[trimmed, tails] = False
+        self._free_add(trimmed, tails)
+
+        dones = crashed | board_full
+        rewards = self.score - score_before
+        info = {
+            'final_score': np.where(dones, self.score, 0),
+            'final_tick': np.where(dones, self.tick, 0),
+        }
+        self._update_observation(before, pushed, (trimmed, tails))
+        done_envs = np.flatnonzero(dones)
+        for env in done_envs.tolist():
+            self._reset_env(env)
+        self._observe(done_envs)
+        return self.observation, rewards, dones, info
+
+    def _update_observation(self, before, pushed, trimmed):
+        """Change only the cells of the observations that one tick changed."""
+        obs = self.observation
+        cols = self.cols
+        envs = np.arange(self.num_envs)
+        x, y, food_x, food_y, extra_visible, extra_x, extra_y = before
+
+        obs[envs, HEAD, y, x] = 0
+        obs[envs, HEAD, self.y, self.x] = 1
+        pushed_envs, heads = pushed
+        obs[pushed_envs, BODY, heads // cols, heads % cols] = 1
+        trimmed_envs, tails = trimmed
+        obs[trimmed_envs, BODY, tails // cols, tails % cols] = 0
+
+        had_food = food_x >= 0
+        obs[envs[had_food], FOOD, food_y[had_food], food_x[had_food]] = 0
+        has_food = self.food_x >= 0
+        obs[envs[has_food], FOOD, self.food_y[has_food], self.food_x[has_food]] = 1
+        obs[envs[extra_visible], EXTRA_FOOD, extra_y[extra_visible], extra_x[extra_visible]] = 0
+        extra = self.extra_visible
+        obs[envs[extra], EXTRA_FOOD, self.extra_y[extra], self.extra_x[extra]] = 1
+
+        if self.mo_x.shape[1]:
+            obs[:, OBSTACLE] = self._obstacles(envs)
+
+    def _obstacles(self, envs):
+        """Cells covered by static or moving obstacles in the given rows."""
+        rows, cols = self.rows, self.cols
+        obstacles = self.blocked[envs].reshape(len(envs), rows, cols)
+        if self.mo_x.shape[1]:
+            # Cells a moving obstacle overlaps, as in MovingObstacle.colliderect()
+            size = OBSTACLE_SIZE
+            mo_x = self.mo_x[envs][:, :, None]
+            mo_y = self.mo_y[envs][:, :, None]
+            xs = np.arange(cols)
+            ys = np.arange(rows)
+            in_x = (xs < mo_x + size) & (mo_x < xs + 1)
+            in_y = (ys < mo_y + size) & (mo_y < ys + 1)
+            obstacles = obstacles | (in_y[:, :, :, None] & in_x[:, :, None, :]).any(axis=1)
+        return obstacles
+
+    def _observe(self, envs):
+        """Draw the observations of the given rows from scratch."""
+        if not len(envs):
+            return
+        obs = self.observation
+        obs[envs, BODY] = self.occupied[envs].reshape(len(envs), self.rows, self.cols)
+        obs[envs, HEAD:OBSTACLE] = 0
+        obs[envs, HEAD, self.y[envs], self.x[envs]] = 1
+        with_food = envs[self.food_x[envs] >= 0]
+        obs[with_food, FOOD, self.food_y[with_food], self.food_x[with_food]] = 1
+        with_extra = envs[self.extra_visible[envs]]
+        obs[with_extra, EXTRA_FOOD, self.extra_y[with_extra], self.extra_x[with_extra]] = 1
+        obs[envs, OBSTACLE] = self._obstacles(envs)
+
+    def observe(self):
+        """The boards as a (num_envs, CHANNELS, rows, cols) array of 0 and 1.
+
+        Channels are BODY (every snake cell, head included), HEAD, FOOD,
+        EXTRA_FOOD and OBSTACLE (static and moving). The wall of the wall
+        levels is not drawn; see has_wall. step() keeps the same array up
+        to date, changing only the cells that moved, so it is only valid
+        until the next step().
+        """
+        self._observe(np.arange(self.num_envs))
+        return self.observation
+
+    def snake(self, env):
+        """The cells of the snake in row env from tail to head, like GameState.snake."""
+        cells = self.cols * self.rows
+        ids = self.body[env, (self.tail[env] + np.arange(self.length[env])) % cells]
+        return [(cell_id % self.cols, cell_id // self.cols) for cell_id in ids.tolist()]
+
+
+def check(env, steps, seed=None):
+    """Play random turns in env and next to it in GameStates; return mismatches.
+
+    Every row is compared after every tick with a GameState started from
+    the same seed and given the same turns.
+    """
+    rng = np.random.default_rng(seed)
+    states = [GameState(env.mode, env.level, env.difficulty, env.cols, env.rows, seed=seed)
+              for seed in env.seeds]
+    mismatches = 0
+    for _ in range(steps):
+        actions = rng.integers(NO_TURN, len(DIRECTIONS), env.num_envs)
+        _, rewards, dones, info = env.step(actions)
+        for idx, state in enumerate(states):
+            score_before = state.score
+            alive = state.step(None if actions[idx] == NO_TURN else DIRECTIONS[actions[idx]])
+            same = (not alive) == dones[idx] and state.score - score_before == rewards[idx]
+            if not alive:
+                same = same and state.score == info['final_score'][idx] and state.tick == info['final_tick'][idx]
+                states[idx] = GameState(env.mode, env.level, env.difficulty, env.cols, env.rows,
+                                        seed=env.seeds[idx])
+            else:
+                same = (same and list(state.snake) == env.snake(idx)
+                        and (state.food_x, state.food_y) == (env.food_x[idx], env.food_y[idx])
+                        and state.extra_food_visible == env.extra_visible[idx]
+                        and (not state.extra_food_visible
+                             or (state.extra_food_x, state.extra_food_y) == (env.extra_x[idx], env.extra_y[idx])))
+            if not same:
+                # Count it and carry on with both sides in step again
+                mismatches += 1
+                env._reset_env(idx)
+                states[idx] = GameState(env.mode, env.level, env.difficulty, env.cols, env.rows,
+                                        seed=env.seeds[idx])
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many Cat-a-Pillar games in lockstep.")
+    parser.add_argument('--envs', type=int, default=1024, help="games at once (default: %(default)s)")
+    parser.add_argument('--steps', type=int, default=1000, help="ticks to run (default: %(default)s)")
+    parser.add_argument('--mode', default='classic', choices=['classic', 'fun', 'retro', 'endless'])
+    parser.add_argument('--level', type=int)
+    parser.add_argument('--cols', type=int, help="board width (default: the mode's or level's own)")
+    parser.add_argument('--rows', type=int, help="board height (default: the mode's or level's own)")
+    parser.add_argument('--difficulty', default='Easy')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--check', action='store_true',
+                        help="compare every game with engine.GameState instead of timing")
+    args = parser.parse_args()
+
+    env = VecEnv(args.envs, args.mode, args.level, args.difficulty, args.cols, args.rows, seed=args.seed)
+    if args.check:
+        mismatches = check(env, args.steps, args.seed)
+        print(f"{mismatches} mismatches in {args.envs * args.steps} game ticks")
+        sys.exit(1 if mismatches else 0)
+
+    rng = np.random.default_rng(args.seed)
+    actions = rng.integers(NO_TURN, len(DIRECTIONS), (args.steps, args.envs))
+    games = 0
+    start = time.perf_counter()
+    for step_actions in actions:
+        _, _, dones, _ = env.step(step_actions)
+        games += int(dones.sum())
+    elapsed = time.perf_counter() - start
+    print(f"{args.envs * args.steps / elapsed:,.0f} game ticks/s, {games} games finished")
+
+
+if __name__ == '__main__':
+    main()